@@ -0,0 +1,104 @@
+"""
+Import-time benchmark for the nvuelab package.
+
+    python benchmarks/bench_import.py --repeat 10
+
+Every target is imported in a fresh interpreter; the reported time is the
+median over repeats minus the cost of starting an empty interpreter, and
+targets above the budget are flagged. Heavy optional dependencies (PySpin,
+cv2, PIL, tkinter) must not be pulled in by any of them.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import common  # noqa: E402
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ("PySpin", "cv2", "PIL", "tkinter", "numpy")
+TARGETS = {
+    "nvuelab": "import nvuelab",
+    "utils.camera": "from nvuelab.utils import camera",
+    "utils.video": "from nvuelab.utils import video",
+    "utils.clocks": "from nvuelab.utils import clocks",
+    "utils.telemetry": "from nvuelab.utils import telemetry",
+    "utils.instrumentation": "from nvuelab.utils import instrumentation",
+    "utils.tracing": "from nvuelab.utils import tracing",
+    "cli --help": (
+        "import sys; from nvuelab.cli import main; sys.argv = ['nvuelab', '--help']\n"
+        "try:\n    main()\nexcept SystemExit:\n    pass"
+    ),
+}
+
+
+def time_statement(statement: str, repeat: int) -> float:
+    """Returns the median wall time in ms of running statement in a new interpreter."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", statement],
+            check=True,
+            cwd=REPO_ROOT,
+            stdout=subprocess.DEVNULL,
+        )
+        samples.append((time.perf_counter() - start) * 1e3)
+    return statistics.median(samples)
+
+
+def heavy_imports(statement: str):
+    """Returns the heavy modules left in sys.modules after running statement."""
+    probe = (
+        f"{statement}\nimport sys, json\n"
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", probe],
+        check=True,
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--budget-ms", type=float, default=100.0)
+    parser.add_argument("--output", type=Path, help="results JSON path")
+    parser.add_argument(
+        "--compare", type=Path, help="previous results JSON to compare against"
+    )
+    args = parser.parse_args(argv)
+
+    baseline = time_statement("pass", args.repeat)
+    print(f"{'interpreter startup':<24}{baseline:>8.1f} ms")
+    results = {}
+    for name, statement in TARGETS.items():
+        elapsed = max(0.0, time_statement(statement, args.repeat) - baseline)
+        heavy = heavy_imports(statement)
+        results[name] = {
+            "import_ms": elapsed,
+            "heavy_imports": heavy,
+            "within_budget": elapsed < args.budget_ms and not heavy,
+        }
+        flag = "" if results[name]["within_budget"] else "  <-- over budget"
+        loaded = f"  loads {', '.join(heavy)}" if heavy else ""
+        print(f"{name:<24}{elapsed:>8.1f} ms{loaded}{flag}")
+    common.write_results(results, args.output, "import")
+    if args.compare:
+        common.compare_results(results, args.compare, key="import_ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Frame path benchmarks driven by synthetic frames, no camera required.
+
+    python benchmarks/bench_pipeline.py --width 1920 --height 1080 --fps 100
+    python benchmarks/bench_pipeline.py --case resize --case writer_avc1 --compare old.json
+
+Each case runs in its own process so peak RSS is per case. Results are written
+as JSON (benchmarks/results/ by default) together with the git revision.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from queue import Queue
+
+import cv2 as cv
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import common  # noqa: E402
+
+# fourcc per OpenCV writer backend; avc1 matches nvuelab.utils.video.video_writer_init
+WRITER_BACKENDS = {
+    "writer_avc1": "avc1",
+    "writer_mp4v": "mp4v",
+    "writer_mjpg": "MJPG",
+}
+
+
+def to_8bit(frame, bit_depth):
+    if frame.dtype == np.uint8:
+        return frame
+    return (frame >> (bit_depth - 8)).astype(np.uint8)
+
+
+def case_resize(frames, args):
+    size = (args.out_width, args.out_height)
+    return lambda i: cv.resize(frames[i % len(frames)], size)
+
+
+def case_color(frames, args):
+    code = cv.COLOR_GRAY2RGB if args.channels == 1 else cv.COLOR_BGR2RGB
+    return lambda i: cv.cvtColor(frames[i % len(frames)], code)
+
+
+def case_preview_pil(frames, args):
+    from PIL import Image
+
+    code = cv.COLOR_GRAY2RGB if args.channels == 1 else cv.COLOR_BGR2RGB
+    frames8 = [to_8bit(frame, args.bit_depth) for frame in frames]
+    return lambda i: Image.fromarray(cv.cvtColor(frames8[i % len(frames8)], code))
+
+
+def case_preview_tk(frames, args):
+    import tkinter as tk
+    from PIL import Image, ImageTk
+
+    root = tk.Tk()  # PhotoImage needs an interpreter, raises TclError without a display
+    root.withdraw()
+    label = tk.Label(root)
+    code = cv.COLOR_GRAY2RGB if args.channels == 1 else cv.COLOR_BGR2RGB
+    frames8 = [to_8bit(frame, args.bit_depth) for frame in frames]
+
+    def step(i):
+        image = Image.fromarray(cv.cvtColor(frames8[i % len(frames8)], code))
+        photo = ImageTk.PhotoImage(image=image)
+        label.config(image=photo)
+        label.image = photo
+
+    return step
+
+
+def make_writer_case(fourcc):
+    def case_writer(frames, args):
+        frames8 = [to_8bit(frame, args.bit_depth) for frame in frames]
+        height, width = frames8[0].shape[:2]
+        suffix = ".avi" if fourcc == "MJPG" else ".mp4"
+        directory = tempfile.TemporaryDirectory()
+        writer = cv.VideoWriter(
+            str(Path(directory.name) / f"bench{suffix}"),
+            cv.VideoWriter_fourcc(*fourcc),
+            args.fps or 30,
+            (width, height),
+            args.channels == 3,
+        )
+
+        def close():
+            writer.release()
+            directory.cleanup()
+
+        if not writer.isOpened():
+            close()
+            raise RuntimeError(f"OpenCV cannot open a {fourcc} writer on this machine")
+
+        def step(i):
+            writer.write(frames8[i % len(frames8)])
+
+        step.close = close
+        return step
+
+    return case_writer
+
+
+def case_queue(frames, args):
+    handoff = Queue(maxsize=args.queue_size)
+
+    def consume():
+        while True:
+            handoff.get()
+
+    threading.Thread(target=consume, daemon=True).start()
+    return lambda i: handoff.put(frames[i % len(frames)])
+
+
+def case_frame_path(frames, args):
+    """Resize on the calling thread and convert for preview on a consumer thread, as the GUI does."""
+    size = (args.out_width, args.out_height)
+    code = cv.COLOR_GRAY2RGB if args.channels == 1 else cv.COLOR_BGR2RGB
+    handoff = Queue(maxsize=args.queue_size)
+
+    def consume():
+        while True:
+            cv.cvtColor(to_8bit(handoff.get(), args.bit_depth), code)
+
+    threading.Thread(target=consume, daemon=True).start()
+    return lambda i: handoff.put(cv.resize(frames[i % len(frames)], size))
+
+
+def case_motion(frames, args):
+    """Motion score of a motion-gated recording, which must keep up with the camera on one core."""
+    from nvuelab.utils import motion
+
+    scorer = motion.MotionScorer()
+    frames8 = [to_8bit(frame, args.bit_depth) for frame in frames]
+    return lambda i: scorer.score(frames8[i % len(frames8)])
+
+
+CASES = {
+    "resize": case_resize,
+    "color": case_color,
+    "preview_pil": case_preview_pil,
+    "preview_tk": case_preview_tk,
+    **{name: make_writer_case(fourcc) for name, fourcc in WRITER_BACKENDS.items()},
+    "queue": case_queue,
+    "frame_path": case_frame_path,
+    "motion": case_motion,
+}
+
+
+def run_case(name, args):
+    frames = common.synthetic_frames(
+        args.width, args.height, args.bit_depth, args.channels
+    )
+    step = CASES[name](frames, args)
+    try:
+        step(0)  # Warm-up, excludes lazy initialisation from the measurement
+        return common.measure(step, args.duration, args.fps)
+    finally:
+        # Cases holding files or writers attach a close() to their step
+        close = getattr(step, "close", None)
+        if close is not None:
+            close()
+
+
+def run_isolated(name, argv):
+    """Runs a single case in a child process and returns its result dict."""
+    command = [sys.executable, __file__, *argv, "--case", name, "--child"]
+    completed = subprocess.run(command, capture_output=True, text=True)
+    if completed.returncode != 0:
+        message = (completed.stderr.strip().splitlines() or ["failed"])[-1]
+        return {"error": message}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument(
+        "--out-width", type=int, default=1920, help="resize target width"
+    )
+    parser.add_argument(
+        "--out-height", type=int, default=1080, help="resize target height"
+    )
+    parser.add_argument("--bit-depth", type=int, default=8, choices=(8, 10, 12, 16))
+    parser.add_argument("--channels", type=int, default=1, choices=(1, 3))
+    parser.add_argument(
+        "--fps",
+        type=float,
+        default=0.0,
+        help="pace frames at this rate (0: as fast as possible)",
+    )
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per case")
+    parser.add_argument("--queue-size", type=int, default=64)
+    parser.add_argument(
+        "--case", action="append", choices=sorted(CASES), help="run only these cases"
+    )
+    parser.add_argument("--output", type=Path, help="results JSON path")
+    parser.add_argument(
+        "--compare", type=Path, help="previous results JSON to compare against"
+    )
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    args = parse_args(argv)
+    if args.child:
+        print(json.dumps(run_case(args.case[0], args)))
+        return
+
+    # Children get the shared settings only, each with a single --case
+    child_argv = []
+    skip = False
+    for item in argv:
+        if skip:
+            skip = False
+            continue
+        if item in ("--case", "--output", "--compare"):
+            skip = True
+            continue
+        if item.split("=", 1)[0] in ("--case", "--output", "--compare"):
+            continue
+        child_argv.append(item)
+
+    results = {}
+    for name in args.case or CASES:
+        result = run_isolated(name, child_argv)
+        results[name] = result
+        if "error" in result:
+            print(f"{name:<16} skipped: {result['error']}")
+        else:
+            print(
+                f"{name:<16}{result['fps']:>10.1f} fps  capacity {result['capacity_fps']:>9.1f} fps  "
+                f"cpu {result['cpu_percent']:>6.1f}%  peak rss {result['peak_rss_mb']:>7.1f} MB"
+            )
+    common.write_results(results, args.output, "pipeline")
+    if args.compare:
+        common.compare_results(
+            {k: v for k, v in results.items() if "error" not in v}, args.compare
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Shared helpers for the camera-free benchmarks."""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Union
+
+import numpy as np
+
+
+def synthetic_frames(
+    width: int, height: int, bit_depth: int = 8, channels: int = 1, count: int = 16
+):
+    """Returns a list of random frames shaped like camera GetNDArray() output."""
+    dtype = np.uint8 if bit_depth <= 8 else np.uint16
+    shape = (height, width) if channels == 1 else (height, width, channels)
+    rng = np.random.default_rng(0)
+    high = 1 << bit_depth
+    return [rng.integers(0, high, size=shape, dtype=dtype) for _ in range(count)]
+
+
+def peak_rss_mb() -> float:
+    """Returns the peak resident set size of this process in MB, -1 if unknown."""
+    try:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+    except ImportError:
+        return -1.0
+
+
+def measure(step: Callable[[int], None], duration: float, rate: float = 0.0) -> dict:
+    """
+    Calls step(i) repeatedly for duration seconds and reports the sustained rate.
+    With rate > 0 calls are paced to that many per second, and keeps_up tells
+    whether the step finished within its frame period on average.
+    """
+    period = 1.0 / rate if rate > 0 else 0.0
+    iterations = 0
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    deadline = wall_start + duration
+    next_due = wall_start
+    busy = 0.0
+    while True:
+        now = time.perf_counter()
+        if now >= deadline:
+            break
+        if period and now < next_due:
+            time.sleep(next_due - now)
+        step_start = time.perf_counter()
+        step(iterations)
+        busy += time.perf_counter() - step_start
+        iterations += 1
+        next_due += period
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    result = {
+        "frames": iterations,
+        "seconds": wall,
+        "fps": iterations / wall if wall > 0 else 0.0,
+        "capacity_fps": iterations / busy if busy > 0 else 0.0,
+        "cpu_percent": 100.0 * cpu / wall if wall > 0 else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    if rate > 0:
+        result["target_fps"] = rate
+        result["keeps_up"] = result["capacity_fps"] >= rate
+    return result
+
+
+def git_revision() -> str:
+    """Returns the current commit hash, or 'unknown' outside a git checkout."""
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "HEAD"],
+                cwd=Path(__file__).resolve().parent,
+                stderr=subprocess.DEVNULL,
+            )
+            .decode()
+            .strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def write_results(results: dict, filepath: Union[Path, str, None], suite: str) -> Path:
+    """Writes results with machine and revision metadata as JSON and returns the path."""
+    if filepath is None:
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        filepath = (
+            Path(__file__).resolve().parent / "results" / f"{suite}_{timestamp}.json"
+        )
+    filepath = Path(filepath)
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "suite": suite,
+        "revision": git_revision(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    with open(filepath, "w", encoding="utf-8") as file:
+        json.dump(payload, file, indent=2)
+    print(f"Results saved to {filepath}")
+    return filepath
+
+
+def compare_results(
+    current: dict, baseline_path: Union[Path, str], key: str = "capacity_fps"
+):
+    """Prints the relative change of key for every case shared with a previous results file."""
+    with open(baseline_path, "r", encoding="utf-8") as file:
+        baseline = json.load(file)
+    print(f"Compared with {baseline.get('revision', 'unknown')[:10]} ({key}):")
+    for case, stats in current.items():
+        previous = baseline.get("results", {}).get(case)
+        if not previous or not previous.get(key):
+            continue
+        change = 100.0 * (stats[key] - previous[key]) / previous[key]
+        print(
+            f"  {case:<28}{previous[key]:>10.1f} -> {stats[key]:>10.1f}  ({change:+.1f}%)"
+        )
@@ -0,0 +1,5 @@
+import sys
+
+from nvuelab.cli import main
+
+sys.exit(main())
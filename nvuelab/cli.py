@@ -0,0 +1,208 @@
+"""Command line entry point: ``nvuelab <command>``."""
+
+import argparse
+import sys
+from pathlib import Path
+
+
+def cmd_recover(args):
+    # Imported here so that --help never loads OpenCV
+    from nvuelab.utils import video
+
+    output = video.recover_recording(args.recording, args.output)
+    return 0 if output is not None else 1
+
+
+def cmd_budget(args):
+    # Imported here so that --help never loads PySpin or OpenCV
+    from nvuelab.utils import budget
+
+    try:
+        system = budget.PySpin.System.GetInstance()
+    except ImportError as e:
+        print(e)
+        return 1
+    cam_list = system.GetCameras()
+    try:
+        if args.camera >= cam_list.GetSize():
+            print(f"Camera {args.camera} not found, {cam_list.GetSize()} detected")
+            return 1
+        cam = cam_list.GetByIndex(args.camera)
+        cam.Init()
+        limits = budget.read_camera_limits(cam)
+        cam.DeInit()
+        del cam
+    finally:
+        cam_list.Clear()
+        system.ReleaseInstance()
+
+    output_size = args.output_size or (limits.width, limits.height)
+    print(
+        f"{limits.width}x{limits.height} {limits.pixel_format}, "
+        f"{limits.bytes_per_frame / 1e6:.2f} MB/frame, exposure {limits.exposure_us:.0f} us"
+    )
+    encoder_fps = disk_bytes_per_second = 0.0
+    if not args.skip_host:
+        encoder_fps = budget.measure_encoder_fps(
+            *output_size, args.fourcc, args.seconds
+        )
+        disk_bytes_per_second = budget.measure_disk_throughput(args.output_dir)
+    plan = budget.frame_rate_budget(
+        limits,
+        encoder_fps,
+        disk_bytes_per_second,
+        output_size,
+        args.fourcc,
+        args.fps,
+    )
+    print(plan.format_report())
+    return 0 if plan.fits else 2
+
+
+def cmd_bandwidth(args):
+    # Imported here so that --help never loads PySpin
+    from nvuelab.utils import bandwidth
+
+    try:
+        system = bandwidth.PySpin.System.GetInstance()
+    except ImportError as e:
+        print(e)
+        return 1
+    demands = []
+    cam_list = system.GetCameras()
+    cams = [cam_list.GetByIndex(i) for i in range(cam_list.GetSize())]
+    try:
+        if not cams:
+            print("No cameras detected")
+            return 1
+        # Indexed so no loop variable holds a camera when the system is released
+        for index in range(len(cams)):
+            cams[index].Init()
+        demands = bandwidth.plan_bandwidth(
+            [bandwidth.camera_demand(cam, args.fps) for cam in cams],
+            args.capacity * 1e6 if args.capacity else None,
+        )
+        if args.apply:
+            for index, demand in enumerate(demands):
+                limit = bandwidth.apply_bandwidth(cams[index], demand.allocated)
+                if limit is not None:
+                    demand.allocated = limit
+        if args.measure:
+            bandwidth.measure_throughput(cams, demands, args.measure)
+        print(bandwidth.format_report(demands))
+    except bandwidth.PySpin.SpinnakerException as e:
+        print(f"Bandwidth planning failed: {e}")
+        return 1
+    finally:
+        # Spinnaker refuses to release the system while a camera reference is alive
+        while cams:
+            camera_ptr = cams.pop()
+            if camera_ptr.IsInitialized():
+                camera_ptr.DeInit()
+            del camera_ptr
+        cam_list.Clear()
+        system.ReleaseInstance()
+    starved = [
+        demand.serial for demand in demands if demand.allocated < demand.required
+    ]
+    if starved:
+        print(f"Link oversubscribed, lower the frame rate of {', '.join(starved)}")
+    return 2 if starved else 0
+
+
+def parse_size(text):
+    width, _, height = text.lower().partition("x")
+    return int(width), int(height)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="nvuelab", description="FLIR camera acquisition tools"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    recover = subparsers.add_parser(
+        "recover",
+        help="rebuild a playable video from the fragments of an interrupted recording",
+    )
+    recover.add_argument(
+        "recording",
+        type=Path,
+        help="path the recording was started with, e.g. video_<timestamp>.mp4",
+    )
+    recover.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        help="output file (default: <recording>_recovered with the recording's suffix)",
+    )
+    recover.set_defaults(func=cmd_recover)
+
+    plan = subparsers.add_parser(
+        "budget",
+        help="print the highest frame rate the camera, link, encoder and disk sustain",
+    )
+    plan.add_argument("--camera", type=int, default=0, help="camera index")
+    plan.add_argument(
+        "--fps",
+        type=float,
+        help="trigger rate to check; exit code 2 if it does not fit",
+    )
+    plan.add_argument(
+        "--output-dir",
+        type=Path,
+        default=Path.cwd(),
+        help="directory recordings are written to (default: current directory)",
+    )
+    plan.add_argument(
+        "--output-size",
+        type=parse_size,
+        help="size written to disk as WIDTHxHEIGHT (default: camera ROI)",
+    )
+    plan.add_argument("--fourcc", default="avc1", help="codec of the recording")
+    plan.add_argument(
+        "--seconds", type=float, default=2.0, help="duration of the encoder measurement"
+    )
+    plan.add_argument(
+        "--skip-host",
+        action="store_true",
+        help="only report camera and link limits, without measuring the encoder and disk",
+    )
+    plan.set_defaults(func=cmd_budget)
+
+    link = subparsers.add_parser(
+        "bandwidth",
+        help="share the host controller between all cameras and report their throughput",
+    )
+    link.add_argument(
+        "--fps",
+        type=float,
+        help="planned rate of every camera (default: each camera's resulting frame rate)",
+    )
+    link.add_argument(
+        "--capacity",
+        type=float,
+        help="usable controller throughput in MB/s (default: 380 for USB3, 115 for GigE)",
+    )
+    link.add_argument(
+        "--apply",
+        action="store_true",
+        help="set the planned throughput limits on the cameras",
+    )
+    link.add_argument(
+        "--measure",
+        type=float,
+        metavar="SECONDS",
+        help="stream all cameras at once for SECONDS and report the received throughput",
+    )
+    link.set_defaults(func=cmd_bandwidth)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""Alignment of video frames to event streams recorded on an external DAQ."""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+
+# Camera timestamps are in ns, DAQ timestamps are expected in seconds
+CAMERA_TICKS_PER_SECOND = 1e9
+FRAME_EVENT_DTYPE = np.dtype(
+    [("event", "<i8"), ("frame", "<i8"), ("event_time", "<f8"), ("lag", "<f8")]
+)
+EVENT_RANGE_DTYPE = np.dtype(
+    [("frame", "<i8"), ("first_event", "<i8"), ("last_event", "<i8")]
+)
+
+
+@dataclass
+class ClockFit:
+    """
+    Linear map from camera time to DAQ time, daq = slope * camera + offset (seconds).
+    Attributes:
+        slope (float): Relative clock rate; 1 + drift.
+        offset (float): DAQ time at camera time 0.
+        residual_std (float): Standard deviation of the matched residuals in seconds.
+        matched (int): Number of frame/pulse pairs used in the fit.
+    """
+
+    slope: float = 1.0
+    offset: float = 0.0
+    residual_std: float = 0.0
+    matched: int = 0
+
+    @property
+    def drift_ppm(self) -> float:
+        return (self.slope - 1.0) * 1e6
+
+    def to_daq(self, camera_seconds: np.ndarray) -> np.ndarray:
+        """Converts camera times in seconds to DAQ times."""
+        return camera_seconds * self.slope + self.offset
+
+
+def load_timestamps(
+    filepath: Union[Path, str], ticks_per_second: float = 1.0
+) -> np.ndarray:
+    """
+    Loads a timestamp array in seconds from .npy/.npz/.csv/.txt. TTL logs saved by
+    nvuelab.utils.ttl are recognised by their timestamp field and converted from ns.
+    """
+    filepath = Path(filepath)
+    if filepath.suffix == ".npz":
+        with np.load(filepath) as archive:
+            data = archive[archive.files[0]]
+    elif filepath.suffix == ".npy":
+        data = np.load(filepath)
+    else:
+        data = np.loadtxt(
+            filepath, delimiter="," if filepath.suffix == ".csv" else None
+        )
+    if data.dtype.names and "timestamp" in data.dtype.names:
+        return data["timestamp"].astype(np.float64) / CAMERA_TICKS_PER_SECOND
+    return np.ravel(data).astype(np.float64) / ticks_per_second
+
+
+def _match(frames: np.ndarray, events: np.ndarray, fit: ClockFit, tolerance: float):
+    """Pairs each frame with its nearest event under fit; returns index arrays of pairs within tolerance."""
+    predicted = fit.to_daq(frames)
+    right = np.clip(np.searchsorted(events, predicted), 1, len(events) - 1)
+    left = right - 1
+    nearest = np.where(
+        np.abs(events[left] - predicted) <= np.abs(events[right] - predicted),
+        left,
+        right,
+    )
+    keep = np.abs(events[nearest] - predicted) <= tolerance
+    return np.flatnonzero(keep), nearest[keep]
+
+
+def fit_clock(
+    frame_times: np.ndarray,
+    pulse_times: np.ndarray,
+    candidates: int = 5,
+    window_frames: int = 200,
+) -> ClockFit:
+    """
+    Estimates offset and drift between camera frame times and the DAQ pulse times that
+    triggered them (both in seconds). Candidate offsets from the first pulses/frames are
+    scored by how many frames they match, tolerating missing pulses or frames at the
+    start; a strictly periodic train only defines the pairing up to whole periods, so
+    ties keep the first frame paired with the first pulse. The fit is then refined by
+    least squares with 3-MAD outlier rejection over a window that starts at
+    window_frames periods and grows 4x per pass, so accumulated drift never exceeds
+    the matching tolerance before it has been estimated.
+    """
+    frames = np.asarray(frame_times, dtype=np.float64)
+    pulses = np.sort(np.asarray(pulse_times, dtype=np.float64))
+    if frames.size < 2 or pulses.size < 2:
+        raise ValueError("Need at least two frames and two pulses to fit clocks")
+    tolerance = 0.5 * float(np.median(np.diff(frames)))
+
+    period = 2 * tolerance
+    window = window_frames * period
+    first_window = frames[frames <= frames[0] + window]
+
+    best, best_count = ClockFit(), -1
+    for i in range(min(candidates, pulses.size)):
+        for j in range(min(candidates, frames.size)):
+            trial = ClockFit(offset=pulses[i] - frames[j])
+            count = _match(first_window, pulses, trial, tolerance)[0].size
+            if count > best_count:
+                best, best_count = trial, count
+
+    fit = best
+    while True:
+        covers_all = frames[0] + window >= frames[-1]
+        subset = frames if covers_all else frames[frames <= frames[0] + window]
+        frame_index, pulse_index = _match(subset, pulses, fit, tolerance)
+        if frame_index.size < 2:
+            raise ValueError("Could not pair frames with pulses")
+        x, y = subset[frame_index], pulses[pulse_index]
+        slope, offset = np.polyfit(x, y, 1)
+        residuals = y - (slope * x + offset)
+        mad = float(np.median(np.abs(residuals - np.median(residuals))))
+        if mad > 0:
+            inliers = np.abs(residuals) <= 3 * 1.4826 * mad
+            if inliers.sum() >= 2:
+                slope, offset = np.polyfit(x[inliers], y[inliers], 1)
+                residuals = residuals[inliers]
+        fit = ClockFit(
+            slope=float(slope),
+            offset=float(offset),
+            residual_std=float(np.std(residuals)),
+            matched=int(residuals.size),
+        )
+        if covers_all:
+            return fit
+        window *= 4
+
+
+def map_events_to_frames(
+    frame_times: np.ndarray, event_times: np.ndarray, fit: ClockFit
+) -> np.ndarray:
+    """
+    Returns one FRAME_EVENT_DTYPE row per event: the index of the last frame that started
+    at or before the event (-1 if before the first frame) and the lag since that frame.
+    """
+    frames_daq = fit.to_daq(np.asarray(frame_times, dtype=np.float64))
+    events = np.asarray(event_times, dtype=np.float64)
+    frame = np.searchsorted(frames_daq, events, side="right") - 1
+    table = np.empty(events.size, dtype=FRAME_EVENT_DTYPE)
+    table["event"] = np.arange(events.size)
+    table["frame"] = frame
+    table["event_time"] = events
+    table["lag"] = np.where(
+        frame >= 0, events - frames_daq[np.maximum(frame, 0)], np.nan
+    )
+    return table
+
+
+def map_frames_to_events(
+    frame_times: np.ndarray, event_times: np.ndarray, fit: ClockFit
+) -> np.ndarray:
+    """
+    Returns one EVENT_RANGE_DTYPE row per frame: the index range [first_event,
+    last_event) of the events between its start and the next frame's start. Both
+    frames and events must be in time order, raising ValueError otherwise, so the
+    ranges index the caller's event array directly.
+    """
+    frames_daq = fit.to_daq(np.asarray(frame_times, dtype=np.float64))
+    events = np.asarray(event_times, dtype=np.float64)
+    if np.any(np.diff(events) < 0):
+        raise ValueError("Event times must be sorted")
+    if np.any(np.diff(frames_daq) < 0):
+        raise ValueError("Frame times must be sorted")
+    bounds = np.searchsorted(events, frames_daq, side="left")
+    table = np.empty(frames_daq.size, dtype=EVENT_RANGE_DTYPE)
+    table["frame"] = np.arange(frames_daq.size)
+    table["first_event"] = bounds
+    table["last_event"] = np.append(bounds[1:], events.size)
+    return table
+
+
+def save_table(table: np.ndarray, filepath: Union[Path, str]) -> Path:
+    """
+    Saves a mapping table. .parquet needs pandas with pyarrow, .npz is compressed,
+    any other suffix is written as .npy.
+    """
+    filepath = Path(filepath)
+    if filepath.suffix == ".parquet":
+        import pandas as pd
+
+        pd.DataFrame(table).to_parquet(filepath, index=False)
+    elif filepath.suffix == ".npz":
+        np.savez_compressed(filepath, table=table)
+    else:
+        np.save(filepath, table)
+    print(f"Table saved to {filepath}")
+    return filepath
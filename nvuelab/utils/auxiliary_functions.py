@@ -0,0 +1,40 @@
+import importlib
+import sys
+import types
+
+# Hints shown when a lazily imported dependency turns out to be missing
+INSTALL_HINTS = {
+    "PySpin": "install the Spinnaker SDK and its spinnaker_python wheel",
+    "cv2": "pip install opencv-python",
+    "PIL": "pip install pillow",
+}
+
+
+class LazyModule(types.ModuleType):
+    """
+    Stand-in for a module that is only imported the first time one of its
+    attributes is used. Resolved attributes are cached on the stand-in, so
+    after the first access lookups cost the same as on the real module.
+    """
+
+    def __getattr__(self, attr):
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        try:
+            module = importlib.import_module(self.__name__)
+        except ImportError as e:
+            hint = INSTALL_HINTS.get(self.__name__, f"install {self.__name__}")
+            raise ImportError(
+                f"{self.__name__} is required for this feature ({hint})"
+            ) from e
+        value = getattr(module, attr)
+        setattr(self, attr, value)
+        return value
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """Returns the module if it is already imported, otherwise a LazyModule for it."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
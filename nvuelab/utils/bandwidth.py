@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Union
+
+from nvuelab.utils import budget, camera
+from nvuelab.utils.auxiliary_functions import lazy_import
+
+PySpin = lazy_import("PySpin")
+
+# Usable bytes/s of one host controller per interface, below the nominal line rate
+CONTROLLER_CAPACITY = {"USB3": 380e6, "GigE": 115e6}
+# GigE line rate in bytes/s, used to turn a throughput limit into an inter-packet delay
+GIGE_LINE_RATE = 125e6
+# Fraction of the controller that is allocated, the rest absorbs bursts and protocol overhead
+HEADROOM = 0.9
+
+
+@dataclass
+class CameraDemand:
+    """
+    Link bandwidth one camera needs and what it is given.
+    Attributes:
+        serial (str): Camera serial number.
+        interface (str): "USB3" or "GigE".
+        fps (float): Frame rate the camera is planned to run at.
+        bytes_per_frame (int): PayloadSize.
+        allocated (float): Throughput limit assigned by plan_bandwidth, bytes/s.
+        measured (float): Throughput observed while streaming, bytes/s, 0 if not measured.
+    """
+
+    serial: str
+    interface: str
+    fps: float
+    bytes_per_frame: int
+    allocated: float = 0.0
+    measured: float = 0.0
+
+    @property
+    def required(self) -> float:
+        return self.fps * self.bytes_per_frame
+
+    @property
+    def sustainable_fps(self) -> float:
+        return self.allocated / self.bytes_per_frame if self.bytes_per_frame else 0.0
+
+
+def interface_type(cam: PySpin.CameraPtr) -> str:
+    """Returns "GigE" for GigE Vision cameras and "USB3" otherwise."""
+    device_type = PySpin.CEnumerationPtr(cam.GetTLDeviceNodeMap().GetNode("DeviceType"))
+    if PySpin.IsReadable(device_type):
+        if device_type.GetCurrentEntry().GetSymbolic() == "GigEVision":
+            return "GigE"
+    return "USB3"
+
+
+def camera_demand(
+    cam: PySpin.CameraPtr, fps: Union[float, None] = None
+) -> CameraDemand:
+    """Reads one initialised camera's payload and planned rate, AcquisitionResultingFrameRate by default."""
+    limits = budget.read_camera_limits(cam)
+    _, serial = camera.get_camera_info(cam)
+    return CameraDemand(
+        serial=serial,
+        interface=interface_type(cam),
+        fps=fps or limits.resulting_fps,
+        bytes_per_frame=limits.bytes_per_frame,
+    )
+
+
+def plan_bandwidth(
+    demands: List[CameraDemand],
+    capacity: Union[float, None] = None,
+    headroom: float = HEADROOM,
+) -> List[CameraDemand]:
+    """
+    Splits a shared controller between cameras, per interface type. When the demand
+    fits, each camera gets what it needs plus an equal share of the spare bandwidth;
+    when it does not, the usable bandwidth is shared in proportion to demand, so every
+    camera slows down by the same factor instead of some starving. capacity
+    overrides CONTROLLER_CAPACITY for every interface.
+    """
+    for interface in {demand.interface for demand in demands}:
+        group = [demand for demand in demands if demand.interface == interface]
+        usable = (capacity or CONTROLLER_CAPACITY[interface]) * headroom
+        required = sum(demand.required for demand in group)
+        if required <= usable:
+            spare = (usable - required) / len(group)
+            for demand in group:
+                demand.allocated = demand.required + spare
+        else:
+            for demand in group:
+                demand.allocated = usable * demand.required / required
+    return demands
+
+
+def apply_bandwidth(cam: PySpin.CameraPtr, allocated: float) -> Union[float, None]:
+    """
+    Limits a camera's link throughput to allocated bytes/s with
+    DeviceLinkThroughputLimit, or on GigE cameras without it, with an inter-packet
+    delay (GevSCPD). GigE cameras first get the largest packet size the network
+    path carries, which lowers per-packet overhead. Returns the limit set, or None
+    if the camera supports neither. Must be called before BeginAcquisition.
+    """
+    nodemap = cam.GetNodeMap()
+    packet_size = PySpin.CIntegerPtr(nodemap.GetNode("GevSCPSPacketSize"))
+    if PySpin.IsWritable(packet_size):
+        try:
+            packet_size.SetValue(min(cam.DiscoverMaxPacketSize(), packet_size.GetMax()))
+        except PySpin.SpinnakerException as e:
+            print(f"Could not discover the maximum packet size: {e}")
+
+    limit = PySpin.CIntegerPtr(nodemap.GetNode("DeviceLinkThroughputLimit"))
+    if PySpin.IsWritable(limit):
+        value = int(min(max(allocated, limit.GetMin()), limit.GetMax()))
+        value -= (value - limit.GetMin()) % limit.GetInc()
+        limit.SetValue(value)
+        return float(value)
+
+    packet_delay = PySpin.CIntegerPtr(nodemap.GetNode("GevSCPD"))
+    tick_frequency = PySpin.CIntegerPtr(nodemap.GetNode("GevTimestampTickFrequency"))
+    if not (
+        PySpin.IsReadable(packet_size)
+        and PySpin.IsWritable(packet_delay)
+        and PySpin.IsReadable(tick_frequency)
+    ):
+        print("Camera supports neither a throughput limit nor a packet delay")
+        return None
+    # Each packet takes size / line rate on the wire; the delay stretches it to size / allocated
+    seconds = packet_size.GetValue() * (1 / allocated - 1 / GIGE_LINE_RATE)
+    ticks = int(max(0.0, seconds) * tick_frequency.GetValue())
+    packet_delay.SetValue(min(max(ticks, packet_delay.GetMin()), packet_delay.GetMax()))
+    return packet_size.GetValue() / (
+        packet_size.GetValue() / GIGE_LINE_RATE
+        + packet_delay.GetValue() / tick_frequency.GetValue()
+    )
+
+
+def measure_throughput(cams, demands: List[CameraDemand], seconds: float = 3.0):
+    """
+    Streams every camera at once for seconds, one grab thread each, and stores the
+    received bytes/s in each demand's measured. Triggered cameras only deliver
+    frames if their triggers are running.
+    """
+
+    def grab(cam, demand):
+        received = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            try:
+                image_result = cam.GetNextImage(100)
+            except PySpin.SpinnakerException:
+                continue
+            if not image_result.IsIncomplete():
+                received += image_result.GetBufferSize()
+            image_result.Release()
+        demand.measured = received / (time.perf_counter() - start)
+
+    for cam in cams:
+        cam.BeginAcquisition()
+    threads = [
+        threading.Thread(target=grab, args=(cam, demand))
+        for cam, demand in zip(cams, demands)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for cam in cams:
+        cam.EndAcquisition()
+
+
+def format_report(demands: List[CameraDemand]) -> str:
+    """Returns a printable table of required, allocated and measured throughput per camera."""
+    lines = [
+        f"{'serial':<12}{'link':<6}{'fps':>8}{'required MB/s':>15}"
+        f"{'allocated MB/s':>16}{'max fps':>9}{'measured MB/s':>15}"
+    ]
+    for demand in demands:
+        measured = (
+            f"{demand.measured / 1e6:>15.1f}" if demand.measured else f"{'-':>15}"
+        )
+        lines.append(
+            f"{demand.serial:<12}{demand.interface:<6}{demand.fps:>8.1f}"
+            f"{demand.required / 1e6:>15.1f}{demand.allocated / 1e6:>16.1f}"
+            f"{demand.sustainable_fps:>9.1f}{measured}"
+        )
+    for interface in sorted({demand.interface for demand in demands}):
+        total = sum(d.required for d in demands if d.interface == interface)
+        lines.append(f"{interface} total required {total / 1e6:.1f} MB/s")
+    return "\n".join(lines)
+
+
+def summarize(demands: List[CameraDemand]) -> Dict[str, Dict[str, float]]:
+    """Returns the report as a dict per serial number, for the session log."""
+    return {
+        demand.serial: {
+            "fps": demand.fps,
+            "required": demand.required,
+            "allocated": demand.allocated,
+            "measured": demand.measured,
+        }
+        for demand in demands
+    }
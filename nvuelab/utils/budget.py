@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Union
+
+from nvuelab.utils import disk
+from nvuelab.utils.auxiliary_functions import lazy_import
+
+PySpin = lazy_import("PySpin")
+cv = lazy_import("cv2")
+np = lazy_import("numpy")
+
+# Bits per pixel of common pixel formats, used when the camera does not report PayloadSize
+BITS_PER_PIXEL = {
+    "Mono8": 8,
+    "Mono10p": 10,
+    "Mono10Packed": 10,
+    "Mono12p": 12,
+    "Mono12Packed": 12,
+    "Mono16": 16,
+    "BayerRG8": 8,
+    "BayerRG16": 16,
+    "RGB8": 24,
+    "BGR8": 24,
+}
+# Pipeline stages in the order a frame goes through them
+BUDGET_STAGES = ("exposure", "camera", "link", "encoder", "disk")
+DISK_PROBE_MB = 64
+
+
+@dataclass
+class CameraLimits:
+    """
+    The camera settings that bound the frame rate.
+    Attributes:
+        width (int): ROI width.
+        height (int): ROI height.
+        pixel_format (str): PixelFormat entry name.
+        bytes_per_frame (int): Bytes sent per frame (PayloadSize, including chunks).
+        exposure_us (float): ExposureTime.
+        resulting_fps (float): AcquisitionResultingFrameRate, the camera's own limit.
+        link_limit (float): DeviceLinkThroughputLimit in bytes/s, 0 if unknown.
+    """
+
+    width: int
+    height: int
+    pixel_format: str = "Mono8"
+    bytes_per_frame: int = 0
+    exposure_us: float = 0.0
+    resulting_fps: float = 0.0
+    link_limit: float = 0.0
+
+
+def _read(nodemap, name: str, pointer: str):
+    node = getattr(PySpin, pointer)(nodemap.GetNode(name))
+    return node.GetValue() if PySpin.IsReadable(node) else None
+
+
+def read_camera_limits(cam: PySpin.CameraPtr) -> CameraLimits:
+    """Reads ROI, pixel format, payload, exposure, resulting frame rate and link limit."""
+    nodemap = cam.GetNodeMap()
+    pixel_format = PySpin.CEnumerationPtr(nodemap.GetNode("PixelFormat"))
+    limits = CameraLimits(
+        width=_read(nodemap, "Width", "CIntegerPtr") or 0,
+        height=_read(nodemap, "Height", "CIntegerPtr") or 0,
+        pixel_format=(
+            pixel_format.GetCurrentEntry().GetSymbolic()
+            if PySpin.IsReadable(pixel_format)
+            else "Mono8"
+        ),
+        bytes_per_frame=_read(nodemap, "PayloadSize", "CIntegerPtr") or 0,
+        exposure_us=_read(nodemap, "ExposureTime", "CFloatPtr") or 0.0,
+        resulting_fps=_read(nodemap, "AcquisitionResultingFrameRate", "CFloatPtr")
+        or 0.0,
+        link_limit=_read(nodemap, "DeviceLinkThroughputLimit", "CIntegerPtr") or 0,
+    )
+    if not limits.bytes_per_frame:
+        bits = BITS_PER_PIXEL.get(limits.pixel_format, 8)
+        limits.bytes_per_frame = limits.width * limits.height * bits // 8
+    return limits
+
+
+def measure_encoder_fps(
+    width: int, height: int, fourcc: str = "avc1", seconds: float = 2.0
+) -> float:
+    """Returns how many frames per second OpenCV encodes at this size, 0 if the codec is unavailable."""
+    # A moving gradient with noise, harder to compress than a static scene
+    rng = np.random.default_rng(0)
+    gradient = np.add.outer(np.arange(height), np.arange(width)).astype(np.uint8)
+    frames = [
+        cv.add(
+            np.roll(gradient, 8 * i, axis=1),
+            rng.integers(0, 16, gradient.shape, np.uint8),
+        )
+        for i in range(8)
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+        writer = cv.VideoWriter(
+            str(Path(directory) / "budget.mp4"),
+            cv.VideoWriter_fourcc(*fourcc),
+            30,
+            (width, height),
+            False,
+        )
+        if not writer.isOpened():
+            print(f"OpenCV cannot open a {fourcc} writer on this machine")
+            return 0.0
+        count = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            writer.write(frames[count % len(frames)])
+            count += 1
+        elapsed = time.perf_counter() - start
+        writer.release()
+    return count / elapsed
+
+
+def measure_disk_throughput(
+    directory: Union[Path, str], megabytes: int = DISK_PROBE_MB
+) -> float:
+    """Returns the sustained bytes/s of writing and fsyncing a probe file in directory."""
+    probe = Path(directory) / ".nvuelab-throughput-probe"
+    block = os.urandom(1 << 20)
+    start = time.perf_counter()
+    with open(probe, "wb") as file:
+        for _ in range(megabytes):
+            file.write(block)
+        file.flush()
+        os.fsync(file.fileno())
+    elapsed = time.perf_counter() - start
+    probe.unlink()
+    return megabytes * len(block) / elapsed
+
+
+@dataclass
+class FrameRateBudget:
+    """
+    Highest frame rate each pipeline stage sustains, and the resulting budget.
+    Attributes:
+        stages (dict): Maximum fps per stage in BUDGET_STAGES order; unknown stages are left out.
+        requested_fps (float): Trigger rate to check against, None to only report.
+    """
+
+    stages: Dict[str, float] = field(default_factory=dict)
+    requested_fps: Union[float, None] = None
+
+    @property
+    def sustainable_fps(self) -> float:
+        return min(self.stages.values()) if self.stages else 0.0
+
+    @property
+    def bottleneck(self) -> str:
+        return min(self.stages, key=self.stages.get) if self.stages else ""
+
+    @property
+    def fits(self) -> bool:
+        return self.requested_fps is None or self.requested_fps <= self.sustainable_fps
+
+    def format_report(self) -> str:
+        """Returns a printable table of the stage limits with the bottleneck marked."""
+        lines = [f"{'stage':<10}{'max fps':>12}"]
+        for stage, fps in self.stages.items():
+            marker = "  <- bottleneck" if stage == self.bottleneck else ""
+            lines.append(f"{stage:<10}{fps:>12.1f}{marker}")
+        lines.append(f"sustainable {self.sustainable_fps:.1f} fps")
+        if self.requested_fps is not None:
+            verdict = (
+                "fits"
+                if self.fits
+                else f"exceeds the budget, limited by {self.bottleneck}"
+            )
+            lines.append(f"requested {self.requested_fps:.1f} fps {verdict}")
+        return "\n".join(lines)
+
+
+def frame_rate_budget(
+    limits: CameraLimits,
+    encoder_fps: float = 0.0,
+    disk_bytes_per_second: float = 0.0,
+    output_size=None,
+    fourcc: str = "avc1",
+    requested_fps: Union[float, None] = None,
+) -> FrameRateBudget:
+    """
+    Combines the camera limits with measured host throughput into the highest frame
+    rate every stage sustains. output_size is the (width, height) written to disk,
+    the ROI by default. Stages with no information (0) are left out.
+    """
+    width, height = output_size or (limits.width, limits.height)
+    candidates = {
+        "exposure": 1e6 / limits.exposure_us if limits.exposure_us else 0.0,
+        "camera": limits.resulting_fps,
+        "link": (
+            limits.link_limit / limits.bytes_per_frame
+            if limits.link_limit and limits.bytes_per_frame
+            else 0.0
+        ),
+        "encoder": encoder_fps,
+        "disk": (
+            disk_bytes_per_second
+            / disk.estimate_bytes_per_second(width, height, 1, fourcc=fourcc)
+            if disk_bytes_per_second and width and height
+            else 0.0
+        ),
+    }
+    return FrameRateBudget(
+        stages={
+            stage: candidates[stage] for stage in BUDGET_STAGES if candidates[stage] > 0
+        },
+        requested_fps=requested_fps,
+    )
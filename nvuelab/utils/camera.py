@@ -1,8 +1,19 @@
-import PySpin
+from __future__ import annotations
 
+from typing import Union
 
-def init():
+from nvuelab.utils.auxiliary_functions import lazy_import
+
+# Loaded on first use so the package works on machines without the Spinnaker runtime
+PySpin = lazy_import("PySpin")
+np = lazy_import("numpy")
+cv = lazy_import("cv2")
+
+
+def init(serial: Union[str, None] = None, discovery=None):
     # you have to return system for it to work :)
+    if discovery is not None:
+        return init_from_discovery(discovery, serial)
     system = PySpin.System.GetInstance()
     cam_list = system.GetCameras()
     size = cam_list.GetSize()
@@ -32,6 +43,33 @@ def init():
     return system, cam
 
 
+def init_from_discovery(discovery, serial: Union[str, None] = None):
+    """
+    Initialises a camera from a CameraDiscovery cache, by serial number, without
+    enumerating again; prompts for a serial number when several are connected.
+    """
+    discovery.wait()
+    serials = discovery.serials()
+    if not serials:
+        print("No cameras detected.")
+        return discovery.system, None
+    if serial is None and len(serials) == 1:
+        serial = serials[0]
+    while serial not in serials:  # Keep asking until a connected camera is chosen
+        print(f"Connected cameras: {', '.join(serials)}")
+        serial = input("Enter the serial number of the camera to use: ").strip()
+    cam = discovery.get(serial)
+    if cam is None:  # Disconnected while the serial number was chosen
+        print(f"Camera {serial} is not connected.")
+        return discovery.system, None
+    cam.Init()
+    device_model_name, device_serial_number = get_camera_info(cam)
+    print(
+        f"Camera Model Loaded: {device_model_name}, Serial Number: {device_serial_number}"
+    )
+    return discovery.system, cam
+
+
 def restart_camera(cam: PySpin.CameraPtr):
     if cam.IsStreaming():
         # Stop acquisition if the camera is currently streaming
@@ -103,6 +141,267 @@ def get_camera_info(cam: PySpin.CameraPtr):
     return device_model_name, device_serial_number
 
 
+def set_enum_value(nodemap, node_name: str, entry_name: str) -> bool:
+    # Selects entry_name on an enumeration node; returns False, with the reason printed, if not possible
+    node = PySpin.CEnumerationPtr(nodemap.GetNode(node_name))
+    if not PySpin.IsWritable(node):
+        print(f"{node_name} is not writable")
+        return False
+    entry = node.GetEntryByName(entry_name)
+    if not PySpin.IsReadable(entry):
+        print(f"{node_name} has no entry {entry_name}")
+        return False
+    node.SetIntValue(entry.GetValue())
+    return True
+
+
+def set_number_value(nodemap, node_name: str, value) -> bool:
+    # Sets an integer or float node, refusing values outside the camera range instead of clamping
+    node = nodemap.GetNode(node_name)
+    node = (
+        PySpin.CIntegerPtr(node)
+        if node is not None and node.GetPrincipalInterfaceType() == PySpin.intfIInteger
+        else PySpin.CFloatPtr(node)
+    )
+    if not PySpin.IsWritable(node):
+        print(f"{node_name} is not writable")
+        return False
+    if not node.GetMin() <= value <= node.GetMax():
+        print(
+            f"{node_name} {value} is outside the camera range {node.GetMin()}..{node.GetMax()}"
+        )
+        return False
+    node.SetValue(value)
+    return True
+
+
+def configure_internal_clock(
+    cam: PySpin.CameraPtr,
+    fps: float,
+    duty: float = 0.5,
+    output_line: Union[str, None] = None,
+):
+    # Triggers frames from Counter0 counting the camera's 1 MHz tick, so frame timing involves no host.
+    # The counter restarts whenever the camera waits for a trigger, high for duty of each period.
+    # With output_line the pulse train is also driven on that GPIO line for other cameras and the DAQ.
+    # Returns the frame rate actually programmed, or None if the camera lacks counters
+    if not 0 < duty < 1:
+        raise ValueError("duty must be between 0 and 1")
+    nodemap = cam.GetNodeMap()
+    period_ticks = round(1e6 / fps)
+    high_ticks = max(1, round(period_ticks * duty))
+    ok = (
+        set_enum_value(nodemap, "CounterSelector", "Counter0")
+        and set_enum_value(nodemap, "CounterEventSource", "MHzTick")
+        and set_number_value(nodemap, "CounterDuration", high_ticks)
+        and set_number_value(nodemap, "CounterDelay", period_ticks - high_ticks)
+        and set_enum_value(nodemap, "CounterTriggerSource", "FrameTriggerWait")
+        and set_enum_value(nodemap, "CounterTriggerActivation", "LevelHigh")
+    )
+    if not ok:
+        print("Could not configure the counter, internal clock unavailable")
+        return None
+    if output_line is not None:
+        ok = (
+            set_enum_value(nodemap, "LineSelector", output_line)
+            and set_enum_value(nodemap, "LineMode", "Output")
+            and set_enum_value(nodemap, "LineSource", "Counter0Active")
+        )
+        if not ok:
+            print(f"Could not output the clock on {output_line}")
+
+    # Change trigger settings with the trigger off, as configure_trigger does
+    cam.TriggerMode.SetValue(PySpin.TriggerMode_Off)
+    set_enum_value(nodemap, "TriggerSelector", "FrameStart")
+    if not set_enum_value(nodemap, "TriggerSource", "Counter0Start"):
+        return None
+    set_enum_value(nodemap, "TriggerOverlap", "ReadOut")
+    cam.TriggerMode.SetValue(PySpin.TriggerMode_On)
+
+    exposure = PySpin.CFloatPtr(nodemap.GetNode("ExposureTime"))
+    if PySpin.IsReadable(exposure) and exposure.GetValue() > period_ticks:
+        print(
+            f"Exposure {exposure.GetValue():.0f} us is longer than the {period_ticks} us period, "
+            "frames will be skipped"
+        )
+    actual = 1e6 / period_ticks
+    print(f"Internal clock running at {actual:.3f} fps")
+    return actual
+
+
+def configure_frame_rate(cam: PySpin.CameraPtr, fps: float):
+    # Free-running rate, only in effect while TriggerMode is off; returns the rate set or None
+    nodemap = cam.GetNodeMap()
+    rate_enable = PySpin.CBooleanPtr(nodemap.GetNode("AcquisitionFrameRateEnable"))
+    if PySpin.IsWritable(rate_enable):
+        rate_enable.SetValue(True)
+    rate = PySpin.CFloatPtr(nodemap.GetNode("AcquisitionFrameRate"))
+    if not PySpin.IsWritable(rate):
+        print("AcquisitionFrameRate is not writable on this camera")
+        return None
+    rate.SetValue(min(max(fps, rate.GetMin()), rate.GetMax()))
+    return rate.GetValue()
+
+
+def make_lut(gamma: float = 1.0, contrast: float = 1.0, size: int = 256):
+    # Lookup table over `size` input levels: out = (in ** gamma - 0.5) * contrast + 0.5, normalised
+    if gamma <= 0:
+        raise ValueError(f"Gamma must be positive, got {gamma}")
+    levels = np.linspace(0.0, 1.0, size)
+    curve = np.clip((levels**gamma - 0.5) * contrast + 0.5, 0.0, 1.0)
+    return np.rint(curve * (size - 1)).astype(np.uint16)
+
+
+def validate_lut(lut):
+    # A LUT maps each of its len(lut) input levels to an output level in the same range
+    table = np.asarray(lut)
+    if table.ndim != 1 or table.size < 2:
+        raise ValueError("Lookup table must be a 1-D array with at least two entries")
+    if table.min() < 0 or table.max() > table.size - 1:
+        raise ValueError(f"Lookup table values must be within 0..{table.size - 1}")
+    return table
+
+
+def host_lookup_table(lut):
+    # Host-side fallback: cv.LUT for 8-bit tables, NumPy indexing for deeper ones
+    table = validate_lut(lut)
+    if table.size == 256:
+        table = table.astype(np.uint8)
+        return lambda img: cv.LUT(img, table)
+    return lambda img: table[img]
+
+
+def configure_lookup_table(cam: PySpin.CameraPtr, lut):
+    # Uploads lut to the camera LUT, so frames arrive already transformed.
+    # Returns None when the camera applies it, otherwise a host-side transform to apply per frame
+    table = validate_lut(lut)
+    nodemap = cam.GetNodeMap()
+    lut_selector = PySpin.CEnumerationPtr(nodemap.GetNode("LUTSelector"))
+    lut_enable = PySpin.CBooleanPtr(nodemap.GetNode("LUTEnable"))
+    lut_index = PySpin.CIntegerPtr(nodemap.GetNode("LUTIndex"))
+    lut_value = PySpin.CIntegerPtr(nodemap.GetNode("LUTValue"))
+    if not (PySpin.IsWritable(lut_enable) and PySpin.IsWritable(lut_index)):
+        print("Camera has no writable LUT, applying the lookup table on the host")
+        return host_lookup_table(table)
+    if PySpin.IsWritable(lut_selector):
+        lut_entry = lut_selector.GetEntryByName("LUT1")
+        if lut_entry is None or not PySpin.IsReadable(lut_entry):
+            print("Camera has no LUT1, applying the lookup table on the host")
+            return host_lookup_table(table)
+        lut_selector.SetIntValue(lut_entry.GetValue())
+
+    # The camera LUT has its own index and value ranges, e.g. 512 entries of 12-bit values
+    index_min, index_max = lut_index.GetMin(), lut_index.GetMax()
+    value_max = lut_value.GetMax()
+    indices = np.arange(index_min, index_max + 1)
+    inputs = (indices - index_min) * (table.size - 1) / max(1, index_max - index_min)
+    values = np.interp(inputs, np.arange(table.size), table) / (table.size - 1)
+    values = np.rint(values * value_max).astype(np.uint32)
+
+    # Bulk upload in one register write when supported, else one entry at a time
+    lut_value_all = PySpin.CRegisterPtr(nodemap.GetNode("LUTValueAll"))
+    if PySpin.IsWritable(lut_value_all) and lut_value_all.GetLength() == values.nbytes:
+        lut_value_all.Set(np.frombuffer(values.astype("<u4").tobytes(), np.uint8))
+    else:
+        for index, value in zip(indices, values):
+            lut_index.SetValue(int(index))
+            lut_value.SetValue(int(value))
+    lut_enable.SetValue(True)
+    print(f"Lookup table uploaded to the camera ({indices.size} entries)")
+    return None
+
+
+def disable_lookup_table(cam: PySpin.CameraPtr):
+    lut_enable = PySpin.CBooleanPtr(cam.GetNodeMap().GetNode("LUTEnable"))
+    if PySpin.IsWritable(lut_enable):
+        lut_enable.SetValue(False)
+
+
+STREAM_STATISTICS = (
+    "StreamBufferUnderrunCount",
+    "StreamLostFrameCount",
+    "StreamDroppedFrameCount",
+    "StreamIncompleteFrameCount",
+)
+
+
+def get_stream_statistics(cam: PySpin.CameraPtr):
+    # Only the counters this camera/driver exposes are returned
+    nodemap_tlstream = cam.GetTLStreamNodeMap()
+    stats = {}
+    for name in STREAM_STATISTICS:
+        node = PySpin.CIntegerPtr(nodemap_tlstream.GetNode(name))
+        if PySpin.IsReadable(node):
+            stats[name] = node.GetValue()
+    return stats
+
+
+def enable_chunks(cam: PySpin.CameraPtr, chunk_names):
+    # Returns the chunks that ended up enabled; unsupported ones are skipped
+    nodemap = cam.GetNodeMap()
+    chunk_mode_active = PySpin.CBooleanPtr(nodemap.GetNode("ChunkModeActive"))
+    chunk_selector = PySpin.CEnumerationPtr(nodemap.GetNode("ChunkSelector"))
+    if not PySpin.IsWritable(chunk_mode_active) or not PySpin.IsWritable(
+        chunk_selector
+    ):
+        print("Chunk data is not supported by this camera")
+        return []
+    chunk_mode_active.SetValue(True)
+
+    enabled = []
+    for name in chunk_names:
+        entry = PySpin.CEnumEntryPtr(chunk_selector.GetEntryByName(name))
+        if not PySpin.IsReadable(entry):
+            print(f"Chunk {name} not available")
+            continue
+        chunk_selector.SetIntValue(entry.GetValue())
+        chunk_enable = PySpin.CBooleanPtr(nodemap.GetNode("ChunkEnable"))
+        if PySpin.IsWritable(chunk_enable):
+            chunk_enable.SetValue(True)
+            enabled.append(name)
+        elif PySpin.IsReadable(chunk_enable) and chunk_enable.GetValue():
+            enabled.append(name)
+        else:
+            print(f"Chunk {name} not writable")
+    return enabled
+
+
+def enabled_chunks(cam: PySpin.CameraPtr, chunk_names):
+    # Returns which of chunk_names are currently enabled, to restore them later
+    nodemap = cam.GetNodeMap()
+    chunk_selector = PySpin.CEnumerationPtr(nodemap.GetNode("ChunkSelector"))
+    if not PySpin.IsWritable(chunk_selector):
+        return []
+    enabled = []
+    for name in chunk_names:
+        entry = PySpin.CEnumEntryPtr(chunk_selector.GetEntryByName(name))
+        if not PySpin.IsReadable(entry):
+            continue
+        chunk_selector.SetIntValue(entry.GetValue())
+        chunk_enable = PySpin.CBooleanPtr(nodemap.GetNode("ChunkEnable"))
+        if PySpin.IsReadable(chunk_enable) and chunk_enable.GetValue():
+            enabled.append(name)
+    return enabled
+
+
+def disable_chunks(cam: PySpin.CameraPtr, chunk_names, deactivate: bool = False):
+    # Turns chunk_names off, and chunk mode itself when deactivate is set
+    nodemap = cam.GetNodeMap()
+    chunk_selector = PySpin.CEnumerationPtr(nodemap.GetNode("ChunkSelector"))
+    if PySpin.IsWritable(chunk_selector):
+        for name in chunk_names:
+            entry = PySpin.CEnumEntryPtr(chunk_selector.GetEntryByName(name))
+            if not PySpin.IsReadable(entry):
+                continue
+            chunk_selector.SetIntValue(entry.GetValue())
+            chunk_enable = PySpin.CBooleanPtr(nodemap.GetNode("ChunkEnable"))
+            if PySpin.IsWritable(chunk_enable):
+                chunk_enable.SetValue(False)
+    chunk_mode_active = PySpin.CBooleanPtr(nodemap.GetNode("ChunkModeActive"))
+    if deactivate and PySpin.IsWritable(chunk_mode_active):
+        chunk_mode_active.SetValue(False)
+
+
 # aux functions
 def print_camera_list(cam_list: PySpin.CameraList):
     size = cam_list.GetSize()
@@ -1,3 +1,5 @@
+import os
+import sys
 import time
 from datetime import datetime
 from typing import Union
@@ -5,6 +7,8 @@ from pathlib import Path
 from dataclasses import dataclass
 import toml
 
+from nvuelab.utils import event_log
+
 
 @dataclass
 class Timer:
@@ -35,8 +39,8 @@ class Timer:
     def stop(self):
         """Stops the timer and calculates the elapsed time. If the timer is not running, this method does nothing."""
         if self.is_running:
-            self.elapsed_time = time.time() - self.start_time
             self.end_time = time.time()
+            self.elapsed_time = self.end_time - self.start_time
             self.is_running = False
             print(f"Timer stopped, elapsed time: {self.elapsed_time:.2f} seconds")
 
@@ -81,6 +85,102 @@ class Timer:
         )
 
 
+# Time before a deadline at which wait_until stops sleeping and spins; time.sleep is
+# only accurate to the ~15.6 ms system tick on Windows before Python 3.11
+SPIN_THRESHOLD_NS = (
+    16_000_000 if sys.platform == "win32" and sys.version_info < (3, 11) else 2_000_000
+)
+
+
+def wait_until(deadline_ns: int, spin_threshold_ns: int = SPIN_THRESHOLD_NS) -> int:
+    """Blocks until time.perf_counter_ns() reaches deadline_ns and returns how late it woke, in ns."""
+    remaining = deadline_ns - time.perf_counter_ns()
+    while remaining > spin_threshold_ns:
+        time.sleep((remaining - spin_threshold_ns) / 1e9)
+        remaining = deadline_ns - time.perf_counter_ns()
+    while True:
+        now = time.perf_counter_ns()
+        if now >= deadline_ns:
+            return now - deadline_ns
+
+
+@dataclass
+class MonotonicTimer(Timer):
+    """
+    A Timer measured with time.perf_counter_ns(), immune to NTP and wall-clock adjustments.
+    The wall clock is read once at start to anchor start_time; end_time is derived from the
+    monotonic elapsed time, so the start, end and elapsed values always agree.
+    Attributes:
+        start_ns (int): The perf_counter_ns value when the timer was started.
+        elapsed_ns (int): The elapsed time in nanoseconds once the timer is stopped.
+    """
+
+    start_ns: int = 0
+    elapsed_ns: int = 0
+
+    def start(self):
+        """Starts the timer, anchoring start_time to the wall clock at the same instant."""
+        if not self.is_running:
+            self.start_ns = time.perf_counter_ns()
+            self.start_time = time.time_ns() / 1e9
+            self.is_running = True
+            print("Timer started")
+
+    def stop(self):
+        """Stops the timer and calculates the elapsed time from the monotonic clock."""
+        if self.is_running:
+            self.elapsed_ns = time.perf_counter_ns() - self.start_ns
+            self.elapsed_time = self.elapsed_ns / 1e9
+            self.end_time = self.start_time + self.elapsed_time
+            self.is_running = False
+            print(f"Timer stopped, elapsed time: {self.elapsed_time:.2f} seconds")
+
+    def restart(self):
+        """Restarts the timer by resetting the elapsed time and starting the timer again."""
+        self.start_ns = time.perf_counter_ns()
+        self.start_time = time.time_ns() / 1e9
+        self.elapsed_ns = 0
+        self.elapsed_time = 0.0
+
+    def reset(self):
+        """Resets the timer to its initial state, stopping it if it is running."""
+        self.start_ns = 0
+        self.elapsed_ns = 0
+        super().reset()
+
+    def get_elapsed_ns(self) -> int:
+        """Retrieves the elapsed time in nanoseconds since the timer was started."""
+        if self.is_running:
+            return time.perf_counter_ns() - self.start_ns
+        return self.elapsed_ns
+
+    def get_elapsed_time(self):
+        """Retrieves the total time elapsed since the timer was started."""
+        return self.get_elapsed_ns() / 1e9
+
+    def get_remaining_time(self):
+        """Calculates and returns the remaining time before the timer reaches its duration."""
+        if self.is_running and self.duration > 0:
+            remaining_time = self.duration - self.get_elapsed_time()
+            if remaining_time <= 0:
+                print("Timer has expired")
+                return 0
+            return remaining_time
+        return super().get_remaining_time()
+
+    def deadline_ns(self, offset: float) -> int:
+        """Returns the perf_counter_ns value offset seconds after the timer started."""
+        return self.start_ns + round(offset * 1e9)
+
+    def wait_until_elapsed(self, offset: float) -> int:
+        """Blocks until offset seconds after start and returns how late it woke, in ns."""
+        return wait_until(self.deadline_ns(offset))
+
+    def wall_time_at(self, offset: float) -> float:
+        """Converts an offset in seconds from start to a Unix timestamp on the start anchor."""
+        return self.start_time + offset
+
+
 def format_timestamp(unix_timestamp: float) -> str:
     """Converts a Unix timestamp to a human-readable datetime string."""
     return datetime.fromtimestamp(unix_timestamp).strftime("%Y-%m-%d_%H:%M:%S")
@@ -100,32 +200,74 @@ def create_phase_name(phase_name: Union[str, None]) -> str:
     return f"{phase_name}_{timestamp}" if phase_name else f"recording-{timestamp}"
 
 
+def resolve_log_path(filepath: Union[Path, None]) -> Path:
+    """Returns the append-only event log that backs the TOML file at filepath."""
+    return resolve_file_path(filepath).with_suffix(".jsonl")
+
+
+def timer_record(timer: Timer, phase_name: str) -> dict:
+    """Builds the event log record for a Timer; timestamps stay as Unix floats."""
+    return {
+        "type": "timer",
+        "phase": phase_name,
+        "start_time": timer.start_time,
+        "end_time": timer.end_time,
+        "duration": timer.duration,
+        "duration_units": timer.duration_units,
+        "elapsed_time": timer.elapsed_time,
+    }
+
+
 def save_timer_state(
     timer: Timer, phase: Union[str, None] = None, filepath: Union[Path, None] = None
 ):
-    """Appends or updates the state of a Timer object in a TOML file, handling specific file and serialization exceptions."""
+    """Appends the state of a Timer object to the event log next to the TOML file, handling file exceptions."""
+    log_path = filepath
+    try:
+        log_path = resolve_log_path(filepath)
+        event_log.get_log(log_path).append(
+            timer_record(timer, create_phase_name(phase))
+        )
+
+    except PermissionError:
+        print(f"Permission denied: {log_path}")
+    except IOError as e:
+        print(f"I/O error({e.errno}): {e.strerror}")
+
+
+def export_timer_states(filepath: Union[Path, None] = None) -> Union[Path, None]:
+    """Compacts the timer records of the event log into the TOML file layout, replacing the file atomically."""
     try:
         filepath = resolve_file_path(filepath)
-        phase_name = create_phase_name(phase)
+        log_path = filepath.with_suffix(".jsonl")
 
-        # Attempt to load existing data or initialize an empty dictionary
+        # Keep phases recorded in the TOML before the event log existed
         data = {}
         if filepath.exists():
             with open(filepath, "r", encoding="utf-8") as file:
                 data = toml.load(file)
 
-        # Update data with the new timer state
-        data[phase_name] = {
-            "start_time": format_timestamp(timer.start_time),
-            "end_time": format_timestamp(timer.end_time),
-            "duration": timer.duration,
-            "duration_units": timer.duration_units,
-            "elapsed_time": timer.elapsed_time,
-        }
-
-        # Write the updated data back to the file
-        with open(filepath, "w", encoding="utf-8") as file:
+        if log_path.exists():
+            event_log.get_log(log_path).sync()
+            for record in event_log.read_events(log_path):
+                if record.get("type") != "timer":
+                    continue
+                data[record["phase"]] = {
+                    "start_time": format_timestamp(record["start_time"]),
+                    "end_time": format_timestamp(record["end_time"]),
+                    "duration": record["duration"],
+                    "duration_units": record["duration_units"],
+                    "elapsed_time": record["elapsed_time"],
+                }
+
+        # Write next to the target and swap, so a crash never leaves a partial TOML
+        temporary_path = filepath.with_suffix(".toml.tmp")
+        with open(temporary_path, "w", encoding="utf-8") as file:
             toml.dump(data, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, filepath)
+        return filepath
 
     except FileNotFoundError:
         print(f"File not found: {filepath}")
@@ -135,3 +277,4 @@ def save_timer_state(
         print(f"Error decoding TOML from {filepath}")
     except IOError as e:
         print(f"I/O error({e.errno}): {e.strerror}")
+    return None
@@ -0,0 +1,368 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Union
+
+import toml
+
+from nvuelab.utils import camera
+from nvuelab.utils.auxiliary_functions import lazy_import
+
+PySpin = lazy_import("PySpin")
+
+# Bump when the node-by-node configuration code changes, so saved user sets are rebuilt
+CONFIGURATION_VERSION = 2
+DEFAULT_USER_SET = "UserSet1"
+# Factory user set every node-by-node configuration starts from
+FACTORY_USER_SET = "Default"
+# Camera string node holding the hash of the configuration saved with the user set
+DIGEST_NODE = "DeviceUserID"
+
+
+def configuration_hash(settings: Dict, firmware: str = "") -> str:
+    """Returns a short, stable hash of a configuration description and the camera firmware."""
+    payload = json.dumps(
+        {"version": CONFIGURATION_VERSION, "firmware": firmware, "settings": settings},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _read_tl_string(cam: PySpin.CameraPtr, node_name: str) -> str:
+    node = PySpin.CStringPtr(cam.GetTLDeviceNodeMap().GetNode(node_name))
+    return node.GetValue() if PySpin.IsReadable(node) else ""
+
+
+def read_digest(cam: PySpin.CameraPtr) -> str:
+    """Returns the configuration hash stored on the camera, empty if there is none."""
+    node = PySpin.CStringPtr(cam.GetNodeMap().GetNode(DIGEST_NODE))
+    return node.GetValue() if PySpin.IsReadable(node) else ""
+
+
+def write_digest(cam: PySpin.CameraPtr, digest: str) -> bool:
+    """Stores a configuration hash on the camera, to be saved with the next user set."""
+    node = PySpin.CStringPtr(cam.GetNodeMap().GetNode(DIGEST_NODE))
+    if not PySpin.IsWritable(node):
+        print(f"{DIGEST_NODE} is not writable")
+        return False
+    node.SetValue(digest)
+    return True
+
+
+def load_user_set(cam: PySpin.CameraPtr, user_set: str = DEFAULT_USER_SET) -> bool:
+    """Loads a saved user set in one operation; the camera must not be streaming."""
+    nodemap = cam.GetNodeMap()
+    user_set_load = PySpin.CCommandPtr(nodemap.GetNode("UserSetLoad"))
+    if not camera.set_enum_value(nodemap, "UserSetSelector", user_set):
+        return False
+    if not PySpin.IsWritable(user_set_load):
+        print("UserSetLoad is not available")
+        return False
+    user_set_load.Execute()
+    return True
+
+
+def save_user_set(cam: PySpin.CameraPtr, user_set: str = DEFAULT_USER_SET) -> bool:
+    """Saves the current camera configuration to a user set in the camera's flash."""
+    nodemap = cam.GetNodeMap()
+    user_set_save = PySpin.CCommandPtr(nodemap.GetNode("UserSetSave"))
+    if not camera.set_enum_value(nodemap, "UserSetSelector", user_set):
+        return False
+    if not PySpin.IsWritable(user_set_save):
+        print("UserSetSave is not available")
+        return False
+    user_set_save.Execute()
+    return True
+
+
+def restore_configuration(
+    cam: PySpin.CameraPtr,
+    settings: Dict,
+    apply: Callable[[PySpin.CameraPtr], None],
+    user_set: str = DEFAULT_USER_SET,
+) -> bool:
+    """
+    Brings the camera into the configuration described by settings. The hash of the
+    settings, firmware and CONFIGURATION_VERSION is stored on the camera in DIGEST_NODE
+    and saved with the user set, so after loading the user set the camera itself tells
+    whether it holds this configuration; a user set saved by other software or another
+    host is never mistaken for it. On a match nothing else is written. Otherwise the
+    camera is reset to the factory user set, apply(cam) configures it node by node and
+    the result is saved to the user set with the new hash for the next start. The
+    reset keeps state left by earlier sessions (LUT, sequencer, frame rate, profile
+    nodes) out of the saved set, which holds the whole camera state while the hash
+    only covers settings. Returns True when the user set was used.
+    """
+    start = time.perf_counter()
+    digest = configuration_hash(settings, _read_tl_string(cam, "DeviceVersion"))
+
+    if load_user_set(cam, user_set):
+        if read_digest(cam) == digest:
+            print(
+                f"Loaded {user_set} ({digest}) in {(time.perf_counter() - start) * 1e3:.0f} ms"
+            )
+            return True
+        print(f"{user_set} holds another configuration, configuring node by node")
+    else:
+        print(f"Could not load {user_set}, configuring node by node")
+
+    if not load_user_set(cam, FACTORY_USER_SET):
+        print(f"Could not reset to {FACTORY_USER_SET}, the user set will not be saved")
+        apply(cam)
+        return False
+    apply(cam)
+    if write_digest(cam, digest) and save_user_set(cam, user_set):
+        print(
+            f"Configured node by node in {(time.perf_counter() - start) * 1e3:.0f} ms, "
+            f"saved to {user_set} ({digest})"
+        )
+    return False
+
+
+# Nodes are applied in this order, so each is set after the nodes its limits or
+# writability depend on; nodes not listed keep their profile order, before the trigger
+PROFILE_ORDER = (
+    "ExposureAuto",
+    "GainAuto",
+    "BalanceWhiteAuto",
+    "PixelFormat",
+    "BinningHorizontal",
+    "BinningVertical",
+    "DecimationHorizontal",
+    "DecimationVertical",
+    "Width",
+    "Height",
+    "OffsetX",
+    "OffsetY",
+    "ExposureMode",
+    "ExposureTime",
+    "Gain",
+    "AcquisitionFrameRateEnable",
+    "AcquisitionFrameRate",
+)
+TRIGGER_ORDER = (
+    "TriggerSelector",
+    "TriggerSource",
+    "TriggerActivation",
+    "TriggerOverlap",
+    "TriggerDelay",
+    "TriggerMode",
+)
+# Limits of these nodes depend on other settings, so their range is checked when applied
+DEPENDENT_RANGES = (
+    "Width",
+    "Height",
+    "OffsetX",
+    "OffsetY",
+    "ExposureTime",
+    "AcquisitionFrameRate",
+)
+
+
+@dataclass
+class ProfileSetting:
+    """
+    One validated node setting of a camera profile.
+    Attributes:
+        name (str): Node name.
+        value: Requested value, an enum entry name for enumerations.
+        kind (str): "enum", "bool", "int", "float" or "string".
+        node: Cached node pointer, resolved once during validation.
+    """
+
+    name: str
+    value: object
+    kind: str
+    node: object = None
+
+    def read(self):
+        """Returns the node's current value, in the same form as value."""
+        if not PySpin.IsReadable(self.node):
+            return None
+        if self.kind == "enum":
+            return self.node.GetCurrentEntry().GetSymbolic()
+        return self.node.GetValue()
+
+
+def load_profile(filepath: Union[Path, str], serial: str = "") -> Dict:
+    """
+    Reads the profile for a camera from a TOML file: the [default] table merged with
+    the [cameras."<serial>"] table, whose settings take precedence.
+
+        [default]
+        ExposureAuto = "Off"
+        ExposureTime = 8000
+        TriggerSource = "Line2"
+        TriggerActivation = "RisingEdge"
+        TriggerMode = "On"
+
+        [cameras."21234567"]
+        PixelFormat = "Mono8"
+        Width = 1440
+    """
+    with open(filepath, "r", encoding="utf-8") as file:
+        data = toml.load(file)
+    profile = dict(data.get("default", {}))
+    profile.update(data.get("cameras", {}).get(str(serial), {}))
+    if not profile:
+        raise ValueError(f"No default or camera {serial} profile in {filepath}")
+    return profile
+
+
+def order_profile(profile: Dict):
+    """Returns the profile's node names in the order they must be applied."""
+    first = [name for name in PROFILE_ORDER if name in profile]
+    last = [name for name in TRIGGER_ORDER if name in profile]
+    middle = [name for name in profile if name not in first and name not in last]
+    return first + middle + last
+
+
+_KINDS = {
+    "intfIEnumeration": "enum",
+    "intfIBoolean": "bool",
+    "intfIInteger": "int",
+    "intfIFloat": "float",
+    "intfIString": "string",
+}
+_POINTERS = {
+    "enum": "CEnumerationPtr",
+    "bool": "CBooleanPtr",
+    "int": "CIntegerPtr",
+    "float": "CFloatPtr",
+    "string": "CStringPtr",
+}
+
+
+def validate_profile(cam: PySpin.CameraPtr, profile: Dict):
+    """
+    Checks every setting against the camera before anything is written: the node must
+    exist and be available, enum entries must exist, and numbers must be within range
+    and, for integers, on an increment. Limits of DEPENDENT_RANGES nodes are checked
+    when applied. Returns the ProfileSettings in apply order, raising ValueError with
+    every problem found.
+    """
+    nodemap = cam.GetNodeMap()
+    kinds = {getattr(PySpin, name): kind for name, kind in _KINDS.items()}
+    settings, problems = [], []
+    for name in order_profile(profile):
+        value = profile[name]
+        node = nodemap.GetNode(name)
+        if node is None or not PySpin.IsAvailable(node):
+            problems.append(f"{name}: not available on this camera")
+            continue
+        kind = kinds.get(node.GetPrincipalInterfaceType())
+        if kind is None:
+            problems.append(f"{name}: unsupported node type")
+            continue
+        node = getattr(PySpin, _POINTERS[kind])(node)
+        if kind == "enum":
+            entry = node.GetEntryByName(str(value))
+            if entry is None or not PySpin.IsAvailable(entry):
+                problems.append(f"{name}: no entry {value}")
+                continue
+        elif kind == "bool" and not isinstance(value, bool):
+            problems.append(f"{name}: expected true or false, got {value!r}")
+            continue
+        elif kind in ("int", "float"):
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                problems.append(f"{name}: expected a number, got {value!r}")
+                continue
+            if kind == "int" and value != int(value):
+                problems.append(f"{name}: expected an integer, got {value!r}")
+                continue
+            if name not in DEPENDENT_RANGES and not (
+                node.GetMin() <= value <= node.GetMax()
+            ):
+                problems.append(
+                    f"{name}: {value} outside {node.GetMin()}..{node.GetMax()}"
+                )
+                continue
+            if kind == "int" and (int(value) - node.GetMin()) % node.GetInc():
+                problems.append(f"{name}: {value} is not a multiple of {node.GetInc()}")
+                continue
+        settings.append(ProfileSetting(name, value, kind, node))
+    if problems:
+        raise ValueError("Invalid camera profile:\n  " + "\n  ".join(problems))
+    return settings
+
+
+def _write(setting: ProfileSetting):
+    node, value = setting.node, setting.value
+    if setting.kind == "enum":
+        node.SetIntValue(node.GetEntryByName(str(value)).GetValue())
+    elif setting.kind == "int":
+        node.SetValue(int(value))
+    elif setting.kind == "float":
+        node.SetValue(float(value))
+    else:
+        node.SetValue(value)
+
+
+def apply_profile(cam: PySpin.CameraPtr, settings) -> Dict:
+    """
+    Applies validated settings in one pass over their cached nodes. The trigger is off
+    while trigger nodes change and offsets are zeroed before the ROI size changes.
+    A setting the camera rejects is reported and skipped. Returns profile_report().
+    """
+    nodemap = cam.GetNodeMap()
+    names = {setting.name for setting in settings}
+    trigger_mode = PySpin.CEnumerationPtr(nodemap.GetNode("TriggerMode"))
+    restore_trigger = None
+    if any(name.startswith("Trigger") for name in names) and PySpin.IsWritable(
+        trigger_mode
+    ):
+        restore_trigger = trigger_mode.GetIntValue()
+        trigger_mode.SetIntValue(trigger_mode.GetEntryByName("Off").GetValue())
+    if names & {"Width", "Height"}:
+        for offset in ("OffsetX", "OffsetY"):
+            node = PySpin.CIntegerPtr(nodemap.GetNode(offset))
+            if PySpin.IsWritable(node):
+                node.SetValue(node.GetMin())
+
+    for setting in settings:
+        if not PySpin.IsWritable(setting.node):
+            print(f"{setting.name} is not writable, skipped")
+            continue
+        if setting.kind in ("int", "float") and not (
+            setting.node.GetMin() <= setting.value <= setting.node.GetMax()
+        ):
+            print(
+                f"{setting.name} {setting.value} outside "
+                f"{setting.node.GetMin()}..{setting.node.GetMax()}, skipped"
+            )
+            continue
+        try:
+            _write(setting)
+        except PySpin.SpinnakerException as e:
+            print(f"{setting.name} rejected {setting.value}: {e}")
+    if restore_trigger is not None and "TriggerMode" not in names:
+        trigger_mode.SetIntValue(restore_trigger)
+    return profile_report(settings)
+
+
+def profile_report(settings) -> Dict:
+    """Returns the requested and the applied value of every setting, for the session log."""
+    return {
+        setting.name: {"requested": setting.value, "applied": setting.read()}
+        for setting in settings
+    }
+
+
+def profile_mismatches(report: Dict) -> Dict:
+    """Returns the settings of a profile_report whose applied value differs from the request."""
+    return {
+        name: values
+        for name, values in report.items()
+        if not _same(values["requested"], values["applied"])
+    }
+
+
+def _same(requested, applied) -> bool:
+    if isinstance(requested, (int, float)) and isinstance(applied, (int, float)):
+        return abs(requested - applied) <= 1e-6 * max(1.0, abs(requested))
+    return requested == applied
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+from typing import Union
+
+import numpy as np
+
+from nvuelab.utils import camera
+from nvuelab.utils.auxiliary_functions import lazy_import
+
+cv = lazy_import("cv2")
+PySpin = lazy_import("PySpin")
+
+# "all" keeps everything, "every" one frame in N, "window" the first frame per window,
+# "focus" the sharpest frame per window
+MODES = ("all", "every", "window", "focus")
+# Width of the copy the focus measure is computed on
+FOCUS_WIDTH = 480
+
+
+def focus_score(img: np.ndarray, width: int = FOCUS_WIDTH) -> float:
+    """Returns the variance of the Laplacian of a downscaled copy; higher is sharper."""
+    if img.ndim == 3:
+        img = cv.cvtColor(img, cv.COLOR_BGR2GRAY)
+    if img.shape[1] > width:
+        height = max(1, round(img.shape[0] * width / img.shape[1]))
+        img = cv.resize(img, (width, height), interpolation=cv.INTER_AREA)
+    _, std = cv.meanStdDev(cv.Laplacian(img, cv.CV_32F))
+    return float(std[0, 0]) ** 2
+
+
+class Decimator:
+    """
+    Host-side frame decimation for time-lapse and long-term monitoring, decided as
+    early as possible so CPU and disk scale with the kept frames. keep() only needs
+    the camera timestamp and is called before the pixels are touched; in "every" and
+    "window" modes, frames it rejects never reach conversion or encoding. select() is
+    then called with the pixels of every kept frame and returns the frame to pass on,
+    or None. In "focus" mode every frame is scored, the sharpest of each window is
+    held (copied) and returned once the next window starts; flush() returns the last one.
+    Attributes:
+        mode (str): One of MODES.
+        every (int): Keeps one frame in every `every` ("every" mode).
+        window_ns (int): Window length in camera ticks (ns) for "window" and "focus".
+        seen (int): Frames offered to keep().
+        kept (int): Frames passed on by select().
+        camera_rate (tuple): (AcquisitionFrameRateEnable, AcquisitionFrameRate) before
+            configure_on_camera changed them, None if the camera was not changed.
+    """
+
+    def __init__(
+        self, mode: str = "every", every: int = 1, window_seconds: float = 1.0
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown decimation mode {mode}, expected one of {MODES}")
+        if every < 1 or window_seconds <= 0:
+            raise ValueError("every must be at least 1 and window_seconds positive")
+        self.mode = mode
+        self.every = every
+        self.window_ns = int(window_seconds * 1e9)
+        self.seen = 0
+        self.kept = 0
+        self.camera_rate = None
+        self._window = None
+        self._best = None
+        self._best_score = 0.0
+
+    def keep(self, timestamp_ns: int) -> bool:
+        """Returns whether the frame taken at timestamp_ns needs its pixels at all."""
+        self.seen += 1
+        if self.mode == "every":
+            return (self.seen - 1) % self.every == 0
+        if self.mode == "window":
+            window = timestamp_ns // self.window_ns
+            if window == self._window:
+                return False
+            self._window = window
+        return True
+
+    def select(self, img: np.ndarray, timestamp_ns: int) -> Union[np.ndarray, None]:
+        """Returns the frame to pass on for a kept frame, or None."""
+        if self.mode != "focus":
+            self.kept += 1
+            return img
+        window = timestamp_ns // self.window_ns
+        selected = None
+        if window != self._window:
+            selected = self.flush()
+            self._window = window
+        score = focus_score(img)
+        if self._best is None or score > self._best_score:
+            # The camera buffer is released after this frame, so the candidate is copied
+            self._best = img.copy()
+            self._best_score = score
+        return selected
+
+    def flush(self) -> Union[np.ndarray, None]:
+        """Returns and clears the best frame held for the current "focus" window."""
+        best, self._best = self._best, None
+        if best is not None:
+            self.kept += 1
+        return best
+
+
+def configure_on_camera(cam: PySpin.CameraPtr, decimator: Decimator) -> bool:
+    """
+    Moves decimation onto the camera when it free-runs by lowering its frame rate, so
+    dropped frames are never transferred: "window" captures one frame per window and
+    "every" divides the current rate. Returns False, leaving the host to decimate,
+    when the camera is triggered, the mode needs the pixels ("focus"), or the rate
+    is outside what the camera supports. The previous rate is kept on the decimator
+    for restore_on_camera.
+    """
+    if decimator.mode not in ("every", "window"):
+        return False
+    if cam.TriggerMode.GetValue() == PySpin.TriggerMode_On:
+        print("Camera is triggered, decimating on the host")
+        return False
+    rate = PySpin.CFloatPtr(cam.GetNodeMap().GetNode("AcquisitionFrameRate"))
+    if not PySpin.IsReadable(rate):
+        return False
+    if decimator.mode == "window":
+        target = 1e9 / decimator.window_ns
+    else:
+        target = rate.GetValue() / decimator.every
+    if not rate.GetMin() <= target <= rate.GetMax():
+        print(f"{target:.3f} fps is outside the camera range, decimating on the host")
+        return False
+    rate_enable = PySpin.CBooleanPtr(
+        cam.GetNodeMap().GetNode("AcquisitionFrameRateEnable")
+    )
+    decimator.camera_rate = (
+        rate_enable.GetValue() if PySpin.IsReadable(rate_enable) else None,
+        rate.GetValue(),
+    )
+    actual = camera.configure_frame_rate(cam, target)
+    if actual is None or abs(actual - target) > 0.01 * target:
+        restore_on_camera(cam, decimator)
+        return False
+    return True
+
+
+def restore_on_camera(cam: PySpin.CameraPtr, decimator: Decimator):
+    """Puts back the frame rate configure_on_camera replaced, so "every" never compounds."""
+    if decimator.camera_rate is None:
+        return
+    enabled, fps = decimator.camera_rate
+    camera.configure_frame_rate(cam, fps)
+    rate_enable = PySpin.CBooleanPtr(
+        cam.GetNodeMap().GetNode("AcquisitionFrameRateEnable")
+    )
+    if enabled is not None and PySpin.IsWritable(rate_enable):
+        rate_enable.SetValue(enabled)
+    decimator.camera_rate = None
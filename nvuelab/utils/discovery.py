@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import threading
+from typing import Dict, List, Union
+
+from nvuelab.utils import camera
+from nvuelab.utils.auxiliary_functions import lazy_import
+
+PySpin = lazy_import("PySpin")
+
+
+def _serial_number(cam) -> str:
+    node = PySpin.CStringPtr(cam.GetTLDeviceNodeMap().GetNode("DeviceSerialNumber"))
+    return node.GetValue() if PySpin.IsReadable(node) else ""
+
+
+def _event_handlers(discovery: "CameraDiscovery"):
+    # PySpin is only importable with the Spinnaker runtime, so the subclasses are built on demand
+    class DeviceHandler(PySpin.InterfaceEventHandler):
+        def OnDeviceArrival(self, cam):
+            discovery._add(cam)
+
+        def OnDeviceRemoval(self, cam):
+            # The device is gone, so its nodemap cannot be read; older Spinnaker
+            # versions pass the serial number itself
+            discovery._remove(cam if isinstance(cam, (int, str)) else None)
+
+    class InterfaceHandler(PySpin.SystemEventHandler):
+        # Only GigE interfaces arrive at runtime; their cameras are not announced separately.
+        # Enumerating from a system callback can deadlock, so the discovery thread does it
+        def OnInterfaceArrival(self, interface):
+            discovery._interfaces_changed.set()
+
+        def OnInterfaceRemoval(self, interface):
+            discovery._interfaces_changed.set()
+
+    return DeviceHandler(), InterfaceHandler()
+
+
+class CameraDiscovery:
+    """
+    Keeps a serial number -> camera cache so cameras can be selected without
+    enumerating. The first enumeration runs on a background thread, which can take
+    seconds with GigE interfaces; afterwards, device arrival and removal events
+    update the cache on the Spinnaker event thread, while interface changes wake the
+    background thread to enumerate again. Cameras are not initialised.
+    close() must be called before the system is released.
+    Attributes:
+        system (PySpin.SystemPtr): Spinnaker system the cameras belong to.
+        changes (int): Incremented on every cache update, for cheap polling.
+    """
+
+    def __init__(self, system: Union[PySpin.SystemPtr, None] = None):
+        self.system = system or PySpin.System.GetInstance()
+        self.changes = 0
+        self._cameras: Dict[str, PySpin.CameraPtr] = {}
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._interfaces_changed = threading.Event()
+        self._closing = False
+        self._handlers = None
+        self._thread = None
+
+    def start(self):
+        """Starts the first enumeration in the background and returns immediately."""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        self._enumerate()
+        while True:
+            self._interfaces_changed.wait()
+            self._interfaces_changed.clear()
+            if self._closing:
+                return
+            try:
+                self.system.UpdateInterfaceList()
+                self._refresh()
+            except PySpin.SpinnakerException as e:
+                print(f"Camera discovery failed: {e}")
+
+    def _enumerate(self):
+        try:
+            self._handlers = _event_handlers(self)
+            device_handler, interface_handler = self._handlers
+            self.system.RegisterEventHandler(device_handler)
+            self.system.RegisterEventHandler(interface_handler)
+            self._refresh()
+        except PySpin.SpinnakerException as e:
+            print(f"Camera discovery failed: {e}")
+        finally:
+            self._ready.set()
+
+    def _refresh(self):
+        cam_list = self.system.GetCameras()
+        cameras = {}
+        for i in range(cam_list.GetSize()):
+            cam = cam_list.GetByIndex(i)
+            cameras[_serial_number(cam)] = cam
+        cam_list.Clear()
+        with self._lock:
+            self._cameras = cameras
+            self.changes += 1
+
+    def _add(self, cam):
+        serial = _serial_number(cam)
+        with self._lock:
+            self._cameras[serial] = cam
+            self.changes += 1
+        print(f"Camera {serial} connected")
+
+    def _remove(self, serial: Union[int, str, None]):
+        # Without a serial number, the removed cameras are the ones Spinnaker invalidated
+        with self._lock:
+            if serial is not None:
+                removed = [str(serial)] if str(serial) in self._cameras else []
+            else:
+                removed = [s for s, cam in self._cameras.items() if not cam.IsValid()]
+            for gone in removed:
+                del self._cameras[gone]
+            self.changes += 1
+        for gone in removed:
+            print(f"Camera {gone} disconnected")
+
+    def wait(self, timeout: Union[float, None] = None) -> bool:
+        """Blocks until the first enumeration finished; returns False on timeout."""
+        return self._ready.wait(timeout)
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def serials(self) -> List[str]:
+        """Returns the serial numbers of the connected cameras, sorted."""
+        with self._lock:
+            return sorted(self._cameras)
+
+    def describe(self) -> Dict[str, str]:
+        """Returns the model name of every connected camera by serial number."""
+        with self._lock:
+            cameras = dict(self._cameras)
+        return {
+            serial: camera.get_camera_info(cam)[0] for serial, cam in cameras.items()
+        }
+
+    def get(self, serial: str) -> Union[PySpin.CameraPtr, None]:
+        """Returns the cached camera with this serial number, None if it is not connected."""
+        with self._lock:
+            return self._cameras.get(serial)
+
+    def close(self):
+        """Stops the discovery thread, unregisters the handlers and drops the cached cameras."""
+        self._closing = True
+        self._interfaces_changed.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._handlers is not None:
+            for handler in self._handlers:
+                self.system.UnregisterEventHandler(handler)
+            self._handlers = None
+        with self._lock:
+            self._cameras.clear()
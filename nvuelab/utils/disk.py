@@ -0,0 +1,210 @@
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Tuple, Union
+
+# Free space never to be used by a recording
+DEFAULT_RESERVE_BYTES = 2 * 1024**3
+# Session length assumed by the preflight check when none is known
+DEFAULT_SESSION_SECONDS = 3600.0
+# Encoded size relative to the raw frame size, per fourcc; a conservative guess for planning
+COMPRESSION_RATIO = {"avc1": 0.05, "mp4v": 0.1, "MJPG": 0.25}
+FSYNC_PROBE_BYTES = 4096
+
+
+def estimate_bytes_per_second(
+    frame_width: int,
+    frame_height: int,
+    fps: float,
+    bytes_per_pixel: float = 1.0,
+    fourcc: str = "avc1",
+) -> float:
+    """Estimates the data rate written to disk for a recording."""
+    raw = frame_width * frame_height * bytes_per_pixel * fps
+    return raw * COMPRESSION_RATIO.get(fourcc, 1.0)
+
+
+def check_capacity(
+    path: Union[Path, str],
+    bytes_per_second: float,
+    session_seconds: float = DEFAULT_SESSION_SECONDS,
+    reserve_bytes: int = DEFAULT_RESERVE_BYTES,
+) -> Tuple[bool, bool, str]:
+    """
+    Checks whether a session would fit on the volume holding path.
+    Returns (fits, refuse, message): refuse is True when not even the reserve is free,
+    fits is False when the projected session would eat into the reserve.
+    """
+    free = shutil.disk_usage(path).free
+    usable = free - reserve_bytes
+    needed = bytes_per_second * session_seconds
+    if usable <= 0:
+        return (
+            False,
+            True,
+            f"Only {free / 1024**3:.1f} GB free on {path}, "
+            f"below the {reserve_bytes / 1024**3:.1f} GB reserve",
+        )
+    if needed > usable:
+        return (
+            False,
+            False,
+            f"Session needs ~{needed / 1024**3:.1f} GB but {usable / 1024**3:.1f} GB is usable on {path}; "
+            f"the disk would fill after {usable / bytes_per_second / 60:.0f} min",
+        )
+    return (
+        True,
+        False,
+        f"{usable / 1024**3:.1f} GB usable, session needs ~{needed / 1024**3:.1f} GB",
+    )
+
+
+@dataclass
+class DiskStatus:
+    """
+    Latest measurements of the output volume.
+    Attributes:
+        free_bytes (int): Free space on the volume.
+        write_bytes_per_second (float): Rate at which free space is being consumed.
+        fsync_ms (float): Time to write and fsync a small probe file.
+        time_to_full_s (float): Projected seconds until the reserve is reached, inf when not filling.
+        degrade_level (int): Number of degrade steps applied so far.
+    """
+
+    free_bytes: int = 0
+    write_bytes_per_second: float = 0.0
+    fsync_ms: float = 0.0
+    time_to_full_s: float = float("inf")
+    degrade_level: int = 0
+
+    def format_status(self) -> str:
+        """Returns a single line summary suitable for a status bar."""
+        ttf = (
+            "-"
+            if self.time_to_full_s == float("inf")
+            else f"{self.time_to_full_s / 60:.0f} min"
+        )
+        return (
+            f"disk free {self.free_bytes / 1024**3:.1f} GB | "
+            f"write {self.write_bytes_per_second / 1024**2:.1f} MB/s | "
+            f"fsync {self.fsync_ms:.1f} ms | full in {ttf} | degrade {self.degrade_level}"
+        )
+
+
+class DiskMonitor:
+    """
+    Background sampler of the output volume: free space, consumption rate, fsync
+    latency and projected time to full. When the pipeline falls behind the camera
+    (the writer's backlog grows, or the camera or the writer drop frames), fsync
+    latency exceeds fsync_limit_ms, or the disk would fill within
+    min_time_to_full_s, for sustain consecutive samples, the next degrade step is
+    applied. Frames skipped on purpose (decimation, motion gating) never count as
+    backlog. Steps are (name, callable) pairs that must only flip flags read by the
+    acquisition code, so the grab loop is never blocked by the monitor.
+    Attributes:
+        status (DiskStatus): Latest measurements, replaced atomically every sample.
+    """
+
+    def __init__(
+        self,
+        path: Union[Path, str],
+        telemetry=None,
+        degrade_steps: List[Tuple[str, Callable[[], None]]] = (),
+        interval: float = 1.0,
+        sustain: int = 5,
+        fsync_limit_ms: float = 200.0,
+        min_time_to_full_s: float = 600.0,
+        reserve_bytes: int = DEFAULT_RESERVE_BYTES,
+    ):
+        self.path = Path(path)
+        self.telemetry = telemetry
+        self.degrade_steps = list(degrade_steps)
+        self.interval = interval
+        self.sustain = sustain
+        self.fsync_limit_ms = fsync_limit_ms
+        self.min_time_to_full_s = min_time_to_full_s
+        self.reserve_bytes = reserve_bytes
+        self.status = DiskStatus()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._strikes = 0
+
+    def start(self):
+        """Starts sampling on a daemon thread."""
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="disk-monitor", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stops sampling and waits for the thread to exit."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _probe_fsync(self) -> float:
+        probe = self.path / ".nvuelab-fsync-probe"
+        start = time.perf_counter()
+        with open(probe, "wb") as file:
+            file.write(b"\0" * FSYNC_PROBE_BYTES)
+            file.flush()
+            os.fsync(file.fileno())
+        elapsed = (time.perf_counter() - start) * 1e3
+        probe.unlink()
+        return elapsed
+
+    def _pipeline_behind(self) -> bool:
+        # Counters have a single writer each, reading them here needs no lock.
+        # A synchronous writer has no backlog; when it stalls, the camera drops frames
+        backlog = self.telemetry.writer_backlog()
+        dropped = self.telemetry.frames_dropped + self.telemetry.writer_drops()
+        behind = backlog > self._backlog + 1 or dropped > self._dropped
+        self._backlog, self._dropped = backlog, dropped
+        return behind
+
+    def _run(self):
+        last_time = time.monotonic()
+        last_free = shutil.disk_usage(self.path).free
+        self._backlog = 0
+        self._dropped = 0
+        while not self._stop_event.wait(self.interval):
+            try:
+                now = time.monotonic()
+                free = shutil.disk_usage(self.path).free
+                fsync_ms = self._probe_fsync()
+            except OSError as e:
+                print(f"Disk monitor failed to sample {self.path}: {e}")
+                continue
+            rate = max(0.0, (last_free - free) / (now - last_time))
+            last_time, last_free = now, free
+            usable = free - self.reserve_bytes
+            time_to_full = usable / rate if rate > 0 else float("inf")
+
+            behind = self.telemetry is not None and self._pipeline_behind()
+
+            struggling = (
+                behind
+                or fsync_ms > self.fsync_limit_ms
+                or time_to_full < self.min_time_to_full_s
+            )
+            self._strikes = self._strikes + 1 if struggling else 0
+            level = self.status.degrade_level
+            if self._strikes >= self.sustain and level < len(self.degrade_steps):
+                name, apply = self.degrade_steps[level]
+                print(f"Disk cannot keep up ({self.path}), degrading: {name}")
+                apply()
+                level += 1
+                self._strikes = 0
+
+            self.status = DiskStatus(
+                free_bytes=free,
+                write_bytes_per_second=rate,
+                fsync_ms=fsync_ms,
+                time_to_full_s=time_to_full,
+                degrade_level=level,
+            )
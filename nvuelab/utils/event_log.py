@@ -0,0 +1,166 @@
+import atexit
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Union
+
+# Records written between fsyncs, and the longest time a record can stay unsynced
+FSYNC_EVERY = 32
+FSYNC_INTERVAL = 1.0
+# Bytes read per step when searching backwards for the end of the last complete record
+TAIL_CHUNK = 4096
+
+
+def repair_torn_tail(filepath: Union[Path, str]) -> int:
+    """
+    Truncates a log back to its last complete line, so records appended after a crash
+    are not glued onto a partial one. Returns the number of bytes removed.
+    """
+    filepath = Path(filepath)
+    if not filepath.exists():
+        return 0
+    with open(filepath, "rb+") as file:
+        size = file.seek(0, os.SEEK_END)
+        end = size
+        while end > 0:
+            start = max(0, end - TAIL_CHUNK)
+            file.seek(start)
+            chunk = file.read(end - start)
+            newline = chunk.rfind(b"\n")
+            if newline >= 0:
+                end = start + newline + 1
+                break
+            end = start
+        if end == size:
+            return 0
+        file.truncate(end)
+    print(f"Removed a record torn by a crash from the end of {filepath}")
+    return size - end
+
+
+class ExperimentLog:
+    """
+    Append-only, line-delimited JSON log of experiment records (timers, phases, events).
+    Every append is one write of one line, so its cost does not depend on how much
+    history the file holds. Lines are flushed to the OS immediately, which survives a
+    crash of this process; fsync is batched every fsync_every records or
+    fsync_interval seconds to bound what a power loss can take. A torn last line is
+    removed when the log is opened again, and skipped when reading.
+    Attributes:
+        filepath (Path): Location of the .jsonl log.
+        fsync_every (int): Records appended between fsyncs.
+        fsync_interval (float): Maximum seconds between fsyncs while records arrive.
+    """
+
+    def __init__(
+        self,
+        filepath: Union[Path, str],
+        fsync_every: int = FSYNC_EVERY,
+        fsync_interval: float = FSYNC_INTERVAL,
+    ):
+        self.filepath = Path(filepath)
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        repair_torn_tail(self.filepath)
+        self._file = open(self.filepath, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def append(self, record: Dict):
+        """Appends one record as a JSON line, stamping it with logged_at if missing."""
+        record.setdefault("logged_at", time.time())
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self._unsynced += 1
+            if (
+                self._unsynced >= self.fsync_every
+                or time.monotonic() - self._last_sync >= self.fsync_interval
+            ):
+                self._sync()
+
+    def append_many(self, records: List[Dict]):
+        """Appends records with one write and one flush, for batched producers."""
+        if not records:
+            return
+        now = time.time()
+        lines = []
+        for record in records:
+            record.setdefault("logged_at", now)
+            lines.append(json.dumps(record, separators=(",", ":")) + "\n")
+        with self._lock:
+            self._file.write("".join(lines))
+            self._file.flush()
+            self._unsynced += len(lines)
+            if (
+                self._unsynced >= self.fsync_every
+                or time.monotonic() - self._last_sync >= self.fsync_interval
+            ):
+                self._sync()
+
+    def log_event(self, record_type: str, **fields):
+        """Appends a record of the given type with arbitrary JSON-serialisable fields."""
+        self.append({"type": record_type, **fields})
+
+    def sync(self):
+        """Forces every appended record to disk."""
+        with self._lock:
+            self._sync()
+
+    def _sync(self):
+        if self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        """Syncs and closes the log; further appends raise ValueError."""
+        with self._lock:
+            if not self._file.closed:
+                self._sync()
+                self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_events(filepath: Union[Path, str]) -> Iterator[Dict]:
+    """Yields the records of a log in order, skipping a line torn by a crash."""
+    with open(filepath, "r", encoding="utf-8") as file:
+        for line in file:
+            if not line.endswith("\n"):
+                break  # Incomplete last write
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                print(f"Skipping corrupt record in {filepath}: {line[:80]!r}")
+
+
+_open_logs: Dict[Path, ExperimentLog] = {}
+_open_logs_lock = threading.Lock()
+
+
+def get_log(filepath: Union[Path, str]) -> ExperimentLog:
+    """Returns a shared ExperimentLog for filepath, opening it on first use."""
+    filepath = Path(filepath).resolve()
+    with _open_logs_lock:
+        log = _open_logs.get(filepath)
+        if log is None:
+            log = _open_logs[filepath] = ExperimentLog(filepath)
+        return log
+
+
+@atexit.register
+def close_logs():
+    """Syncs and closes every shared log."""
+    with _open_logs_lock:
+        for log in _open_logs.values():
+            log.close()
+        _open_logs.clear()
@@ -0,0 +1,144 @@
+import time
+from array import array
+from typing import Dict, Iterable
+
+# Pipeline stages timed by the acquisition loop, in the order a frame goes through them
+PIPELINE_STAGES = ("grab", "ndarray", "resize", "queue", "write")
+
+# Histogram layout: values below 2**SUB_BUCKET_BITS ns are exact, larger values
+# keep SUB_BUCKET_BITS - 1 bits of precision (~3%) up to 2**MAX_VALUE_BITS ns (~18 min)
+SUB_BUCKET_BITS = 6
+MAX_VALUE_BITS = 40
+_HALF_COUNT = 1 << (SUB_BUCKET_BITS - 1)
+_MAX_VALUE = (1 << MAX_VALUE_BITS) - 1
+
+
+def _bucket_index(value: int) -> int:
+    shift = max(0, value.bit_length() - SUB_BUCKET_BITS)
+    return shift * _HALF_COUNT + (value >> shift)
+
+
+def _bucket_value(index: int) -> int:
+    """Returns the midpoint of the values counted in the bucket at index."""
+    if index < 2 * _HALF_COUNT:
+        return index
+    shift = index // _HALF_COUNT - 1
+    sub_bucket = index - shift * _HALF_COUNT
+    return (sub_bucket << shift) + (1 << (shift - 1))
+
+
+class LatencyHistogram:
+    """
+    A preallocated log-linear (HDR-style) histogram of nanosecond durations.
+    Recording is a bucket index computation and one array increment, with no
+    allocation, so it is safe to call once per frame from a single thread.
+    Attributes:
+        counts (array): Number of samples per bucket.
+        total (int): Number of samples recorded.
+        max_value (int): Largest sample recorded, exact.
+    """
+
+    def __init__(self):
+        self.counts = array("Q", bytes(8 * (_bucket_index(_MAX_VALUE) + 1)))
+        self.total = 0
+        self.max_value = 0
+
+    def record(self, value: int):
+        """Adds one duration in nanoseconds, clamping values outside the range."""
+        if value < 0:
+            value = 0
+        elif value > _MAX_VALUE:
+            value = _MAX_VALUE
+        self.counts[_bucket_index(value)] += 1
+        self.total += 1
+        if value > self.max_value:
+            self.max_value = value
+
+    def percentile(self, percent: float) -> int:
+        """Returns the value in nanoseconds at the given percentile (0-100)."""
+        if self.total == 0:
+            return 0
+        target = max(1, int(round(self.total * percent / 100.0)))
+        running = 0
+        for index, count in enumerate(self.counts):
+            running += count
+            if running >= target:
+                return min(_bucket_value(index), self.max_value)
+        return self.max_value
+
+    def reset(self):
+        """Clears every bucket without reallocating."""
+        for index in range(len(self.counts)):
+            self.counts[index] = 0
+        self.total = 0
+        self.max_value = 0
+
+
+class StageProfiler:
+    """
+    Per-stage latency instrumentation for the frame pipeline.
+    Call now() before a stage and lap(stage, start) after it; lap records the
+    elapsed nanoseconds and returns the new timestamp so consecutive stages
+    can be chained. While disabled and without a tracer both calls return 0
+    without reading the clock, so the hooks can stay in the grab loop permanently.
+    Attributes:
+        enabled (bool): Whether stage latencies are recorded, can be toggled at runtime.
+        tracer (TraceRecorder): Optional recorder that also receives every stage span.
+        histograms (dict): LatencyHistogram per stage name.
+    """
+
+    def __init__(self, stages: Iterable[str] = PIPELINE_STAGES, enabled: bool = False):
+        self.enabled = enabled
+        self.tracer = None
+        self.histograms: Dict[str, LatencyHistogram] = {
+            stage: LatencyHistogram() for stage in stages
+        }
+
+    def now(self) -> int:
+        """Returns the current monotonic time in nanoseconds, or 0 when disabled."""
+        if not self.enabled and self.tracer is None:
+            return 0
+        return time.perf_counter_ns()
+
+    def lap(self, stage: str, start: int) -> int:
+        """Records the time since start for stage and returns the current timestamp."""
+        if not start:
+            return 0
+        now = time.perf_counter_ns()
+        if self.enabled:
+            self.histograms[stage].record(now - start)
+        if self.tracer is not None:
+            self.tracer.complete(stage, start, now)
+        return now
+
+    def reset(self):
+        """Clears all stage histograms."""
+        for histogram in self.histograms.values():
+            histogram.reset()
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Returns count, p50, p99 and max in microseconds for every stage with samples."""
+        summary = {}
+        for stage, histogram in self.histograms.items():
+            if histogram.total == 0:
+                continue
+            summary[stage] = {
+                "count": histogram.total,
+                "p50_us": histogram.percentile(50) / 1e3,
+                "p99_us": histogram.percentile(99) / 1e3,
+                "max_us": histogram.max_value / 1e3,
+            }
+        return summary
+
+    def print_report(self):
+        """Prints the per-stage latency summary to the console."""
+        summary = self.report()
+        if not summary:
+            print("No stage latencies recorded")
+            return
+        print(f"{'stage':<10}{'count':>10}{'p50 us':>12}{'p99 us':>12}{'max us':>12}")
+        for stage, stats in summary.items():
+            print(
+                f"{stage:<10}{stats['count']:>10}{stats['p50_us']:>12.1f}"
+                f"{stats['p99_us']:>12.1f}{stats['max_us']:>12.1f}"
+            )
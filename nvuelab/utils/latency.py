@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from typing import Dict, Union
+
+import numpy as np
+
+from nvuelab.utils import camera
+from nvuelab.utils.auxiliary_functions import lazy_import
+
+PySpin = lazy_import("PySpin")
+
+EXPOSURE_END_EVENT = "EventExposureEnd"
+# Latency components reported, in the order a frame goes through them
+COMPONENTS = ("exposure", "queue", "transfer", "total")
+EVENT_DTYPE = np.dtype([("frame_id", "<u8"), ("timestamp", "<u8"), ("host_ns", "<i8")])
+FRAME_DTYPE = np.dtype(
+    [
+        ("frame_id", "<u8"),
+        ("timestamp", "<u8"),
+        ("grab_start_ns", "<i8"),
+        ("grab_end_ns", "<i8"),
+    ]
+)
+
+
+def _exposure_end_handler(recorder: "ExposureLatencyRecorder"):
+    # PySpin is only importable with the Spinnaker runtime, so the subclass is built on demand
+    class ExposureEndHandler(PySpin.DeviceEventHandler):
+        def OnDeviceEvent(self, event_name):
+            if event_name == EXPOSURE_END_EVENT:
+                recorder._on_exposure_end()
+
+    return ExposureEndHandler()
+
+
+class ExposureLatencyRecorder:
+    """
+    Measures the latency from the end of exposure on the sensor to the frame being
+    available in Python. ExposureEnd device events are received on the Spinnaker
+    event thread, where the handler only stores the FrameID, the camera timestamp
+    and the host arrival time in a preallocated ring, so it never blocks the grab
+    thread; the grab loop records each frame's FrameID and the host times around
+    GetNextImage. Events and frames are paired by FrameID after the session:
+        exposure: ExposureEnd minus frame start, on the camera clock.
+        queue: time after ExposureEnd during which the host was not waiting for a frame.
+        transfer: time from ExposureEnd, or from the host starting to wait if later,
+            to GetNextImage returning; readout, link and driver.
+        total: exposure + queue + transfer.
+    The event's own delivery delay is not observable and is counted in neither.
+    Attributes:
+        events (np.ndarray): Ring of EVENT_DTYPE records, the last len(events) kept.
+        frames (np.ndarray): Ring of FRAME_DTYPE records, the last len(frames) kept.
+        event_count (int): ExposureEnd events received.
+        frame_count (int): Frames recorded.
+    """
+
+    def __init__(self, cam: PySpin.CameraPtr, capacity: int = 1 << 16):
+        self.events = np.zeros(capacity, dtype=EVENT_DTYPE)
+        self.frames = np.zeros(capacity, dtype=FRAME_DTYPE)
+        self.event_count = 0
+        self.frame_count = 0
+        self._cam = cam
+        self._handler = None
+        nodemap = cam.GetNodeMap()
+        if not (
+            camera.set_enum_value(nodemap, "EventSelector", "ExposureEnd")
+            and camera.set_enum_value(nodemap, "EventNotification", "On")
+        ):
+            print("ExposureEnd events unavailable, latency will not be measured")
+            return
+        self._event_frame_id = PySpin.CIntegerPtr(
+            nodemap.GetNode("EventExposureEndFrameID")
+        )
+        self._event_timestamp = PySpin.CIntegerPtr(
+            nodemap.GetNode("EventExposureEndTimestamp")
+        )
+        self._handler = _exposure_end_handler(self)
+        cam.RegisterEventHandler(self._handler, EXPOSURE_END_EVENT)
+
+    def _on_exposure_end(self):
+        # Runs on the Spinnaker event thread: the only writer of events
+        host_ns = time.perf_counter_ns()
+        self.events[self.event_count % len(self.events)] = (
+            self._event_frame_id.GetValue(),
+            self._event_timestamp.GetValue(),
+            host_ns,
+        )
+        self.event_count += 1
+
+    def record_frame(
+        self, frame_id: int, timestamp: int, grab_start_ns: int, grab_end_ns: int
+    ):
+        """Stores a delivered frame; grab_start_ns/grab_end_ns are perf_counter_ns around GetNextImage."""
+        self.frames[self.frame_count % len(self.frames)] = (
+            frame_id,
+            timestamp,
+            grab_start_ns,
+            grab_end_ns,
+        )
+        self.frame_count += 1
+
+    def close(self):
+        """Unregisters the event handler and turns ExposureEnd notification off."""
+        if self._handler is None:
+            return
+        self._cam.UnregisterEventHandler(self._handler)
+        camera.set_enum_value(self._cam.GetNodeMap(), "EventSelector", "ExposureEnd")
+        camera.set_enum_value(self._cam.GetNodeMap(), "EventNotification", "Off")
+        self._handler = None
+
+    def latencies(self) -> Dict[str, np.ndarray]:
+        """Returns the latency components in milliseconds of every frame with a matching event."""
+        events = self.events[: min(self.event_count, len(self.events))]
+        frames = self.frames[: min(self.frame_count, len(self.frames))]
+        _, event_index, frame_index = np.intersect1d(
+            events["frame_id"], frames["frame_id"], return_indices=True
+        )
+        events, frames = events[event_index], frames[frame_index]
+        exposure = (
+            events["timestamp"].astype(np.int64) - frames["timestamp"].astype(np.int64)
+        ) / 1e6
+        waiting_from = np.maximum(frames["grab_start_ns"], events["host_ns"])
+        queue = (waiting_from - events["host_ns"]) / 1e6
+        transfer = (frames["grab_end_ns"] - waiting_from) / 1e6
+        return {
+            "exposure": exposure,
+            "queue": queue,
+            "transfer": transfer,
+            "total": exposure + queue + transfer,
+        }
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Returns count, p50, p99 and max in milliseconds for every latency component."""
+        summary = {}
+        for component, values in self.latencies().items():
+            if values.size == 0:
+                continue
+            summary[component] = {
+                "count": int(values.size),
+                "p50_ms": float(np.percentile(values, 50)),
+                "p99_ms": float(np.percentile(values, 99)),
+                "max_ms": float(values.max()),
+            }
+        return summary
+
+    def print_report(self):
+        """Prints the latency distribution to the console."""
+        summary = self.report()
+        if not summary:
+            print("No frames could be paired with ExposureEnd events")
+            return
+        print(f"{'latency':<10}{'count':>10}{'p50 ms':>12}{'p99 ms':>12}{'max ms':>12}")
+        for component, stats in summary.items():
+            print(
+                f"{component:<10}{stats['count']:>10}{stats['p50_ms']:>12.3f}"
+                f"{stats['p99_ms']:>12.3f}{stats['max_ms']:>12.3f}"
+            )
+
+    def save(self, filepath: Union[Path, str]) -> Path:
+        """Saves the raw events and frames as .npz for later analysis."""
+        filepath = Path(filepath)
+        np.savez(
+            filepath,
+            events=self.events[: min(self.event_count, len(self.events))],
+            frames=self.frames[: min(self.frame_count, len(self.frames))],
+        )
+        print(f"Latency log saved to {filepath}")
+        return filepath
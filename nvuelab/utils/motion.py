@@ -0,0 +1,146 @@
+from collections import deque
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+
+from nvuelab.utils.auxiliary_functions import lazy_import
+
+cv = lazy_import("cv2")
+
+# Width of the copy motion is scored on; about 1/8 of a 1080p frame
+SCORE_WIDTH = 240
+# Grey-level change that counts a pixel as moving, and the running background update rate
+PIXEL_THRESHOLD = 15
+BACKGROUND_ALPHA = 0.05
+GATE_DTYPE = np.dtype(
+    [("frame", "<u8"), ("timestamp", "<u8"), ("score", "<f4"), ("committed", "?")]
+)
+
+
+class MotionScorer:
+    """
+    Cheap per-frame motion score: the fraction of pixels of a downscaled grayscale
+    copy that differ from a running background by more than pixel_threshold. The
+    background is an exponential average (cv.accumulateWeighted), so slow lighting
+    changes are absorbed while an animal moving is not.
+    Attributes:
+        width (int): Width of the scored copy.
+        pixel_threshold (int): Grey-level difference counted as motion.
+        alpha (float): Background update rate per frame.
+    """
+
+    def __init__(
+        self,
+        width: int = SCORE_WIDTH,
+        pixel_threshold: int = PIXEL_THRESHOLD,
+        alpha: float = BACKGROUND_ALPHA,
+    ):
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.alpha = alpha
+        self._background = None
+        self._size = None
+
+    def score(self, img: np.ndarray) -> float:
+        """Returns the fraction of moving pixels in img and updates the background."""
+        if img.ndim == 3:
+            img = cv.cvtColor(img, cv.COLOR_BGR2GRAY)
+        if self._size is None:
+            height = max(1, round(img.shape[0] * self.width / img.shape[1]))
+            self._size = (self.width, height)
+        small = cv.resize(img, self._size, interpolation=cv.INTER_AREA)
+        if self._background is None:
+            self._background = small.astype(np.float32)
+            return 0.0
+        difference = cv.absdiff(small, self._background.astype(small.dtype))
+        moving = cv.countNonZero(
+            cv.threshold(difference, self.pixel_threshold, 1, cv.THRESH_BINARY)[1]
+        )
+        cv.accumulateWeighted(small, self._background, self.alpha)
+        return moving / difference.size
+
+
+class MotionGatedWriter:
+    """
+    Wraps a video writer so only frames around motion are committed. Every frame is
+    scored; when the score exceeds threshold the last pre_frames frames are flushed
+    to the writer, and frames keep being committed until post_frames frames pass
+    without motion. Every frame's timestamp, score and gate decision is logged, and
+    saved next to the video as <stem>.gate.npy on release, so the timeline can be
+    reconstructed (committed_segments).
+    Attributes:
+        writer: The wrapped writer, receiving only committed frames.
+        threshold (float): Fraction of moving pixels that opens the gate.
+        records (np.ndarray): Preallocated GATE_DTYPE records, valid up to count.
+        count (int): Number of frames seen.
+    """
+
+    def __init__(
+        self,
+        writer,
+        filename: Union[Path, str],
+        threshold: float = 0.002,
+        pre_frames: int = 20,
+        post_frames: int = 40,
+        scorer: Union[MotionScorer, None] = None,
+        capacity: int = 1 << 16,
+    ):
+        self.writer = writer
+        self.log_path = Path(filename).with_suffix(".gate.npy")
+        self.threshold = threshold
+        self.post_frames = post_frames
+        self.scorer = scorer or MotionScorer()
+        self.records = np.zeros(capacity, dtype=GATE_DTYPE)
+        self.count = 0
+        self.committed = 0
+        self._pending = deque(maxlen=pre_frames)
+        self._post_left = 0
+
+    def isOpened(self):
+        return self.writer.isOpened()
+
+    def write(self, img, timestamp: int = 0):
+        """Scores img and commits it, with its buffered lead-in, if the gate is open."""
+        if self.count == len(self.records):
+            self.records = np.resize(self.records, 2 * len(self.records))
+        index = self.count
+        score = self.scorer.score(img)
+        self.records[index] = (index, timestamp, score, False)
+        self.count += 1
+
+        if score > self.threshold:
+            self._post_left = self.post_frames
+            while self._pending:
+                self._commit(*self._pending.popleft())
+            self._commit(index, img)
+        elif self._post_left > 0:
+            self._post_left -= 1
+            self._commit(index, img)
+        elif self._pending.maxlen:
+            self._pending.append((index, img))
+
+    def _commit(self, index, img):
+        self.writer.write(img)
+        self.records["committed"][index] = True
+        self.committed += 1
+
+    def release(self):
+        """Releases the wrapped writer and saves the gate log."""
+        self.writer.release()
+        self._pending.clear()
+        np.save(self.log_path, self.records[: self.count])
+        kept = self.committed / self.count if self.count else 0.0
+        print(
+            f"Motion gate committed {self.committed}/{self.count} frames ({kept:.0%}), "
+            f"log saved to {self.log_path}"
+        )
+
+
+def committed_segments(records: np.ndarray) -> np.ndarray:
+    """Returns the [first, last) frame ranges committed by the gate, one row per segment."""
+    committed = np.concatenate(([0], records["committed"].astype(np.int8), [0]))
+    changes = np.diff(committed)
+    return np.column_stack(
+        (np.flatnonzero(changes == 1), np.flatnonzero(changes == -1))
+    )
@@ -0,0 +1,229 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Union
+
+import toml
+
+from nvuelab.utils import clocks, event_log
+
+# Actions a protocol may use; "mark" is handled by the runner itself
+ACTIONS = ("start_recording", "stop_recording", "set_trigger", "mark")
+UNIT_SECONDS = {"seconds": 1.0, "minutes": 60.0, "hours": 3600.0}
+
+
+@dataclass
+class Phase:
+    """
+    One step of an experiment protocol.
+    Attributes:
+        name (str): Phase name, used in the experiment log.
+        duration (float): Phase length in duration_units.
+        duration_units (str): "seconds", "minutes" or "hours".
+        on_start (list): Actions run when the phase begins, each a dict with an "action" key.
+        on_end (list): Actions run when the phase ends.
+    """
+
+    name: str
+    duration: float
+    duration_units: str = "seconds"
+    on_start: List[Dict] = field(default_factory=list)
+    on_end: List[Dict] = field(default_factory=list)
+
+    @property
+    def seconds(self) -> float:
+        return self.duration * UNIT_SECONDS[self.duration_units]
+
+
+@dataclass
+class Protocol:
+    """
+    An ordered schedule of phases loaded from TOML:
+
+        name = "open-field"
+
+        [[phases]]
+        name = "baseline"
+        duration = 5
+        duration_units = "minutes"
+        on_start = [{action = "set_trigger", mode = "hardware"}, {action = "start_recording"}]
+
+        [[phases]]
+        name = "stimulus"
+        duration = 30
+        on_start = [{action = "mark", label = "light-on"}]
+        on_end = [{action = "stop_recording"}]
+    """
+
+    name: str
+    phases: List[Phase]
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(phase.seconds for phase in self.phases)
+
+
+def load_protocol(filepath: Union[Path, str]) -> Protocol:
+    """Reads and validates a protocol TOML file, raising ValueError on an invalid schedule."""
+    with open(filepath, "r", encoding="utf-8") as file:
+        data = toml.load(file)
+    phases = []
+    for index, entry in enumerate(data.get("phases", [])):
+        if "name" not in entry or "duration" not in entry:
+            raise ValueError(f"Phase {index} needs a name and a duration")
+        phase = Phase(
+            name=entry["name"],
+            duration=float(entry["duration"]),
+            duration_units=entry.get("duration_units", "seconds"),
+            on_start=list(entry.get("on_start", [])),
+            on_end=list(entry.get("on_end", [])),
+        )
+        if phase.duration_units not in UNIT_SECONDS:
+            raise ValueError(
+                f"Phase {phase.name}: unknown duration units {phase.duration_units}"
+            )
+        if phase.duration <= 0:
+            raise ValueError(f"Phase {phase.name}: duration must be positive")
+        for action in phase.on_start + phase.on_end:
+            if action.get("action") not in ACTIONS:
+                raise ValueError(
+                    f"Phase {phase.name}: unknown action {action.get('action')}"
+                )
+        phases.append(phase)
+    if not phases:
+        raise ValueError(f"No phases defined in {filepath}")
+    return Protocol(name=data.get("name", Path(filepath).stem), phases=phases)
+
+
+class ProtocolRunner:
+    """
+    Executes a Protocol on its own thread against a MonotonicTimer.
+    Phase boundaries are scheduled as offsets from the protocol start, so lateness
+    never accumulates, and every boundary is logged with its planned and actual
+    offset. Actions are delegated to handlers, callables taking the action dict;
+    they should only signal the acquisition code (set a flag, put work on a queue
+    the GUI thread drains, change a camera node) so neither the grab loop nor the
+    protocol thread is ever blocked.
+    Attributes:
+        protocol (Protocol): The schedule to run.
+        handlers (dict): Callable per action name.
+        timer (MonotonicTimer): Timer started when the protocol starts.
+    """
+
+    def __init__(
+        self,
+        protocol: Protocol,
+        handlers: Dict[str, Callable[[Dict], None]],
+        log_path: Union[Path, None] = None,
+    ):
+        self.protocol = protocol
+        self.handlers = handlers
+        self.timer = clocks.MonotonicTimer(duration=protocol.total_seconds)
+        self._log = event_log.get_log(clocks.resolve_log_path(log_path))
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Starts the protocol thread."""
+        if self.is_running():
+            print("Protocol already running")
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name=f"protocol-{self.protocol.name}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """
+        Asks the protocol to abort after the action in progress; on_end of the current
+        phase still runs. Returns immediately, so it is safe to call from a GUI thread
+        that the handlers hand work to; poll is_running() to know when it finished.
+        """
+        self._stop_event.set()
+
+    def join(self, timeout: Union[float, None] = None):
+        """Waits for the protocol thread; never call it from a thread the handlers depend on."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _wait(self, deadline_ns: int) -> bool:
+        """Waits for deadline_ns, returning False if the protocol was stopped first."""
+        while True:
+            remaining = deadline_ns - time.perf_counter_ns()
+            if remaining <= clocks.SPIN_THRESHOLD_NS:
+                break
+            if self._stop_event.wait((remaining - clocks.SPIN_THRESHOLD_NS) / 1e9):
+                return False
+        clocks.wait_until(deadline_ns)
+        return True
+
+    def _log_boundary(self, phase: Phase, boundary: str, planned: float):
+        actual = self.timer.get_elapsed_time()
+        self._log.log_event(
+            "phase",
+            protocol=self.protocol.name,
+            phase=phase.name,
+            boundary=boundary,
+            planned_offset=planned,
+            actual_offset=actual,
+            wall_time=self.timer.wall_time_at(actual),
+        )
+        return actual
+
+    def _run_actions(self, phase: Phase, actions: List[Dict]):
+        for action in actions:
+            name = action["action"]
+            try:
+                if name == "mark":
+                    self._log.log_event(
+                        "mark",
+                        protocol=self.protocol.name,
+                        phase=phase.name,
+                        label=action.get("label", ""),
+                        wall_time=self.timer.wall_time_at(
+                            self.timer.get_elapsed_time()
+                        ),
+                    )
+                handler = self.handlers.get(name)
+                if handler is not None:
+                    handler(action)
+                elif name != "mark":
+                    print(f"No handler for protocol action {name}")
+            except Exception as e:
+                print(f"Protocol action {name} failed in phase {phase.name}: {e}")
+                self._log.log_event(
+                    "action_error", phase=phase.name, action=name, error=str(e)
+                )
+
+    def _run(self):
+        self.timer.start()
+        offset = 0.0
+        for phase in self.protocol.phases:
+            start = self._log_boundary(phase, "start", offset)
+            self._run_actions(phase, phase.on_start)
+            offset += phase.seconds
+            completed = self._wait(self.timer.deadline_ns(offset))
+            end = self._log_boundary(phase, "end", offset)
+            self._run_actions(phase, phase.on_end)
+            self._log.append(
+                clocks.timer_record(
+                    clocks.Timer(
+                        start_time=self.timer.wall_time_at(start),
+                        end_time=self.timer.wall_time_at(end),
+                        duration=phase.duration,
+                        duration_units=phase.duration_units,
+                        elapsed_time=end - start,
+                    ),
+                    clocks.create_phase_name(phase.name),
+                )
+            )
+            if not completed:
+                print(f"Protocol {self.protocol.name} stopped during {phase.name}")
+                break
+        self.timer.stop()
+        self._log.sync()
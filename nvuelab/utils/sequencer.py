@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Union
+
+import toml
+
+from nvuelab.utils import camera, video
+from nvuelab.utils.auxiliary_functions import lazy_import
+
+PySpin = lazy_import("PySpin")
+
+SEQUENCER_CHUNK = "SequencerSetActive"
+
+
+@dataclass
+class SequencerState:
+    """
+    One sequencer set; consecutive frames step through the sets in order and wrap around.
+    Attributes:
+        name (str): State name, used for its output file.
+        exposure_time (float): Exposure in microseconds, None keeps the current value.
+        gain (float): Gain in dB, None keeps the current value.
+    """
+
+    name: str
+    exposure_time: Union[float, None] = None
+    gain: Union[float, None] = None
+
+
+def load_sequence(filepath: Union[Path, str]) -> List[SequencerState]:
+    """
+    Reads and validates a sequence TOML file, raising ValueError on an invalid one:
+
+        [[states]]
+        name = "dim"
+        exposure_time = 2000
+        gain = 0
+
+        [[states]]
+        name = "bright"
+        exposure_time = 15000
+        gain = 6
+    """
+    with open(filepath, "r", encoding="utf-8") as file:
+        data = toml.load(file)
+    states = []
+    for index, entry in enumerate(data.get("states", [])):
+        state = SequencerState(
+            name=entry.get("name", f"state{index}"),
+            exposure_time=entry.get("exposure_time"),
+            gain=entry.get("gain"),
+        )
+        if state.exposure_time is not None and state.exposure_time <= 0:
+            raise ValueError(f"State {state.name}: exposure_time must be positive")
+        states.append(state)
+    if len(states) < 2:
+        raise ValueError(f"A sequence needs at least two states in {filepath}")
+    if len({state.name for state in states}) != len(states):
+        raise ValueError(f"State names must be unique in {filepath}")
+    return states
+
+
+def configure_sequencer(cam: PySpin.CameraPtr, states: List[SequencerState]) -> bool:
+    """
+    Programs the camera sequencer with one set per state, each advancing to the next
+    on FrameStart, so exposure and gain change on the camera between consecutive
+    trigger pulses with no host involvement. Must be called before BeginAcquisition.
+    Returns False, leaving the sequencer off, if any setting is rejected.
+    """
+    nodemap = cam.GetNodeMap()
+    # The sequencer must be off while configuring, and auto exposure/gain would override the sets
+    if not camera.set_enum_value(nodemap, "SequencerMode", "Off"):
+        print("Camera has no sequencer")
+        return False
+    if any(state.exposure_time is not None for state in states):
+        camera.set_enum_value(nodemap, "ExposureAuto", "Off")
+    if any(state.gain is not None for state in states):
+        camera.set_enum_value(nodemap, "GainAuto", "Off")
+    if not camera.set_enum_value(nodemap, "SequencerConfigurationMode", "On"):
+        return False
+
+    set_selector = PySpin.CIntegerPtr(nodemap.GetNode("SequencerSetSelector"))
+    set_next = PySpin.CIntegerPtr(nodemap.GetNode("SequencerSetNext"))
+    set_save = PySpin.CCommandPtr(nodemap.GetNode("SequencerSetSave"))
+    if set_selector.GetMax() < len(states) - 1:
+        print(f"Camera supports {set_selector.GetMax() + 1} sequencer sets")
+        camera.set_enum_value(nodemap, "SequencerConfigurationMode", "Off")
+        return False
+    for index, state in enumerate(states):
+        set_selector.SetValue(index)
+        ok = camera.set_enum_value(nodemap, "SequencerTriggerSource", "FrameStart")
+        if state.exposure_time is not None:
+            ok = ok and camera.set_number_value(
+                nodemap, "ExposureTime", state.exposure_time
+            )
+        if state.gain is not None:
+            ok = ok and camera.set_number_value(nodemap, "Gain", state.gain)
+        if not ok:
+            print(f"Could not configure sequencer state {state.name}")
+            camera.set_enum_value(nodemap, "SequencerConfigurationMode", "Off")
+            return False
+        set_next.SetValue((index + 1) % len(states))
+        set_save.Execute()
+
+    set_start = PySpin.CIntegerPtr(nodemap.GetNode("SequencerSetStart"))
+    if PySpin.IsWritable(set_start):
+        set_start.SetValue(0)
+    valid = PySpin.CEnumerationPtr(nodemap.GetNode("SequencerConfigurationValid"))
+    if valid.GetCurrentEntry().GetSymbolic() != "Yes":
+        print("Sequencer configuration is not valid")
+        camera.set_enum_value(nodemap, "SequencerConfigurationMode", "Off")
+        return False
+    camera.set_enum_value(nodemap, "SequencerConfigurationMode", "Off")
+    camera.set_enum_value(nodemap, "SequencerMode", "On")
+    print(f"Sequencer running {len(states)} states")
+    return True
+
+
+def disable_sequencer(cam: PySpin.CameraPtr):
+    """Turns the sequencer off; exposure and gain stay as last applied."""
+    camera.set_enum_value(cam.GetNodeMap(), "SequencerMode", "Off")
+
+
+class SequencerTagger:
+    """
+    Tells which sequencer set each frame was taken with, from the
+    ChunkSequencerSetActive chunk. Without the chunk, sets are assumed to cycle frame
+    by frame, which goes out of step after an incomplete or dropped frame. close()
+    turns off the chunk, and chunk mode, if this tagger enabled them.
+    Attributes:
+        states (int): Number of sequencer states.
+        frames (int): Frames tagged so far.
+    """
+
+    def __init__(self, cam: PySpin.CameraPtr, states: int):
+        self.states = states
+        self.frames = 0
+        self._cam = cam
+        self._active_set = None
+        nodemap = cam.GetNodeMap()
+        chunk_mode_active = PySpin.CBooleanPtr(nodemap.GetNode("ChunkModeActive"))
+        self._chunk_mode_was_active = (
+            PySpin.IsReadable(chunk_mode_active) and chunk_mode_active.GetValue()
+        )
+        self._chunk_was_enabled = bool(camera.enabled_chunks(cam, (SEQUENCER_CHUNK,)))
+        if SEQUENCER_CHUNK in camera.enable_chunks(cam, (SEQUENCER_CHUNK,)):
+            node = PySpin.CIntegerPtr(nodemap.GetNode(f"Chunk{SEQUENCER_CHUNK}"))
+            if PySpin.IsReadable(node):
+                self._active_set = node
+        if self._active_set is None:
+            print("Sequencer set chunk unavailable, assuming sets cycle every frame")
+
+    def active_set(self) -> int:
+        """Returns the sequencer set of the frame just grabbed."""
+        self.frames += 1
+        if self._active_set is not None:
+            return self._active_set.GetValue()
+        return (self.frames - 1) % self.states
+
+    def close(self):
+        """Turns off the chunk, and chunk mode, this tagger enabled."""
+        camera.disable_chunks(
+            self._cam,
+            [] if self._chunk_was_enabled else [SEQUENCER_CHUNK],
+            deactivate=not self._chunk_mode_was_active,
+        )
+
+
+class SequencerDemuxWriter:
+    """
+    Splits an interleaved sequencer recording into one video per state,
+    <stem>_<state name><suffix>, each at fps / number of states.
+    Attributes:
+        states (list): SequencerState per set index.
+        writers (list): Writer per state.
+        unknown (int): Frames tagged with a set outside the sequence, not written.
+    """
+
+    def __init__(
+        self,
+        filename,
+        fps,
+        frame_width,
+        frame_height,
+        states: List[SequencerState],
+        writer_init: Callable = video.video_writer_init,
+    ):
+        filename = Path(filename)
+        self.states = list(states)
+        self.unknown = 0
+        self.writers = [
+            writer_init(
+                str(
+                    filename.with_name(f"{filename.stem}_{state.name}{filename.suffix}")
+                ),
+                fps / len(self.states),
+                frame_width,
+                frame_height,
+            )
+            for state in self.states
+        ]
+
+    def isOpened(self):
+        return all(writer.isOpened() for writer in self.writers)
+
+    def write(self, img, set_index: int = 0):
+        if 0 <= set_index < len(self.writers):
+            self.writers[set_index].write(img)
+        else:
+            self.unknown += 1
+
+    def release(self):
+        for writer in self.writers:
+            writer.release()
+        if self.unknown:
+            print(
+                f"{self.unknown} frames had an unknown sequencer set and were skipped"
+            )
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from collections import deque
+
+from nvuelab.utils.auxiliary_functions import lazy_import
+from nvuelab.utils.event_log import ExperimentLog
+
+PySpin = lazy_import("PySpin")
+
+# Log events held between writer batches; the oldest are dropped when it overflows
+LOG_QUEUE_SIZE = 1 << 14
+WRITE_INTERVAL = 0.5
+LOG_RECORD = "spinnaker_log"
+
+
+def _logging_handler(router: "SpinnakerLogRouter"):
+    # PySpin is only importable with the Spinnaker runtime, so the subclass is built on demand
+    class LoggingHandler(PySpin.LoggingEventHandler):
+        def OnLogEvent(self, data):
+            router._on_log_event(data)
+
+    return LoggingHandler()
+
+
+def log_level(name: str) -> int:
+    """Returns the Spinnaker priority for a level name: debug, info, notice, warn, error, crit."""
+    level = getattr(PySpin, f"SPINNAKER_LOG_LEVEL_{name.upper()}", None)
+    if level is None:
+        raise ValueError(f"Unknown Spinnaker log level {name}")
+    return level
+
+
+class SpinnakerLogRouter:
+    """
+    Routes Spinnaker's own log into the session's experiment log as spinnaker_log
+    records. The handler runs on whichever Spinnaker thread logs, including the
+    acquisition path, so it only copies the fields into a bounded deque, whose append
+    and popleft need no lock; a writer thread drains it every interval seconds and
+    appends the batch with one write. When the writer falls behind, the oldest events
+    are dropped instead of blocking Spinnaker. Errors are also printed. Events are
+    numbered by itertools.count, whose next() is atomic, so counting needs no lock
+    either: the writer derives received and dropped from the numbers it sees, exact
+    once close() has drained the queue.
+    Attributes:
+        log (ExperimentLog): Log the records are appended to.
+        received (int): Highest event number drained so far.
+        written (int): Log events written.
+    """
+
+    def __init__(
+        self,
+        system: PySpin.SystemPtr,
+        log: ExperimentLog,
+        level: str = "warn",
+        queue_size: int = LOG_QUEUE_SIZE,
+        interval: float = WRITE_INTERVAL,
+    ):
+        self.log = log
+        self.received = 0
+        self.written = 0
+        self._system = system
+        self._interval = interval
+        self._queue = deque(maxlen=queue_size)
+        self._sequence = itertools.count(1)
+        self._stop = threading.Event()
+        self._error_level = log_level("error")
+        self._handler = _logging_handler(self)
+        system.SetLoggingEventPriorityLevel(log_level(level))
+        system.RegisterLoggingEventHandler(self._handler)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _on_log_event(self, data):
+        # Runs on Spinnaker threads: no I/O and no locks
+        self._queue.append(
+            (
+                next(self._sequence),
+                time.time(),
+                data.GetPriority(),
+                data.GetPriorityName(),
+                data.GetCategoryName(),
+                data.GetThreadName(),
+                data.GetTimestamp(),
+                data.GetLogMessage(),
+            )
+        )
+
+    @property
+    def dropped(self) -> int:
+        return max(0, self.received - self.written)
+
+    def _drain(self):
+        records = []
+        while self._queue:
+            number, host_time, priority, level, category, thread, timestamp, message = (
+                self._queue.popleft()
+            )
+            self.received = max(self.received, number)
+            # Lower priority values are more severe
+            if priority <= self._error_level:
+                print(f"Spinnaker {level}: {message}")
+            records.append(
+                {
+                    "type": LOG_RECORD,
+                    "host_time": host_time,
+                    "level": level,
+                    "category": category,
+                    "thread": thread,
+                    "spinnaker_time": timestamp,
+                    "message": message,
+                }
+            )
+        self.log.append_many(records)
+        self.written += len(records)
+
+    def _run(self):
+        while not self._stop.wait(self._interval):
+            self._drain()
+        self._drain()
+
+    def close(self):
+        """Unregisters the handler and writes the events still queued."""
+        self._system.UnregisterLoggingEventHandler(self._handler)
+        self._stop.set()
+        self._thread.join()
+        if self.dropped:
+            print(f"{self.dropped} Spinnaker log events were dropped")
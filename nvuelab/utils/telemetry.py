@@ -0,0 +1,195 @@
+import time
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Dict
+
+from nvuelab.utils import camera
+
+# Number of encode latencies kept for percentile estimates, must be a power of two
+LATENCY_SAMPLES = 1024
+
+
+@dataclass
+class TelemetrySnapshot:
+    """
+    A point-in-time view of the acquisition pipeline counters.
+    Attributes:
+        grab_fps (float): Frames grabbed per second since the previous snapshot.
+        write_fps (float): Frames written per second since the previous snapshot.
+        frames_grabbed (int): Total frames received from the camera.
+        frames_written (int): Total frames handed to the video writer.
+        frames_incomplete (int): Total frames the camera delivered as incomplete.
+        frames_dropped (int): Total frames missing from the FrameID sequence.
+        grab_errors (int): Total GetNextImage failures (timeouts included).
+        buffer_underruns (int): Camera stream buffer underruns reported by Spinnaker, -1 if unavailable.
+        queue_depths (dict): Current size of every watched queue.
+        encode_p50_ms (float): Median write latency over the recent window.
+        encode_p99_ms (float): 99th percentile write latency over the recent window.
+        encode_max_ms (float): Maximum write latency over the recent window.
+    """
+
+    grab_fps: float = 0.0
+    write_fps: float = 0.0
+    frames_grabbed: int = 0
+    frames_written: int = 0
+    frames_incomplete: int = 0
+    frames_dropped: int = 0
+    grab_errors: int = 0
+    buffer_underruns: int = -1
+    queue_depths: Dict[str, int] = field(default_factory=dict)
+    encode_p50_ms: float = 0.0
+    encode_p99_ms: float = 0.0
+    encode_max_ms: float = 0.0
+
+    def format_status(self) -> str:
+        """Returns a single line summary suitable for a status bar."""
+        queues = " ".join(
+            f"{name}={depth}" for name, depth in self.queue_depths.items()
+        )
+        underruns = "n/a" if self.buffer_underruns < 0 else str(self.buffer_underruns)
+        return (
+            f"grab {self.grab_fps:.1f} fps | write {self.write_fps:.1f} fps | "
+            f"queues {queues or '-'} | dropped {self.frames_dropped} | "
+            f"incomplete {self.frames_incomplete} | underruns {underruns} | "
+            f"encode p50 {self.encode_p50_ms:.1f} ms p99 {self.encode_p99_ms:.1f} ms "
+            f"max {self.encode_max_ms:.1f} ms"
+        )
+
+
+@dataclass
+class PipelineTelemetry:
+    """
+    Counters updated from the acquisition and writer threads and read by the GUI.
+    Every counter has exactly one writing thread, so updates are plain attribute
+    increments without locks; snapshot() does all the expensive work off the hot path.
+    Attributes:
+        frames_grabbed (int): Frames received from the camera.
+        frames_written (int): Frames handed to the video writer.
+        frames_incomplete (int): Frames the camera delivered as incomplete.
+        frames_dropped (int): Gaps detected in the camera FrameID sequence.
+        grab_errors (int): GetNextImage failures.
+        last_frame_id (int): FrameID of the last frame grabbed, -1 before the first frame.
+        encode_latencies (array): Ring of the most recent write latencies in seconds.
+        encode_count (int): Total write latencies recorded into the ring.
+    """
+
+    frames_grabbed: int = 0
+    frames_written: int = 0
+    frames_incomplete: int = 0
+    frames_dropped: int = 0
+    grab_errors: int = 0
+    last_frame_id: int = -1
+    encode_latencies: array = field(
+        default_factory=lambda: array("d", bytes(8 * LATENCY_SAMPLES))
+    )
+    encode_count: int = 0
+    _queues: Dict[str, Any] = field(default_factory=dict)
+    _camera: Any = None
+    _writer: Any = None
+    _last_time: float = 0.0
+    _last_grabbed: int = 0
+    _last_written: int = 0
+
+    def _advance(self, frame_id: int):
+        if self.last_frame_id >= 0 and frame_id > self.last_frame_id + 1:
+            self.frames_dropped += frame_id - self.last_frame_id - 1
+        self.last_frame_id = frame_id
+
+    def record_grab(self, frame_id: int):
+        """Counts a grabbed frame and accumulates any FrameID gap as dropped frames."""
+        self._advance(frame_id)
+        self.frames_grabbed += 1
+
+    def record_incomplete(self, frame_id: int):
+        """Counts a frame delivered as incomplete; its FrameID is not a gap for the next grab."""
+        self._advance(frame_id)
+        self.frames_incomplete += 1
+
+    def record_grab_error(self):
+        """Counts a failed GetNextImage call."""
+        self.grab_errors += 1
+
+    def record_write(self, latency: float):
+        """Counts a written frame and stores its write latency in seconds."""
+        self.encode_latencies[self.encode_count & (LATENCY_SAMPLES - 1)] = latency
+        self.encode_count += 1
+        self.frames_written += 1
+
+    def watch_queue(self, name: str, queue):
+        """Registers a queue whose qsize() is reported in every snapshot."""
+        self._queues[name] = queue
+
+    def watch_writer(self, writer):
+        """Registers the video writer whose backlog and drops are reported."""
+        self._writer = writer
+
+    def writer_backlog(self) -> int:
+        """Returns the frames handed to the writer that it has not finished, 0 for synchronous writers."""
+        return getattr(self._writer, "backlog", 0)
+
+    def writer_drops(self) -> int:
+        """Returns the frames the writer discarded because it fell behind."""
+        return getattr(self._writer, "frames_dropped", 0)
+
+    def watch_camera(self, cam):
+        """Registers the camera whose stream statistics are reported in every snapshot."""
+        self._camera = cam
+
+    def reset(self):
+        """Clears all counters, keeping the watched queues and camera."""
+        self.frames_grabbed = 0
+        self.frames_written = 0
+        self.frames_incomplete = 0
+        self.frames_dropped = 0
+        self.grab_errors = 0
+        self.last_frame_id = -1
+        self.encode_count = 0
+        self._last_time = 0.0
+        self._last_grabbed = 0
+        self._last_written = 0
+
+    def snapshot(self) -> TelemetrySnapshot:
+        """Builds a TelemetrySnapshot, computing rates against the previous call."""
+        now = time.perf_counter()
+        grabbed = self.frames_grabbed
+        written = self.frames_written
+        interval = now - self._last_time if self._last_time else 0.0
+        grab_fps = (grabbed - self._last_grabbed) / interval if interval > 0 else 0.0
+        write_fps = (written - self._last_written) / interval if interval > 0 else 0.0
+        self._last_time, self._last_grabbed, self._last_written = now, grabbed, written
+
+        snapshot = TelemetrySnapshot(
+            grab_fps=grab_fps,
+            write_fps=write_fps,
+            frames_grabbed=grabbed,
+            frames_written=written,
+            frames_incomplete=self.frames_incomplete,
+            frames_dropped=self.frames_dropped,
+            grab_errors=self.grab_errors,
+            buffer_underruns=self._read_buffer_underruns(),
+            queue_depths={name: q.qsize() for name, q in self._queues.items()},
+        )
+        if self._writer is not None:
+            snapshot.queue_depths["writer"] = self.writer_backlog()
+        p50, p99, peak = self._encode_percentiles()
+        snapshot.encode_p50_ms = p50 * 1e3
+        snapshot.encode_p99_ms = p99 * 1e3
+        snapshot.encode_max_ms = peak * 1e3
+        return snapshot
+
+    def _encode_percentiles(self):
+        count = min(self.encode_count, LATENCY_SAMPLES)
+        if count == 0:
+            return 0.0, 0.0, 0.0
+        samples = sorted(self.encode_latencies[:count])
+        return (
+            samples[(count - 1) // 2],
+            samples[min(count - 1, int(count * 0.99))],
+            samples[-1],
+        )
+
+    def _read_buffer_underruns(self) -> int:
+        if self._camera is None:
+            return -1
+        stats = camera.get_stream_statistics(self._camera)
+        return stats.get("StreamBufferUnderrunCount", -1)
@@ -0,0 +1,164 @@
+import gc
+import json
+import os
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, List, Union
+
+# Events kept per thread; 2**19 covers 10 minutes of 5 stages at 100 fps in ~9 MB per thread
+DEFAULT_CAPACITY = 1 << 19
+# Bytes used per event: start (8) + duration (8) + name id (2)
+EVENT_SIZE = 18
+
+
+class _TraceRing:
+    """Fixed-size ring of complete events written by a single thread."""
+
+    def __init__(self, capacity: int, thread_name: str, thread_id: int):
+        self.starts = array("q", bytes(8 * capacity))
+        self.durations = array("q", bytes(8 * capacity))
+        self.names = array("H", bytes(2 * capacity))
+        self.capacity = capacity
+        self.count = 0
+        self.thread_name = thread_name
+        self.thread_id = thread_id
+
+    def push(self, name_id: int, start: int, duration: int):
+        index = self.count % self.capacity
+        self.starts[index] = start
+        self.durations[index] = duration
+        self.names[index] = name_id
+        self.count += 1
+
+    def ordered_indices(self):
+        if self.count <= self.capacity:
+            return range(self.count)
+        first = self.count % self.capacity
+        return [*range(first, self.capacity), *range(first)]
+
+
+class TraceRecorder:
+    """
+    Records begin/end spans from the pipeline threads into preallocated rings
+    and exports them as Chrome trace-event JSON (Perfetto, chrome://tracing).
+    Each thread writes to its own ring, so recording takes no locks; once a ring
+    is full the oldest events are overwritten and memory stays at
+    capacity * EVENT_SIZE bytes per thread.
+    Attributes:
+        capacity (int): Number of events kept per thread.
+        origin (int): perf_counter_ns value that maps to timestamp 0 in the export.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.origin = time.perf_counter_ns()
+        self._local = threading.local()
+        self._rings: List[_TraceRing] = []
+        self._rings_lock = threading.Lock()
+        self._name_ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._gc_start = 0
+
+    def _ring(self) -> _TraceRing:
+        ring = getattr(self._local, "ring", None)
+        if ring is None:
+            # Only taken the first time a thread records, never per event
+            current = threading.current_thread()
+            ring = _TraceRing(self.capacity, current.name, current.ident or 0)
+            with self._rings_lock:
+                self._rings.append(ring)
+            self._local.ring = ring
+        return ring
+
+    def _name_id(self, name: str) -> int:
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            with self._rings_lock:
+                name_id = self._name_ids.setdefault(name, len(self._names))
+                if name_id == len(self._names):
+                    self._names.append(name)
+        return name_id
+
+    def complete(self, name: str, start: int, end: int):
+        """Records a span named name between two perf_counter_ns timestamps."""
+        self._ring().push(self._name_id(name), start, end - start)
+
+    def instant(self, name: str):
+        """Records a zero-length marker at the current time."""
+        self.complete(name, time.perf_counter_ns(), time.perf_counter_ns())
+
+    def trace_gc(self, enable: bool = True):
+        """Adds garbage collector pauses to the trace of whichever thread triggered them."""
+        if enable and self._on_gc not in gc.callbacks:
+            gc.callbacks.append(self._on_gc)
+        elif not enable and self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+
+    def _on_gc(self, phase: str, info: dict):
+        if phase == "start":
+            self._gc_start = time.perf_counter_ns()
+        elif self._gc_start:
+            self.complete(
+                f"gc gen{info.get('generation', 0)}",
+                self._gc_start,
+                time.perf_counter_ns(),
+            )
+            self._gc_start = 0
+
+    def memory_budget(self) -> int:
+        """Returns the bytes currently reserved by all thread rings."""
+        return len(self._rings) * self.capacity * EVENT_SIZE
+
+    def save(self, filepath: Union[Path, str]) -> Path:
+        """Writes all recorded events to filepath as Chrome trace-event JSON."""
+        self.trace_gc(False)
+        filepath = Path(filepath)
+        pid = os.getpid()
+        with open(filepath, "w", encoding="utf-8") as file:
+            file.write('{"displayTimeUnit":"ms","traceEvents":[\n')
+            first = True
+            for ring in list(self._rings):
+                events = [
+                    {
+                        "name": "thread_name",
+                        "ph": "M",
+                        "pid": pid,
+                        "tid": ring.thread_id,
+                        "args": {"name": ring.thread_name},
+                    }
+                ]
+                if ring.count > ring.capacity:
+                    events.append(
+                        {
+                            "name": f"{ring.count - ring.capacity} events overwritten",
+                            "ph": "i",
+                            "s": "t",
+                            "pid": pid,
+                            "tid": ring.thread_id,
+                            "ts": (
+                                ring.starts[ring.count % ring.capacity] - self.origin
+                            )
+                            / 1e3,
+                        }
+                    )
+                for event in events:
+                    file.write(("" if first else ",\n") + json.dumps(event))
+                    first = False
+                for index in ring.ordered_indices():
+                    file.write(
+                        ("" if first else ",\n")
+                        + '{"name":%s,"ph":"X","pid":%d,"tid":%d,"ts":%.3f,"dur":%.3f}'
+                        % (
+                            json.dumps(self._names[ring.names[index]]),
+                            pid,
+                            ring.thread_id,
+                            (ring.starts[index] - self.origin) / 1e3,
+                            ring.durations[index] / 1e3,
+                        )
+                    )
+                    first = False
+            file.write("\n]}\n")
+        print(f"Trace saved to {filepath}")
+        return filepath
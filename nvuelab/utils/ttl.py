@@ -0,0 +1,180 @@
+import threading
+from pathlib import Path
+from typing import Dict, Tuple, Union
+
+import numpy as np
+
+from nvuelab.utils import camera
+from nvuelab.utils.auxiliary_functions import lazy_import
+
+PySpin = lazy_import("PySpin")
+
+# Per-frame line state chunks, in order of preference; the first is sampled at exposure end
+LINE_STATUS_CHUNKS = ("ExposureEndLineStatusAll", "LineStatusAll")
+TTL_DTYPE = np.dtype(
+    [("frame_id", "<u8"), ("timestamp", "<u8"), ("line_status", "<u4")]
+)
+TRIGGER_LINE = 2
+# Seconds between LineStatusAll reads when the camera has no line status chunk
+POLL_INTERVAL = 0.002
+
+
+class TTLRecorder:
+    """
+    Logs the camera I/O line states with every frame into a compact structured array.
+    Line states come from the LineStatusAll chunk when the camera supports it, which is
+    free on the host. Otherwise a background thread reads the LineStatusAll register
+    every poll_interval seconds and each frame takes the latest value, so the grab
+    loop never waits on a register read; those states are only accurate to the poll
+    interval. close() turns off the chunks and chunk mode this recorder enabled.
+    Each record holds the FrameID, the camera timestamp (ns)
+    and the line bitmask (bit n is Line n), so edges and missed triggers can be found
+    after the session with vectorized diffs. Line states are sampled once per frame,
+    so edges are resolved at frame rate: they suit gating/stimulus lines, while the
+    trigger pulses themselves are checked from the frame timestamps (missed_triggers).
+    Attributes:
+        records (np.ndarray): Preallocated TTL_DTYPE records, valid up to count.
+        count (int): Number of frames recorded.
+        source (str): Node the line states are read from.
+        chunked (bool): Whether line states arrive as chunk data with each frame.
+    """
+
+    def __init__(
+        self, cam, capacity: int = 1 << 16, poll_interval: float = POLL_INTERVAL
+    ):
+        self.records = np.zeros(capacity, dtype=TTL_DTYPE)
+        self.count = 0
+        self._cam = cam
+        nodemap = cam.GetNodeMap()
+        chunk_names = ("FrameID", "Timestamp", *LINE_STATUS_CHUNKS)
+        chunk_mode_active = PySpin.CBooleanPtr(nodemap.GetNode("ChunkModeActive"))
+        self._chunk_mode_was_active = (
+            PySpin.IsReadable(chunk_mode_active) and chunk_mode_active.GetValue()
+        )
+        already_enabled = camera.enabled_chunks(cam, chunk_names)
+        enabled = camera.enable_chunks(cam, chunk_names)
+        self._enabled_chunks = [name for name in enabled if name not in already_enabled]
+        chunk = next((name for name in LINE_STATUS_CHUNKS if name in enabled), None)
+        # Decided once; record() never probes for the chunk again
+        self.chunked = chunk is not None
+        self.source = f"Chunk{chunk}" if chunk else "LineStatusAll"
+        self._status = 0
+        self._stop = threading.Event()
+        self._poller = None
+        self._line_status = PySpin.CIntegerPtr(nodemap.GetNode(self.source))
+        if not PySpin.IsReadable(self._line_status):
+            print(f"{self.source} is not readable, line states will be logged as 0")
+            self._line_status = None
+        elif not self.chunked:
+            print(
+                "Line status chunk unavailable, polling LineStatusAll off the grab loop"
+            )
+            self._poller = threading.Thread(
+                target=self._poll, args=(poll_interval,), daemon=True
+            )
+            self._poller.start()
+
+    def _poll(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self._status = self._line_status.GetValue()
+            except PySpin.SpinnakerException:
+                pass  # Camera stopping or gone, keep the last state
+
+    def record(self, image_result):
+        """Appends the FrameID, timestamp and line states of a grabbed frame."""
+        if self.count == len(self.records):
+            self.records = np.resize(self.records, 2 * len(self.records))
+        if self.chunked:
+            status = self._line_status.GetValue()
+        else:
+            status = self._status
+        self.records[self.count] = (
+            image_result.GetFrameID(),
+            image_result.GetTimeStamp(),
+            status,
+        )
+        self.count += 1
+
+    def close(self):
+        """Stops polling and turns off the chunks, and chunk mode, this recorder enabled."""
+        self._stop.set()
+        if self._poller is not None:
+            self._poller.join()
+            self._poller = None
+        camera.disable_chunks(
+            self._cam,
+            self._enabled_chunks,
+            deactivate=not self._chunk_mode_was_active,
+        )
+        self._enabled_chunks = []
+
+    def save(self, filepath: Union[Path, str]) -> Path:
+        """Saves the recorded frames as a .npy structured array."""
+        filepath = Path(filepath)
+        np.save(filepath, self.records[: self.count])
+        print(f"TTL log saved to {filepath}")
+        return filepath
+
+
+def load_ttl_log(filepath: Union[Path, str]) -> np.ndarray:
+    """Loads a TTL log saved by TTLRecorder.save."""
+    return np.load(filepath)
+
+
+def line_edges(
+    records: np.ndarray, line: int = TRIGGER_LINE
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the camera timestamps of the rising and falling edges seen on line."""
+    states = ((records["line_status"] >> line) & 1).astype(np.int8)
+    changes = np.diff(states)
+    timestamps = records["timestamp"][1:]
+    return timestamps[changes == 1], timestamps[changes == -1]
+
+
+def missed_triggers(
+    timestamps: np.ndarray, period: Union[float, None] = None
+) -> np.ndarray:
+    """
+    Returns, for every frame interval, how many frames are missing in it, given the
+    expected trigger period in ns (the median interval by default).
+    """
+    intervals = np.diff(timestamps.astype(np.int64))
+    if intervals.size == 0:
+        return intervals
+    if period is None:
+        period = float(np.median(intervals))
+    return np.maximum(np.rint(intervals / period).astype(np.int64) - 1, 0)
+
+
+def frame_id_gaps(records: np.ndarray) -> int:
+    """Returns the number of FrameIDs skipped between consecutive records."""
+    steps = np.diff(records["frame_id"].astype(np.int64))
+    return int(np.maximum(steps - 1, 0).sum())
+
+
+def summarize(
+    records: np.ndarray, line: int = TRIGGER_LINE, period: Union[float, None] = None
+) -> Dict[str, float]:
+    """Summarizes a TTL log: frames, missed triggers, FrameID gaps and edges on line."""
+    missing = missed_triggers(records["timestamp"], period)
+    rising, falling = line_edges(records, line)
+    intervals = np.diff(records["timestamp"].astype(np.int64))
+    return {
+        "frames": int(records.size),
+        "missed_triggers": int(missing.sum()),
+        "intervals_with_misses": int(np.count_nonzero(missing)),
+        "frame_id_gaps": frame_id_gaps(records),
+        "rising_edges": int(rising.size),
+        "falling_edges": int(falling.size),
+        "median_interval_ms": (
+            float(np.median(intervals)) / 1e6 if intervals.size else 0.0
+        ),
+        "max_interval_ms": float(intervals.max()) / 1e6 if intervals.size else 0.0,
+    }
+
+
+def print_summary(records: np.ndarray, line: int = TRIGGER_LINE):
+    """Prints the TTL log summary to the console."""
+    for key, value in summarize(records, line).items():
+        print(f"{key}: {value}")
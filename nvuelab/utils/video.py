@@ -1,6 +1,20 @@
-from datetime import datetime
-import cv2 as cv
-import PySpin
+import queue
+import shutil
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Sequence, Union
+
+from nvuelab.utils import disk, event_log
+from nvuelab.utils.auxiliary_functions import lazy_import
+from nvuelab.utils.tracing import TraceRecorder
+
+cv = lazy_import("cv2")
+
+# Frames buffered per output before a droppable output starts dropping and others block
+OUTPUT_QUEUE_SIZE = 64
 
 
 def show(img):
@@ -14,3 +28,484 @@ def video_writer_init(filename, fps, frame_width, frame_height):
 
 def save_video(video_writer, img):
     video_writer.write(img)
+
+
+def _span(tracer: Union[TraceRecorder, None], name: str, start: int) -> int:
+    # Records name from start until now when tracing; returns now as the next span's start
+    if tracer is None:
+        return 0
+    now = time.perf_counter_ns()
+    tracer.complete(name, start, now)
+    return now
+
+
+class FragmentedVideoWriter:
+    """
+    Drop-in replacement for cv.VideoWriter that splits a recording into short,
+    self-contained fragments (<stem>_partNNNN<suffix>). Each fragment is finalised
+    when the next one starts and listed in an append-only manifest
+    (<stem>.fragments.jsonl), so a crash loses at most the fragment being written.
+    recover_recording() joins the fragments into one playable file. A rotation
+    thread opens the next fragment ahead of time and finalises full ones, so at a
+    fragment boundary write() only swaps writers and never waits on the codec or
+    on the fsynced manifest.
+    Attributes:
+        frames_written (int): Frames written over all fragments.
+        tracer (TraceRecorder): Optional recorder of the rotation thread's open and
+            finalise spans.
+    """
+
+    def __init__(
+        self,
+        filename,
+        fps,
+        frame_width,
+        frame_height,
+        fragment_seconds=10.0,
+        fourcc="avc1",
+        is_color=False,
+        tracer=None,
+    ):
+        self.path = Path(filename)
+        self.fps = fps
+        self.frame_size = (frame_width, frame_height)
+        self.fourcc = fourcc
+        self.is_color = is_color
+        self.frames_per_fragment = max(1, round(fps * fragment_seconds))
+        self.tracer = tracer
+        self.manifest = event_log.ExperimentLog(manifest_path(self.path), fsync_every=1)
+        self.manifest.log_event(
+            "recording",
+            file=self.path.name,
+            fps=fps,
+            width=frame_width,
+            height=frame_height,
+            fourcc=fourcc,
+            is_color=is_color,
+            fragment_frames=self.frames_per_fragment,
+        )
+        self.index = 0
+        self.frames_written = 0
+        self._fragment_frames = 0
+        self._writer = self._open(0)
+        self._next = None
+        self._next_ready = threading.Event()
+        self._finished = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._rotate, name=f"fragments-{self.path.name}", daemon=True
+        )
+        self._thread.start()
+
+    def _fragment_path(self, index):
+        return self.path.with_name(
+            f"{self.path.stem}_part{index:04d}{self.path.suffix}"
+        )
+
+    def _open(self, index):
+        return cv.VideoWriter(
+            str(self._fragment_path(index)),
+            cv.VideoWriter_fourcc(*self.fourcc),
+            self.fps,
+            self.frame_size,
+            self.is_color,
+        )
+
+    def _finalise(self, writer, index, first_frame, frames):
+        writer.release()
+        self.manifest.log_event(
+            "fragment",
+            file=self._fragment_path(index).name,
+            fourcc=self.fourcc,
+            index=index,
+            first_frame=first_frame,
+            frames=frames,
+        )
+
+    def _rotate(self):
+        index = 1
+        while True:
+            start = time.perf_counter_ns() if self.tracer is not None else 0
+            self._next = self._open(index)
+            _span(self.tracer, "open fragment", start)
+            self._next_ready.set()
+            job = self._finished.get()
+            if job is None:
+                break
+            start = time.perf_counter_ns() if self.tracer is not None else 0
+            self._finalise(*job)
+            _span(self.tracer, "finalise fragment", start)
+            index += 1
+        # The fragment opened ahead was never written to
+        self._next.release()
+        self._next = None
+        self._fragment_path(index).unlink(missing_ok=True)
+
+    def isOpened(self):
+        return self._writer is not None and self._writer.isOpened()
+
+    def write(self, img):
+        if self._fragment_frames >= self.frames_per_fragment:
+            # Only waits if the previous fragment was shorter than opening a file
+            self._next_ready.wait()
+            self._next_ready.clear()
+            full, self._writer = self._writer, self._next
+            self._finished.put(
+                (
+                    full,
+                    self.index,
+                    self.frames_written - self._fragment_frames,
+                    self._fragment_frames,
+                )
+            )
+            self.index += 1
+            self._fragment_frames = 0
+        self._writer.write(img)
+        self._fragment_frames += 1
+        self.frames_written += 1
+
+    def release(self):
+        """Waits for the rotation thread, then finalises the last fragment."""
+        if self._writer is None:
+            return
+        self._finished.put(None)
+        self._thread.join()
+        self._finalise(
+            self._writer,
+            self.index,
+            self.frames_written - self._fragment_frames,
+            self._fragment_frames,
+        )
+        self._writer = None
+        self.manifest.close()
+
+
+def fragmented_writer_init(
+    filename, fps, frame_width, frame_height, fragment_seconds=10.0, tracer=None
+):
+    return FragmentedVideoWriter(
+        filename, fps, frame_width, frame_height, fragment_seconds, tracer=tracer
+    )
+
+
+@dataclass
+class OutputSpec:
+    """
+    One output of a MultiOutputWriter.
+    Attributes:
+        suffix (str): Appended to the recording stem, "" for the main file.
+        extension (str): File extension, None to keep the recording's.
+        width (int): Output width, None to keep the input size.
+        height (int): Output height; with width None, scales the input keeping its aspect ratio.
+        fourcc (str): Codec of this output.
+        every (int): Keeps one frame in every `every`, dividing the output fps.
+        is_color (bool): Writes BGR frames; grayscale input is converted once for all colour outputs.
+        fragment_seconds (float): Writes crash-safe fragments of this length, None for a single file.
+        droppable (bool): Drops frames when its encoder falls behind; False makes write()
+            wait for the encoder instead, so an archive never misses a frame.
+    """
+
+    suffix: str = ""
+    extension: Union[str, None] = None
+    width: Union[int, None] = None
+    height: Union[int, None] = None
+    fourcc: str = "avc1"
+    every: int = 1
+    is_color: bool = False
+    fragment_seconds: Union[float, None] = None
+    droppable: bool = True
+
+
+# Full-resolution lossless archive plus a 480p H.264 proxy at half the frame rate
+ARCHIVE_AND_PROXY = (
+    OutputSpec(extension=".mkv", fourcc="FFV1", droppable=False),
+    OutputSpec(suffix="_proxy", height=480, every=2),
+)
+
+
+class MultiOutputWriter:
+    """
+    Drop-in replacement for cv.VideoWriter that fans every frame out to several
+    outputs in one pass, each with its own size, codec and frame decimation.
+    write() only does the work shared by the outputs (one colour conversion) and
+    hands the frame to one encoder thread per output, so a slow codec neither blocks
+    the caller nor the other outputs. Frames are queued by reference and must not be
+    reused by the caller. A droppable output whose queue is full drops the frame and
+    reports it to on_drop with the output file name and the index of the frame
+    passed to write(); any other output blocks write() until its encoder catches up.
+    Attributes:
+        outputs (list): OutputSpec per output.
+        paths (list): File written by each output.
+        dropped (list): Frames dropped per output because its encoder fell behind.
+        on_drop (callable): Called on the writing thread for every dropped frame, or None.
+        tracer (TraceRecorder): Optional recorder of the resize and encode spans of
+            every encoder thread, passed on to fragmented outputs.
+    """
+
+    def __init__(
+        self,
+        filename,
+        fps,
+        frame_width,
+        frame_height,
+        outputs: Sequence[OutputSpec] = ARCHIVE_AND_PROXY,
+        queue_size: int = OUTPUT_QUEUE_SIZE,
+        on_drop: Union[Callable[[str, int], None], None] = None,
+        tracer: Union[TraceRecorder, None] = None,
+    ):
+        filename = Path(filename)
+        self.outputs = list(outputs)
+        self.paths = []
+        self.dropped = [0] * len(self.outputs)
+        self.on_drop = on_drop
+        self.tracer = tracer
+        self.frames_written = 0
+        self._writers = []
+        self._queues = []
+        self._threads = []
+        for index, spec in enumerate(self.outputs):
+            path = filename.with_name(
+                f"{filename.stem}{spec.suffix}{spec.extension or filename.suffix}"
+            )
+            size = _output_size(spec, frame_width, frame_height)
+            output_fps = fps / max(1, spec.every)
+            if spec.fragment_seconds:
+                writer = FragmentedVideoWriter(
+                    path,
+                    output_fps,
+                    *size,
+                    spec.fragment_seconds,
+                    spec.fourcc,
+                    spec.is_color,
+                    tracer,
+                )
+            else:
+                writer = cv.VideoWriter(
+                    str(path),
+                    cv.VideoWriter_fourcc(*spec.fourcc),
+                    output_fps,
+                    size,
+                    spec.is_color,
+                )
+            if not writer.isOpened():
+                print(f"Could not open {spec.fourcc} writer for {path}")
+            frames = queue.Queue(maxsize=queue_size)
+            thread = threading.Thread(
+                target=self._encode,
+                args=(writer, frames, size),
+                name=f"encoder-{path.name}",
+                daemon=True,
+            )
+            thread.start()
+            self.paths.append(path)
+            self._writers.append(writer)
+            self._queues.append(frames)
+            self._threads.append(thread)
+
+    def _encode(self, writer, frames, size):
+        while True:
+            img = frames.get()
+            if img is None:
+                break
+            start = time.perf_counter_ns() if self.tracer is not None else 0
+            if (img.shape[1], img.shape[0]) != size:
+                img = cv.resize(img, size, interpolation=cv.INTER_AREA)
+                start = _span(self.tracer, "resize", start)
+            writer.write(img)
+            _span(self.tracer, "encode", start)
+        writer.release()
+
+    @property
+    def backlog(self) -> int:
+        """Frames queued for encoding over all outputs."""
+        return sum(frames.qsize() for frames in self._queues)
+
+    @property
+    def frames_dropped(self) -> int:
+        return sum(self.dropped)
+
+    def isOpened(self):
+        return all(writer.isOpened() for writer in self._writers)
+
+    def write(self, img):
+        color = None
+        for index, spec in enumerate(self.outputs):
+            if self.frames_written % max(1, spec.every):
+                continue
+            frame = img
+            if spec.is_color and img.ndim == 2:
+                if color is None:
+                    color = cv.cvtColor(img, cv.COLOR_GRAY2BGR)
+                frame = color
+            elif not spec.is_color and img.ndim == 3:
+                if color is None:
+                    color = cv.cvtColor(img, cv.COLOR_BGR2GRAY)
+                frame = color
+            if not spec.droppable:
+                self._queues[index].put(frame)
+                continue
+            try:
+                self._queues[index].put_nowait(frame)
+            except queue.Full:
+                self.dropped[index] += 1
+                if self.on_drop is not None:
+                    self.on_drop(self.paths[index].name, self.frames_written)
+        self.frames_written += 1
+
+    def release(self):
+        """Waits for every output to encode its queued frames, then closes the files."""
+        for frames in self._queues:
+            frames.put(None)
+        for thread in self._threads:
+            thread.join()
+        for path, dropped in zip(self.paths, self.dropped):
+            if dropped:
+                print(
+                    f"{path.name}: {dropped} frames dropped, encoder could not keep up"
+                )
+
+
+def _output_size(spec: OutputSpec, frame_width: int, frame_height: int):
+    if spec.width and spec.height:
+        return spec.width, spec.height
+    if spec.height:
+        # Even dimensions, which most codecs require
+        return 2 * round(frame_width * spec.height / frame_height / 2), spec.height
+    if spec.width:
+        return spec.width, 2 * round(frame_height * spec.width / frame_width / 2)
+    return frame_width, frame_height
+
+
+def estimate_bytes_per_second(
+    frame_width: int,
+    frame_height: int,
+    fps: float,
+    outputs: Sequence[OutputSpec] = (OutputSpec(),),
+) -> float:
+    """Estimates the data rate all outputs write to disk together, each at its own size, rate and codec."""
+    total = 0.0
+    for spec in outputs:
+        width, height = _output_size(spec, frame_width, frame_height)
+        total += disk.estimate_bytes_per_second(
+            width, height, fps / max(1, spec.every), fourcc=spec.fourcc
+        )
+    return total
+
+
+def multi_output_writer_init(
+    filename,
+    fps,
+    frame_width,
+    frame_height,
+    outputs: List[OutputSpec] = ARCHIVE_AND_PROXY,
+    on_drop: Union[Callable[[str, int], None], None] = None,
+    tracer: Union[TraceRecorder, None] = None,
+):
+    return MultiOutputWriter(
+        filename,
+        fps,
+        frame_width,
+        frame_height,
+        outputs,
+        on_drop=on_drop,
+        tracer=tracer,
+    )
+
+
+def manifest_path(filename):
+    filename = Path(filename)
+    return filename.with_name(f"{filename.stem}.fragments.jsonl")
+
+
+def find_fragments(filename):
+    """Returns the recording header and fragment files in order, from the manifest or, without one, from the file names."""
+    filename = Path(filename)
+    header = {}
+    listed = []
+    manifest = manifest_path(filename)
+    if manifest.exists():
+        for record in event_log.read_events(manifest):
+            if record.get("type") == "recording":
+                header = record
+            elif record.get("type") == "fragment":
+                listed.append(filename.with_name(record["file"]))
+    # The fragment open at the time of a crash is on disk but not in the manifest
+    on_disk = sorted(filename.parent.glob(f"{filename.stem}_part*{filename.suffix}"))
+    listed_names = {path.name for path in listed}
+    return header, listed + [path for path in on_disk if path.name not in listed_names]
+
+
+def recover_recording(filename, output=None):
+    """
+    Joins the readable fragments of a fragmented recording into one file, in a single
+    pass over the data. Uses ffmpeg stream copy when it is on PATH, otherwise decodes
+    and re-encodes with OpenCV. The output defaults to <stem>_recovered with the
+    recording's own container suffix, so an FFV1 .mkv stays .mkv. Returns the output
+    path, or None if nothing was readable.
+    """
+    filename = Path(filename)
+    output = (
+        Path(output)
+        if output
+        else filename.with_name(f"{filename.stem}_recovered{filename.suffix or '.mp4'}")
+    )
+    header, fragments = find_fragments(filename)
+
+    readable = []
+    for fragment in fragments:
+        capture = cv.VideoCapture(str(fragment))
+        ok = capture.isOpened() and capture.read()[0]
+        capture.release()
+        if ok:
+            readable.append(fragment)
+        else:
+            print(f"Skipping unreadable fragment {fragment.name}")
+    if not readable:
+        print(f"No readable fragments found for {filename}")
+        return None
+
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg:
+        concat_list = output.with_suffix(".concat.txt")
+        concat_list.write_text(
+            "".join(
+                f"file '{fragment.resolve().as_posix()}'\n" for fragment in readable
+            ),
+            encoding="utf-8",
+        )
+        command = [ffmpeg, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0"]
+        command += ["-i", str(concat_list), "-c", "copy", str(output)]
+        completed = subprocess.run(command)
+        concat_list.unlink()
+        if completed.returncode == 0:
+            print(f"Recovered {len(readable)} fragments into {output}")
+            return output
+        print("ffmpeg concat failed, re-encoding with OpenCV")
+
+    writer = None
+    frames = 0
+    is_color = header.get("is_color", False)
+    for fragment in readable:
+        capture = cv.VideoCapture(str(fragment))
+        while True:
+            ok, img = capture.read()
+            if not ok:
+                break
+            if not is_color:
+                img = cv.cvtColor(img, cv.COLOR_BGR2GRAY)
+            if writer is None:
+                writer = cv.VideoWriter(
+                    str(output),
+                    cv.VideoWriter_fourcc(*header.get("fourcc", "avc1")),
+                    header.get("fps") or capture.get(cv.CAP_PROP_FPS) or 30,
+                    (img.shape[1], img.shape[0]),
+                    is_color,
+                )
+            writer.write(img)
+            frames += 1
+        capture.release()
+    if writer is None:
+        print(f"No frames could be decoded for {filename}")
+        return None
+    writer.release()
+    print(f"Recovered {frames} frames from {len(readable)} fragments into {output}")
+    return output
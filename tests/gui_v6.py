@@ -1,4 +1,5 @@
 # %%
+import dataclasses
 import os
 import time
 from pathlib import Path
@@ -8,7 +9,25 @@ from tkinter import filedialog, messagebox, simpledialog, Label, Button
 import threading
 from queue import Queue
 import PySpin
-from nvuelab.utils import camera, video
+from nvuelab.utils import (
+    camera,
+    video,
+    telemetry,
+    instrumentation,
+    tracing,
+    protocol,
+    ttl,
+    disk,
+    motion,
+    decimation,
+    sequencer,
+    latency,
+    configuration,
+    clocks,
+    event_log,
+    discovery,
+    spinnaker_log,
+)
 from PIL import Image, ImageTk
 import cv2 as cv
 
@@ -18,11 +37,38 @@ cam = None
 acquisition_thread = None
 idle_event = threading.Event()  # Use Event for thread synchronization
 image_queue = Queue()  # Queue for thread-safe GUI updates
+# Calls from worker threads, run on the Tk thread by poll_gui_events
+gui_events = Queue()
+camera_commands = Queue()  # Camera changes the grab loop applies between frames
+closing = False
 video_label = None
 video_writer = None
 FRAME_HEIGHT = 0
 FRAME_WIDTH = 0
 save_video_path = ""
+protocol_runner = None
+ttl_recorder = None
+disk_monitor = None
+decimator = None  # Host-side time-lapse decimation, None records every frame
+# Decimation moved onto the camera, its frame rate restored on stop
+camera_decimator = None
+host_lut = None  # Lookup table applied per frame when the camera has no LUT
+# Exposure/gain sequence loaded from TOML, None for a fixed exposure
+sequence_states = None
+sequence_tagger = None
+latency_recorder = None
+camera_profile = None  # Validated settings of the loaded camera profile
+camera_discovery = None  # Serial -> camera cache kept current by hot-plug events
+discovery_changes = -1
+spinnaker_logger = None  # Routes Spinnaker's log into the session log while recording
+SPINNAKER_LOG_LEVEL = "warn"  # "debug" for support cases; never blocks acquisition
+preview_every = 1  # Raised by the disk monitor to shed preview work
+DEGRADED_EVERY = 2  # Under disk pressure only one frame in DEGRADED_EVERY is recorded
+# GPIO the internal clock is mirrored on for other cameras/DAQ
+CLOCK_OUTPUT_LINE = "Line1"
+pipeline_stats = telemetry.PipelineTelemetry()
+pipeline_stats.watch_queue("preview", image_queue)
+stage_profiler = instrumentation.StageProfiler()  # Disabled until toggled in the GUI
 
 
 def choose_directory():
@@ -43,46 +89,110 @@ def save_video():
     if video_writer is None:
         timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
         video_filename = os.path.join(save_video_path, f"video_{timestamp}.mp4")
-        video_writer = video.video_writer_init(
-            video_filename, 20, FRAME_WIDTH, FRAME_HEIGHT
-        )
+        if sequence_tagger is not None:
+            # One video per sequencer state, demultiplexed by the set each frame was taken with
+            video_writer = sequencer.SequencerDemuxWriter(
+                video_filename, 20, FRAME_WIDTH, FRAME_HEIGHT, sequence_states
+            )
+            pipeline_stats.watch_writer(video_writer)
+            return
+        if proxy_var.get():
+            # Lossless archive plus a 480p proxy, each encoded on its own thread
+            outputs = video.ARCHIVE_AND_PROXY
+            if fragments_var.get():
+                outputs = [
+                    dataclasses.replace(spec, fragment_seconds=10.0) for spec in outputs
+                ]
+            video_writer = video.multi_output_writer_init(
+                video_filename,
+                20,
+                FRAME_WIDTH,
+                FRAME_HEIGHT,
+                outputs,
+                log_dropped_frame,
+                stage_profiler.tracer,
+            )
+        elif fragments_var.get():
+            # Survives a crash; rebuild with `nvuelab recover <video_filename>`
+            video_writer = video.fragmented_writer_init(
+                video_filename,
+                20,
+                FRAME_WIDTH,
+                FRAME_HEIGHT,
+                tracer=stage_profiler.tracer,
+            )
+        else:
+            video_writer = video.video_writer_init(
+                video_filename, 20, FRAME_WIDTH, FRAME_HEIGHT
+            )
+        pipeline_stats.watch_writer(video_writer)
+        if motion_var.get():
+            # Only frames around motion reach the file; every decision goes to <stem>.gate.npy
+            video_writer = motion.MotionGatedWriter(video_writer, video_filename)
+
+
+def log_dropped_frame(output, frame):
+    # Runs on the grab thread while it writes the frame, so last_frame_id is its FrameID
+    event_log.get_log(
+        clocks.resolve_log_path(Path(save_video_path) / "experiment-times.toml")
+    ).log_event(
+        "frame_dropped",
+        output=output,
+        frame=frame,
+        frame_id=pipeline_stats.last_frame_id,
+    )
 
 
 def init_camera():
     global system, cam, video_label, video_writer, FRAME_HEIGHT, FRAME_WIDTH, save_video_path
     try:
-        system = PySpin.System.GetInstance()
-        cam_list = system.GetCameras()
-        num_cameras = cam_list.GetSize()
-
-        if num_cameras == 0:
+        # Enumeration runs in the background from startup; selection reads its cache
+        if not camera_discovery.ready:
+            messagebox.showinfo("Please wait", "Still searching for cameras.")
+            return
+        models = camera_discovery.describe()
+        if not models:
             messagebox.showerror("Error", "No cameras detected.")
             return
-        elif num_cameras > 1:
-            index = simpledialog.askinteger(
+        elif len(models) > 1:
+            serial = simpledialog.askstring(
                 "Select Camera",
-                "Multiple cameras detected. Enter the camera index to use (0 to {}):".format(
-                    num_cameras - 1
-                ),
-                minvalue=0,
-                maxvalue=num_cameras - 1,
+                "Multiple cameras detected. Enter the serial number to use:\n"
+                + "\n".join(f"{serial}: {model}" for serial, model in models.items()),
+                initialvalue=next(iter(models)),
             )
-            if index is None:  # User cancelled the dialog
+            if serial is None:  # User cancelled the dialog
                 print("Camera selection cancelled.")
                 return
         else:
-            index = 0
+            serial = next(iter(models))
 
-        cam = cam_list.GetByIndex(index)
+        cam = camera_discovery.get(serial.strip())
+        if cam is None:
+            messagebox.showerror("Error", f"Camera {serial} is not connected.")
+            return
+        system = camera_discovery.system
         cam.Init()
+        pipeline_stats.watch_camera(cam)
 
         display_first_frame()
-        camera.configure_trigger(cam, "hardware")
+        # One UserSetLoad when this configuration was saved before, node by node otherwise
+        configuration.restore_configuration(
+            cam,
+            {
+                "trigger": "internal" if internal_clock_var.get() else "hardware",
+                "fps": 20,
+                "output_line": CLOCK_OUTPUT_LINE,
+            },
+            lambda _: toggle_internal_clock(),
+        )
 
         save_video_path = Path.home()
         directory_label.config(text=f"Save Directory: {save_video_path}")
 
         record_button.config(state=tk.NORMAL)
+        protocol_button.config(state=tk.NORMAL)
+        profile_button.config(state=tk.NORMAL)
     except Exception as e:
         messagebox.showerror(
             "Initialization Error",
@@ -108,32 +218,76 @@ def display_first_frame():
             video_label.image = photo
 
 
+def process_frame(image_data, timestamp, sequence_set, stage_start=0):
+    # Everything after the pixels are available, shared by grabbed and flushed frames
+    if host_lut is not None:
+        image_data = host_lut(image_data)
+    stage_start = stage_profiler.lap("ndarray", stage_start)
+    resized_image = cv.resize(image_data, (FRAME_WIDTH, FRAME_HEIGHT))
+    stage_start = stage_profiler.lap("resize", stage_start)
+    if pipeline_stats.frames_grabbed % preview_every == 0:
+        image_queue.put(resized_image)
+    stage_start = stage_profiler.lap("queue", stage_start)
+    if video_writer is not None:
+        write_start = time.perf_counter()
+        if sequence_tagger is not None:
+            video_writer.write(resized_image, sequence_set)
+        elif isinstance(video_writer, motion.MotionGatedWriter):
+            video_writer.write(resized_image, timestamp)
+        else:
+            video.save_video(video_writer, resized_image)
+        pipeline_stats.record_write(time.perf_counter() - write_start)
+        stage_profiler.lap("write", stage_start)
+
+
 def camera_acquisition():
     global system, cam, video_writer
     image_result = (
         None  # Initialize to None to ensure it's defined for the finally block
     )
+    timestamp = 0
+    sequence_set = 0
 
     while not idle_event.is_set():
         try:
+            run_camera_commands()
             if cam.IsStreaming():
+                stage_start = stage_profiler.now()
+                grab_start_ns = time.perf_counter_ns()
                 image_result = cam.GetNextImage(5000)  # Adjust timeout as needed
+                grab_end_ns = time.perf_counter_ns()
+                stage_start = stage_profiler.lap("grab", stage_start)
                 if image_result.IsIncomplete():
-                    print(
-                        "Image incomplete with image status",
-                        image_result.GetImageStatus(),
-                    )
+                    pipeline_stats.record_incomplete(image_result.GetFrameID())
                 else:
+                    pipeline_stats.record_grab(image_result.GetFrameID())
+                    timestamp = image_result.GetTimeStamp()
+                    if sequence_tagger is not None:
+                        sequence_set = sequence_tagger.active_set()
+                    if latency_recorder is not None:
+                        latency_recorder.record_frame(
+                            image_result.GetFrameID(),
+                            image_result.GetTimeStamp(),
+                            grab_start_ns,
+                            grab_end_ns,
+                        )
+                    if ttl_recorder is not None:
+                        ttl_recorder.record(image_result)
+                    # Decimated frames are dropped before any pixel work
+                    if decimator is not None and not decimator.keep(timestamp):
+                        continue
                     image_data = image_result.GetNDArray()
-                    resized_image = cv.resize(image_data, (FRAME_WIDTH, FRAME_HEIGHT))
-                    image_queue.put(resized_image)
-                    if video_writer is not None:
-                        video.save_video(video_writer, resized_image)
+                    if decimator is not None:
+                        image_data = decimator.select(image_data, timestamp)
+                        if image_data is None:
+                            continue
+                    process_frame(image_data, timestamp, sequence_set, stage_start)
             else:
                 break  # Exit loop if the camera stops streaming
 
         except PySpin.SpinnakerException as ex:
             # Handle specific timeout exception or general failure
+            pipeline_stats.record_grab_error()
             print(f"Failed to get next image: {ex}")
             # Decide on specific actions here, like attempting to reconnect, logging, or breaking the loop
 
@@ -142,6 +296,12 @@ def camera_acquisition():
             if image_result is not None and image_result.IsValid():
                 image_result.Release()
 
+    if decimator is not None:
+        # Sharpest frame of the last, unfinished window, written like any other
+        last_image = decimator.flush()
+        if last_image is not None:
+            process_frame(last_image, timestamp, sequence_set)
+
     if cam is not None:
         cam.EndAcquisition()
 
@@ -158,27 +318,335 @@ def update_gui():
         root.after(1, update_gui)
 
 
+def update_status():
+    # Telemetry is sampled from the GUI thread so the grab loop never pays for it
+    try:
+        if not idle_event.is_set():
+            status_label.config(text=pipeline_stats.snapshot().format_status())
+            if disk_monitor is not None:
+                disk_label.config(text=disk_monitor.status.format_status())
+        update_camera_list()
+    finally:
+        root.after(1000, update_status)
+
+
+def update_camera_list():
+    global discovery_changes
+    # Only re-read the cache after a hot-plug event changed it
+    if not camera_discovery.ready or camera_discovery.changes == discovery_changes:
+        return
+    discovery_changes = camera_discovery.changes
+    serials = camera_discovery.serials()
+    cameras_label.config(
+        text=f"Cameras: {', '.join(serials)}" if serials else "No cameras connected"
+    )
+
+
+def poll_gui_events():
+    # Tk may only be called from its own thread, so worker threads queue calls here
+    try:
+        while not gui_events.empty():
+            call = gui_events.get_nowait()
+            if not (closing and call is start_recording_thread):
+                call()
+    finally:
+        root.after(50, poll_gui_events)
+
+
+def protocol_start_recording(action):
+    # Runs on the protocol thread; the GUI thread does the actual work
+    if idle_event.is_set():
+        gui_events.put(start_recording_thread)
+
+
+def protocol_stop_recording(action):
+    if not idle_event.is_set():
+        gui_events.put(stop_recording)
+
+
+def protocol_set_trigger(action):
+    # The trigger is changed from the GUI thread or between frames, never mid-grab
+    gui_events.put(lambda: change_camera(lambda: apply_trigger(action)))
+
+
+def apply_trigger(action):
+    if action.get("mode") == "internal":
+        camera.configure_internal_clock(
+            cam,
+            action.get("fps", 20),
+            action.get("duty", 0.5),
+            action.get("output_line", CLOCK_OUTPUT_LINE),
+        )
+    else:
+        camera.configure_trigger(cam, action.get("mode", "hardware"))
+
+
+def change_camera(change):
+    # While recording, the grab loop runs the change so it never races GetNextImage
+    if idle_event.is_set():
+        change()
+    else:
+        camera_commands.put(change)
+
+
+def run_camera_commands():
+    # Trigger nodes are locked while streaming, so acquisition pauses around each change
+    while not camera_commands.empty():
+        change = camera_commands.get_nowait()
+        streaming = cam.IsStreaming()
+        if streaming:
+            cam.EndAcquisition()
+        try:
+            change()
+        finally:
+            if streaming:
+                cam.BeginAcquisition()
+
+
+def run_protocol():
+    global protocol_runner
+    if protocol_runner is not None and protocol_runner.is_running():
+        messagebox.showerror("Error", "A protocol is already running.")
+        return
+    protocol_file = filedialog.askopenfilename(
+        title="Select Protocol", filetypes=[("Protocol", "*.toml")]
+    )
+    if not protocol_file:
+        return
+    try:
+        schedule = protocol.load_protocol(protocol_file)
+    except (ValueError, OSError) as e:
+        messagebox.showerror("Protocol Error", f"Could not load protocol: {e}")
+        return
+    protocol_runner = protocol.ProtocolRunner(
+        schedule,
+        {
+            "start_recording": protocol_start_recording,
+            "stop_recording": protocol_stop_recording,
+            "set_trigger": protocol_set_trigger,
+        },
+        log_path=Path(save_video_path) / "experiment-times.toml",
+    )
+    protocol_runner.start()
+
+
+def load_exposure_sequence():
+    global sequence_states
+    sequence_file = filedialog.askopenfilename(
+        title="Select Exposure Sequence", filetypes=[("Sequence", "*.toml")]
+    )
+    if not sequence_file:
+        sequence_states = None
+        sequence_label.config(text="Fixed exposure")
+        return
+    try:
+        sequence_states = sequencer.load_sequence(sequence_file)
+    except (ValueError, OSError) as e:
+        messagebox.showerror("Sequence Error", f"Could not load sequence: {e}")
+        return
+    sequence_label.config(
+        text="Sequence: " + " / ".join(state.name for state in sequence_states)
+    )
+
+
+def load_camera_profile():
+    global camera_profile
+    # Applying restarts acquisition, which would pull the stream from the writer
+    if not idle_event.is_set():
+        messagebox.showerror("Error", "Stop the recording before loading a profile.")
+        return
+    profile_file = filedialog.askopenfilename(
+        title="Select Camera Profile", filetypes=[("Camera profile", "*.toml")]
+    )
+    if not profile_file:
+        return
+    _, serial_number = camera.get_camera_info(cam)
+    try:
+        # Everything is validated before the first node is written
+        settings = configuration.validate_profile(
+            cam, configuration.load_profile(profile_file, serial_number)
+        )
+    except (ValueError, OSError) as e:
+        messagebox.showerror("Profile Error", str(e))
+        return
+    camera.restart_camera(cam)
+    mismatches = configuration.profile_mismatches(
+        configuration.apply_profile(cam, settings)
+    )
+    if mismatches:
+        messagebox.showwarning(
+            "Camera Profile",
+            "Applied values differ from the profile:\n"
+            + "\n".join(
+                f"{name}: requested {values['requested']}, applied {values['applied']}"
+                for name, values in mismatches.items()
+            ),
+        )
+    camera_profile = settings
+    profile_label.config(text=f"Profile: {Path(profile_file).name}")
+
+
+def toggle_internal_clock():
+    # The camera clocks its own frames, no external TTL generator or software trigger needed
+    if cam is None:
+        return
+    if internal_clock_var.get():
+        clock = camera.configure_internal_clock(cam, 20, output_line=CLOCK_OUTPUT_LINE)
+        if clock is None:
+            messagebox.showerror(
+                "Error", "This camera cannot generate its own trigger."
+            )
+            internal_clock_var.set(False)
+            camera.configure_trigger(cam, "hardware")
+    else:
+        camera.configure_trigger(cam, "hardware")
+
+
+def toggle_profiling():
+    stage_profiler.enabled = profile_var.get()
+
+
+def degrade_preview():
+    global preview_every
+    preview_every = 5
+
+
+def degrade_frame_rate():
+    global decimator
+    # Fewer frames is the only lever that lowers bytes written with one codec per file
+    if decimator is not None:
+        print("Capture is already decimated, recorded frame rate left unchanged")
+        return
+    decimator = decimation.Decimator("every", every=DEGRADED_EVERY)
+    event_log.get_log(
+        clocks.resolve_log_path(Path(save_video_path) / "experiment-times.toml")
+    ).log_event(
+        "degrade",
+        step="recorded frame rate",
+        every=DEGRADED_EVERY,
+        from_frame=pipeline_stats.frames_grabbed,
+    )
+
+
+def recording_outputs():
+    # Every stream save_video writes; a sequencer splits one stream across its files
+    if sequence_states is None and proxy_var.get():
+        return video.ARCHIVE_AND_PROXY
+    return (video.OutputSpec(),)
+
+
+def check_disk_space():
+    # Projected size of the session: the running protocol if any, otherwise an hour
+    session_seconds = disk.DEFAULT_SESSION_SECONDS
+    if protocol_runner is not None and protocol_runner.is_running():
+        session_seconds = protocol_runner.protocol.total_seconds
+    fits, refuse, message = disk.check_capacity(
+        save_video_path,
+        video.estimate_bytes_per_second(
+            FRAME_WIDTH, FRAME_HEIGHT, 20, recording_outputs()
+        ),
+        session_seconds,
+    )
+    if refuse:
+        messagebox.showerror("Disk Full", message)
+        return False
+    if not fits:
+        return messagebox.askyesno("Low Disk Space", f"{message}\n\nRecord anyway?")
+    return True
+
+
 def start_recording_thread():
-    global system, cam, acquisition_thread, video_writer
+    global system, cam, acquisition_thread, video_writer, ttl_recorder, disk_monitor, preview_every, decimator, camera_decimator, host_lut, sequence_tagger, latency_recorder, spinnaker_logger
     if not idle_event.is_set():
         messagebox.showerror("Error", "Camera is already streaming.")
         return
+    if not check_disk_space():
+        return
+    decimator = None
+    if decimation_var.get() != "all":
+        try:
+            amount = float(decimation_amount_entry.get())
+            decimator = decimation.Decimator(
+                decimation_var.get(), every=max(1, round(amount)), window_seconds=amount
+            )
+        except ValueError as e:
+            messagebox.showerror("Decimation Error", str(e))
+            return
+    try:
+        gamma = float(gamma_entry.get())
+        lut = camera.make_lut(gamma=gamma)
+    except ValueError:
+        messagebox.showerror("Gamma Error", "Gamma must be a positive number.")
+        return
     if acquisition_thread is not None:
         acquisition_thread.join()
     idle_event.clear()
     camera.restart_camera(cam)
+    # The sequencer is the only setup that can be rejected, so it goes before any
+    # other camera change and a rejected sequence leaves nothing to undo
+    sequence_tagger = None
+    if sequence_states is not None:
+        if not sequencer.configure_sequencer(cam, sequence_states):
+            messagebox.showerror("Sequence Error", "The camera rejected the sequence.")
+            idle_event.set()
+            return
+        sequence_tagger = sequencer.SequencerTagger(cam, len(sequence_states))
+    pipeline_stats.reset()
+    stage_profiler.reset()
+    ttl_recorder = ttl.TTLRecorder(cam) if ttl_var.get() else None
+    latency_recorder = (
+        latency.ExposureLatencyRecorder(cam) if latency_var.get() else None
+    )
+    if decimator is not None and decimation.configure_on_camera(cam, decimator):
+        # The camera only sends the frames to keep
+        camera_decimator, decimator = decimator, None
+    if gamma == 1.0:
+        camera.disable_lookup_table(cam)
+        host_lut = None
+    else:
+        # On-camera LUT when available, otherwise host_lut is applied per frame
+        host_lut = camera.configure_lookup_table(cam, lut)
+    if trace_var.get():
+        stage_profiler.tracer = tracing.TraceRecorder()
+        stage_profiler.tracer.trace_gc()
+    session_log = event_log.get_log(
+        clocks.resolve_log_path(Path(save_video_path) / "experiment-times.toml")
+    )
+    if camera_profile is not None:
+        # Requested vs applied camera settings, stored with the session
+        session_log.log_event(
+            "camera_profile", settings=configuration.profile_report(camera_profile)
+        )
+    spinnaker_logger = spinnaker_log.SpinnakerLogRouter(
+        system, session_log, SPINNAKER_LOG_LEVEL
+    )
+    pipeline_stats.snapshot()  # Sets the reference point for the first fps reading
     cam.BeginAcquisition()
     save_video()
+    preview_every = 1
+    disk_monitor = disk.DiskMonitor(
+        save_video_path,
+        pipeline_stats,
+        [
+            ("lower preview rate", degrade_preview),
+            ("lower recorded frame rate", degrade_frame_rate),
+        ],
+    )
+    disk_monitor.start()
     acquisition_thread = threading.Thread(target=camera_acquisition)
     acquisition_thread.start()
     record_button.config(state=tk.DISABLED)
     stop_button.config(state=tk.NORMAL)
+    profile_button.config(state=tk.DISABLED)
 
 
 def stop_recording():
     # Signal the acquisition loop to stop
-    global system, cam, acquisition_thread, video_writer
+    global system, cam, acquisition_thread, video_writer, ttl_recorder, disk_monitor, sequence_tagger, latency_recorder, spinnaker_logger, camera_decimator
     idle_event.set()
+    if disk_monitor is not None:
+        disk_monitor.stop()
+        disk_monitor = None
 
     # Wait for the acquisition thread to finish
     if acquisition_thread is not None:
@@ -187,21 +655,61 @@ def stop_recording():
     # Check if the camera is still acquiring images and stop it
     if cam is not None and cam.IsStreaming():
         cam.EndAcquisition()
+    # Changes queued after the grab loop's last frame
+    run_camera_commands()
 
     # Release the video writer if it's being used
     if video_writer is not None:
         video_writer.release()
         video_writer = None
+    if sequence_tagger is not None:
+        sequence_tagger.close()
+        sequencer.disable_sequencer(cam)
+        sequence_tagger = None
+    if camera_decimator is not None:
+        decimation.restore_on_camera(cam, camera_decimator)
+        camera_decimator = None
+    if spinnaker_logger is not None:
+        spinnaker_logger.close()
+        spinnaker_logger = None
 
     # Reset UI elements (e.g., disable the stop button and enable the start button)
     record_button.config(state=tk.NORMAL)
     stop_button.config(state=tk.DISABLED)
-
+    profile_button.config(state=tk.NORMAL)
+
+    status_label.config(text=pipeline_stats.snapshot().format_status())
+    stage_profiler.print_report()
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    if ttl_recorder is not None:
+        ttl_recorder.close()
+        ttl_recorder.save(Path(save_video_path) / f"ttl_{timestamp}.npy")
+        ttl.print_summary(ttl_recorder.records[: ttl_recorder.count])
+        ttl_recorder = None
+    if latency_recorder is not None:
+        latency_recorder.close()
+        latency_recorder.print_report()
+        latency_recorder.save(Path(save_video_path) / f"latency_{timestamp}.npz")
+        latency_recorder = None
+    if stage_profiler.tracer is not None:
+        stage_profiler.tracer.save(Path(save_video_path) / f"trace_{timestamp}.json")
+        stage_profiler.tracer = None
     print("Acquisition stopped and resources released.")
 
 
 def on_close():
-    global system, cam, acquisition_thread, video_writer
+    global system, cam, acquisition_thread, video_writer, closing
+    closing = True
+    if protocol_runner is not None and protocol_runner.is_running():
+        # Joining here would block the calls the protocol thread queued for Tk;
+        # poll until it has run its last on_end actions instead
+        protocol_runner.stop()
+        root.after(50, on_close)
+        return
+    if disk_monitor is not None:
+        disk_monitor.stop()
+    if spinnaker_logger is not None:
+        spinnaker_logger.close()
     idle_event.set()
     if acquisition_thread is not None:
         acquisition_thread.join()
@@ -210,8 +718,17 @@ def on_close():
     if cam is not None:
         if cam.IsStreaming():
             cam.EndAcquisition()
+        if camera_decimator is not None:
+            decimation.restore_on_camera(cam, camera_decimator)
+        if sequence_tagger is not None:
+            sequence_tagger.close()
+            sequencer.disable_sequencer(cam)
+        if ttl_recorder is not None:
+            ttl_recorder.close()
         cam.DeInit()
         del cam
+    # The cached cameras must be released before the system
+    camera_discovery.close()
     if system is not None:
         system.ReleaseInstance()
         del system
@@ -226,6 +743,8 @@ root.geometry("800x600")
 # Initialize GUI components
 init_button = Button(root, text="Initialize Camera", command=init_camera)
 init_button.pack()
+cameras_label = Label(root, text="Searching for cameras...")
+cameras_label.pack()
 choose_button = Button(root, text="Choose Directory", command=choose_directory)
 choose_button.pack()
 directory_label = Label(root, text="No directory selected")
@@ -238,11 +757,91 @@ stop_button = Button(
     root, text="Stop Streaming", state=tk.DISABLED, command=stop_recording
 )
 stop_button.pack()
+protocol_button = Button(
+    root, text="Run Protocol", state=tk.DISABLED, command=run_protocol
+)
+protocol_button.pack()
+profile_button = Button(
+    root, text="Load Camera Profile", state=tk.DISABLED, command=load_camera_profile
+)
+profile_button.pack()
+profile_label = Label(root, text="No camera profile")
+profile_label.pack()
+internal_clock_var = tk.BooleanVar(value=False)
+internal_clock_check = tk.Checkbutton(
+    root,
+    text="Camera-generated trigger (20 fps)",
+    variable=internal_clock_var,
+    command=toggle_internal_clock,
+)
+internal_clock_check.pack()
+profile_var = tk.BooleanVar(value=False)
+profile_check = tk.Checkbutton(
+    root, text="Profile pipeline stages", variable=profile_var, command=toggle_profiling
+)
+profile_check.pack()
+trace_var = tk.BooleanVar(value=False)
+trace_check = tk.Checkbutton(root, text="Record trace timeline", variable=trace_var)
+trace_check.pack()
+ttl_var = tk.BooleanVar(value=False)
+ttl_check = tk.Checkbutton(root, text="Log TTL line states", variable=ttl_var)
+ttl_check.pack()
+latency_var = tk.BooleanVar(value=False)
+latency_check = tk.Checkbutton(
+    root, text="Measure exposure-to-host latency", variable=latency_var
+)
+latency_check.pack()
+fragments_var = tk.BooleanVar(value=False)
+fragments_check = tk.Checkbutton(
+    root, text="Crash-safe recording (fragments)", variable=fragments_var
+)
+fragments_check.pack()
+proxy_var = tk.BooleanVar(value=False)
+proxy_check = tk.Checkbutton(
+    root, text="Lossless archive + 480p proxy", variable=proxy_var
+)
+proxy_check.pack()
+motion_var = tk.BooleanVar(value=False)
+motion_check = tk.Checkbutton(
+    root, text="Record only during motion", variable=motion_var
+)
+motion_check.pack()
+decimation_frame = tk.Frame(root)
+decimation_frame.pack()
+Label(decimation_frame, text="Capture").pack(side=tk.LEFT)
+decimation_var = tk.StringVar(value="all")
+tk.OptionMenu(decimation_frame, decimation_var, *decimation.MODES).pack(side=tk.LEFT)
+Label(decimation_frame, text="N frames / window s").pack(side=tk.LEFT)
+decimation_amount_entry = tk.Entry(decimation_frame, width=6)
+decimation_amount_entry.insert(0, "10")
+decimation_amount_entry.pack(side=tk.LEFT)
+gamma_frame = tk.Frame(root)
+gamma_frame.pack()
+Label(gamma_frame, text="Gamma").pack(side=tk.LEFT)
+gamma_entry = tk.Entry(gamma_frame, width=6)
+gamma_entry.insert(0, "1.0")
+gamma_entry.pack(side=tk.LEFT)
+sequence_button = Button(
+    root, text="Load Exposure Sequence", command=load_exposure_sequence
+)
+sequence_button.pack()
+sequence_label = Label(root, text="Fixed exposure")
+sequence_label.pack()
+status_label = Label(root, text="Pipeline idle", anchor="w", relief=tk.SUNKEN)
+status_label.pack(side=tk.BOTTOM, fill=tk.X)
+disk_label = Label(root, text="", anchor="w", relief=tk.SUNKEN)
+disk_label.pack(side=tk.BOTTOM, fill=tk.X)
 
 root.protocol("WM_DELETE_WINDOW", on_close)
 
+system = PySpin.System.GetInstance()
+camera_discovery = discovery.CameraDiscovery(system)
+camera_discovery.start()
+
 idle_event.set()  # Initially idle
 root.after(100, update_gui)  # Start the GUI update loop
+root.after(1000, update_status)  # Refresh the telemetry status bar once a second
+root.after(50, poll_gui_events)  # Run calls queued by the protocol thread
 
 root.mainloop()
 
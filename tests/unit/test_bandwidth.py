@@ -0,0 +1,46 @@
+import pytest
+
+from nvuelab.utils.bandwidth import CameraDemand, plan_bandwidth, summarize
+
+
+def test_spare_bandwidth_is_shared_equally():
+    demands = [
+        CameraDemand("a", "USB3", fps=100, bytes_per_frame=1_000_000),
+        CameraDemand("b", "USB3", fps=50, bytes_per_frame=1_000_000),
+    ]
+    plan_bandwidth(demands, capacity=400e6, headroom=0.5)
+    assert demands[0].allocated == pytest.approx(125e6)
+    assert demands[1].allocated == pytest.approx(75e6)
+    assert demands[1].sustainable_fps == pytest.approx(75)
+
+
+def test_oversubscription_slows_every_camera_equally():
+    demands = [
+        CameraDemand("a", "USB3", fps=300, bytes_per_frame=1_000_000),
+        CameraDemand("b", "USB3", fps=100, bytes_per_frame=1_000_000),
+    ]
+    plan_bandwidth(demands, capacity=200e6, headroom=1.0)
+    assert demands[0].sustainable_fps == pytest.approx(150)
+    assert demands[1].sustainable_fps == pytest.approx(50)
+    assert sum(d.allocated for d in demands) == pytest.approx(200e6)
+
+
+def test_interfaces_are_planned_separately():
+    demands = [
+        CameraDemand("usb", "USB3", fps=100, bytes_per_frame=1_000_000),
+        CameraDemand("gige", "GigE", fps=100, bytes_per_frame=1_000_000),
+    ]
+    plan_bandwidth(demands, headroom=1.0)
+    assert demands[0].allocated == pytest.approx(380e6)
+    assert demands[1].allocated == pytest.approx(115e6)
+
+
+def test_zero_payload_has_no_sustainable_rate():
+    assert CameraDemand("a", "USB3", fps=10, bytes_per_frame=0).sustainable_fps == 0.0
+
+
+def test_summarize():
+    demand = CameraDemand("a", "GigE", fps=10, bytes_per_frame=100, allocated=2000)
+    assert summarize([demand]) == {
+        "a": {"fps": 10, "required": 1000, "allocated": 2000, "measured": 0.0}
+    }
@@ -0,0 +1,54 @@
+import pytest
+
+from nvuelab.utils import disk
+from nvuelab.utils.budget import CameraLimits, FrameRateBudget, frame_rate_budget
+
+
+def test_budget_picks_the_slowest_stage():
+    limits = CameraLimits(
+        width=1000,
+        height=1000,
+        bytes_per_frame=1_000_000,
+        exposure_us=2000,
+        resulting_fps=400,
+        link_limit=300e6,
+    )
+    per_frame = disk.estimate_bytes_per_second(1000, 1000, 1, fourcc="avc1")
+    budget = frame_rate_budget(
+        limits,
+        encoder_fps=250,
+        disk_bytes_per_second=1000 * per_frame,
+        requested_fps=350,
+    )
+    assert budget.stages == pytest.approx(
+        {"exposure": 500, "camera": 400, "link": 300, "encoder": 250, "disk": 1000}
+    )
+    assert budget.bottleneck == "encoder"
+    assert budget.sustainable_fps == 250
+    assert not budget.fits
+    assert "limited by encoder" in budget.format_report()
+
+
+def test_disk_stage_uses_the_output_size():
+    limits = CameraLimits(width=2000, height=2000)
+    per_frame = disk.estimate_bytes_per_second(500, 500, 1, fourcc="FFV1")
+    budget = frame_rate_budget(
+        limits,
+        disk_bytes_per_second=100 * per_frame,
+        output_size=(500, 500),
+        fourcc="FFV1",
+    )
+    assert budget.stages == pytest.approx({"disk": 100})
+
+
+def test_unknown_stages_are_left_out():
+    budget = frame_rate_budget(CameraLimits(width=640, height=480, resulting_fps=90))
+    assert budget.stages == {"camera": 90}
+    assert budget.fits
+
+
+def test_empty_budget():
+    budget = FrameRateBudget(requested_fps=10)
+    assert budget.sustainable_fps == 0.0
+    assert budget.bottleneck == ""
+    assert not budget.fits
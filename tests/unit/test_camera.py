@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from nvuelab.utils.camera import host_lookup_table, make_lut, validate_lut
+
+
+def test_identity_lut():
+    assert np.array_equal(make_lut(), np.arange(256))
+
+
+def test_gamma_brightens_midtones():
+    lut = make_lut(gamma=0.5)
+    assert lut[0] == 0 and lut[-1] == 255
+    assert lut[64] > 64
+
+
+@pytest.mark.parametrize("gamma", [0, -1.0])
+def test_non_positive_gamma_raises(gamma):
+    with pytest.raises(ValueError):
+        make_lut(gamma=gamma)
+
+
+def test_validate_lut_rejects_out_of_range_values():
+    with pytest.raises(ValueError):
+        validate_lut([0, 1, 2, 4])
+    with pytest.raises(ValueError):
+        validate_lut([0])
+
+
+def test_host_lookup_table():
+    invert = host_lookup_table(255 - np.arange(256))
+    img = np.array([[0, 10], [200, 255]], np.uint8)
+    assert np.array_equal(invert(img), 255 - img)
+    deep = host_lookup_table(make_lut(size=4096))
+    img = np.array([[0, 4095]], np.uint16)
+    assert np.array_equal(deep(img), img)
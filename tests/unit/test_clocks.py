@@ -0,0 +1,49 @@
+import time
+
+import pytest
+
+from nvuelab.utils.clocks import MonotonicTimer, wait_until
+
+
+def test_wait_until_never_wakes_early():
+    deadline = time.perf_counter_ns() + 20_000_000
+    late = wait_until(deadline)
+    assert time.perf_counter_ns() >= deadline
+    assert 0 <= late < 10_000_000
+
+
+def test_wait_until_a_past_deadline_returns_at_once():
+    deadline = time.perf_counter_ns() - 1_000_000
+    assert wait_until(deadline) >= 1_000_000
+
+
+def test_elapsed_time_ignores_wall_clock_jumps(monkeypatch):
+    timer = MonotonicTimer()
+    timer.start()
+    monkeypatch.setattr(time, "time", lambda: 0.0)
+    monkeypatch.setattr(time, "time_ns", lambda: 0)
+    time.sleep(0.01)
+    timer.stop()
+    assert 0.01 <= timer.elapsed_time < 1.0
+    assert timer.end_time == pytest.approx(timer.start_time + timer.elapsed_time)
+    assert timer.elapsed_ns == round(timer.elapsed_time * 1e9)
+
+
+def test_deadlines_are_relative_to_the_start():
+    timer = MonotonicTimer(duration=5.0)
+    timer.start()
+    assert timer.deadline_ns(1.5) == timer.start_ns + 1_500_000_000
+    assert timer.wall_time_at(2.0) == timer.start_time + 2.0
+    assert 4.0 < timer.get_remaining_time() <= 5.0
+    late = timer.wait_until_elapsed(0.005)
+    assert late >= 0
+    assert timer.get_elapsed_ns() >= 5_000_000
+
+
+def test_reset_clears_the_monotonic_state():
+    timer = MonotonicTimer()
+    timer.start()
+    timer.stop()
+    timer.reset()
+    assert (timer.start_ns, timer.elapsed_ns, timer.is_running) == (0, 0, False)
+    assert timer.get_elapsed_time() == 0.0
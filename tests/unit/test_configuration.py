@@ -0,0 +1,120 @@
+import pytest
+
+from nvuelab.utils import configuration
+from nvuelab.utils.configuration import (
+    TRIGGER_ORDER,
+    configuration_hash,
+    load_profile,
+    order_profile,
+    profile_mismatches,
+    restore_configuration,
+)
+
+
+class _Camera:
+    # User sets only hold the digest node, which is all restore_configuration reads back
+    def __init__(self):
+        self.user_sets = {configuration.FACTORY_USER_SET: ""}
+        self.digest = ""
+        self.configured = 0
+
+
+@pytest.fixture
+def cam(monkeypatch):
+    def load_user_set(cam, user_set):
+        if user_set not in cam.user_sets:
+            return False
+        cam.digest = cam.user_sets[user_set]
+        return True
+
+    def save_user_set(cam, user_set):
+        cam.user_sets[user_set] = cam.digest
+        return True
+
+    def write_digest(cam, digest):
+        cam.digest = digest
+        return True
+
+    monkeypatch.setattr(configuration, "load_user_set", load_user_set)
+    monkeypatch.setattr(configuration, "save_user_set", save_user_set)
+    monkeypatch.setattr(configuration, "read_digest", lambda cam: cam.digest)
+    monkeypatch.setattr(configuration, "write_digest", write_digest)
+    monkeypatch.setattr(configuration, "_read_tl_string", lambda cam, name: "1.0")
+    return _Camera()
+
+
+def _configure(cam):
+    cam.configured += 1
+
+
+def test_configuration_hash_is_order_independent():
+    first = configuration_hash({"fps": 100, "exposure": 5000}, "1.0")
+    second = configuration_hash({"exposure": 5000, "fps": 100}, "1.0")
+    assert first == second
+    assert len(first) == 16
+
+
+def test_configuration_hash_depends_on_the_firmware():
+    settings = {"fps": 100}
+    assert configuration_hash(settings, "1.0") != configuration_hash(settings, "1.1")
+
+
+def test_saved_user_set_is_loaded_on_the_next_start(cam):
+    assert not restore_configuration(cam, {"fps": 20}, _configure)
+    assert cam.user_sets["UserSet1"] == configuration_hash({"fps": 20}, "1.0")
+    assert restore_configuration(cam, {"fps": 20}, _configure)
+    assert cam.configured == 1
+
+
+def test_changed_settings_rebuild_the_user_set(cam):
+    restore_configuration(cam, {"fps": 20}, _configure)
+    assert not restore_configuration(cam, {"fps": 30}, _configure)
+    assert cam.configured == 2
+    assert cam.user_sets["UserSet1"] == configuration_hash({"fps": 30}, "1.0")
+
+
+def test_user_set_saved_elsewhere_is_not_trusted(cam):
+    restore_configuration(cam, {"fps": 20}, _configure)
+    # Another program saves its own configuration to the same user set
+    cam.user_sets["UserSet1"] = "other"
+    assert not restore_configuration(cam, {"fps": 20}, _configure)
+    assert cam.configured == 2
+    assert restore_configuration(cam, {"fps": 20}, _configure)
+
+
+def test_camera_profile_overrides_the_default(tmp_path):
+    filepath = tmp_path / "profile.toml"
+    filepath.write_text(
+        '[default]\nExposureTime = 8000\nPixelFormat = "Mono8"\n'
+        '[cameras."123"]\nExposureTime = 4000\n',
+        encoding="utf-8",
+    )
+    assert load_profile(filepath, "123") == {
+        "ExposureTime": 4000,
+        "PixelFormat": "Mono8",
+    }
+    assert load_profile(filepath, "456")["ExposureTime"] == 8000
+
+
+def test_empty_profile_raises(tmp_path):
+    filepath = tmp_path / "profile.toml"
+    filepath.write_text('[cameras."123"]\nWidth = 640\n', encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_profile(filepath, "456")
+
+
+def test_trigger_settings_are_applied_last():
+    profile = {name: None for name in reversed(TRIGGER_ORDER)}
+    profile.update({"ExposureTime": 1, "PixelFormat": "Mono8"})
+    order = order_profile(profile)
+    assert order.index("PixelFormat") < order.index("ExposureTime")
+    assert order[-len(TRIGGER_ORDER) :] == list(TRIGGER_ORDER)
+
+
+def test_profile_mismatches_tolerate_float_rounding():
+    report = {
+        "ExposureTime": {"requested": 8000, "applied": 8000.000001},
+        "Width": {"requested": 1440, "applied": 1436},
+        "PixelFormat": {"requested": "Mono8", "applied": "Mono8"},
+    }
+    assert list(profile_mismatches(report)) == ["Width"]
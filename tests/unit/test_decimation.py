@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from nvuelab.utils.decimation import Decimator
+
+SECOND = 1_000_000_000
+
+
+def test_every_keeps_one_frame_in_n():
+    decimator = Decimator("every", every=3)
+    kept = [decimator.keep(i) for i in range(7)]
+    assert kept == [True, False, False, True, False, False, True]
+    assert decimator.seen == 7
+
+
+def test_window_keeps_the_first_frame_per_window():
+    decimator = Decimator("window", window_seconds=1.0)
+    timestamps = [0, SECOND // 2, SECOND, 2 * SECOND - 1, 3 * SECOND]
+    assert [decimator.keep(t) for t in timestamps] == [True, False, True, False, True]
+
+
+def test_focus_returns_the_sharpest_frame_of_each_window():
+    rng = np.random.default_rng(0)
+    flat = np.full((32, 32), 128, np.uint8)
+    sharp = rng.integers(0, 256, (32, 32), dtype=np.uint8)
+    decimator = Decimator("focus", window_seconds=1.0)
+    assert decimator.select(flat, 0) is None
+    assert decimator.select(sharp, SECOND // 2) is None
+    selected = decimator.select(flat, SECOND)
+    assert np.array_equal(selected, sharp)
+    assert np.array_equal(decimator.flush(), flat)
+    assert decimator.flush() is None
+    assert decimator.kept == 2
+
+
+def test_held_frame_is_a_copy():
+    decimator = Decimator("focus")
+    img = np.zeros((8, 8), np.uint8)
+    decimator.select(img, 0)
+    img[:] = 255
+    assert not decimator.flush().any()
+
+
+@pytest.mark.parametrize(
+    "kwargs", [{"mode": "sometimes"}, {"every": 0}, {"window_seconds": 0}]
+)
+def test_invalid_settings_raise(kwargs):
+    with pytest.raises(ValueError):
+        Decimator(**kwargs)
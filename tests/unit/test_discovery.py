@@ -0,0 +1,110 @@
+import threading
+import time
+
+import pytest
+
+from nvuelab.utils import camera, discovery
+from nvuelab.utils.discovery import CameraDiscovery
+
+
+class _Camera:
+    def __init__(self, serial):
+        self.serial = serial
+        self.valid = True
+
+    def IsValid(self):
+        return self.valid
+
+
+class _CameraList(list):
+    def GetSize(self):
+        return len(self)
+
+    def GetByIndex(self, i):
+        return self[i]
+
+    def Clear(self):
+        pass
+
+
+class _System:
+    def __init__(self, cameras):
+        self.cameras = cameras
+        self.handlers = []
+        self.updates = 0
+        self.caller = None
+
+    def RegisterEventHandler(self, handler):
+        self.handlers.append(handler)
+
+    def UnregisterEventHandler(self, handler):
+        self.handlers.remove(handler)
+
+    def UpdateInterfaceList(self):
+        self.updates += 1
+        self.caller = threading.current_thread()
+
+    def GetCameras(self):
+        return _CameraList(self.cameras)
+
+
+@pytest.fixture
+def system(monkeypatch):
+    monkeypatch.setattr(discovery, "_event_handlers", lambda d: ("device", "interface"))
+    monkeypatch.setattr(discovery, "_serial_number", lambda cam: cam.serial)
+    return _System([_Camera("2"), _Camera("1")])
+
+
+def _started(system):
+    cameras = CameraDiscovery(system)
+    cameras.start()
+    assert cameras.wait(1)
+    return cameras
+
+
+def test_first_enumeration(system):
+    cameras = _started(system)
+    assert cameras.serials() == ["1", "2"]
+    assert cameras.get("2") is system.cameras[0]
+    assert cameras.get("3") is None
+    assert system.handlers == ["device", "interface"]
+    cameras.close()
+    assert system.handlers == []
+    assert cameras.serials() == []
+
+
+def test_interface_change_enumerates_on_the_discovery_thread(system):
+    cameras = _started(system)
+    changes = cameras.changes
+    system.cameras.append(_Camera("3"))
+    # What the interface event handler does on the Spinnaker thread
+    cameras._interfaces_changed.set()
+    for _ in range(100):
+        if cameras.changes > changes:
+            break
+        time.sleep(0.01)
+    assert cameras.serials() == ["1", "2", "3"]
+    assert system.updates == 1
+    assert system.caller is cameras._thread
+    cameras.close()
+    assert not cameras._thread.is_alive()
+
+
+def test_removal(system):
+    cameras = _started(system)
+    cameras._remove(2)
+    assert cameras.serials() == ["1"]
+    # Without a serial number the invalidated cameras are removed
+    system.cameras[1].valid = False
+    cameras._remove(None)
+    assert cameras.serials() == []
+    cameras.close()
+
+
+def test_init_from_discovery_without_the_camera(system, capsys):
+    cameras = _started(system)
+    # Disconnected between listing the serial numbers and fetching the camera
+    cameras.get = lambda serial: None
+    assert camera.init_from_discovery(cameras, "1") == (system, None)
+    assert "not connected" in capsys.readouterr().out
+    cameras.close()
@@ -0,0 +1,100 @@
+import shutil
+import time
+from collections import namedtuple
+
+import pytest
+
+from nvuelab.utils import disk, video
+from nvuelab.utils.disk import DiskMonitor, check_capacity
+from nvuelab.utils.telemetry import PipelineTelemetry
+
+GB = 1024**3
+Usage = namedtuple("Usage", "total used free")
+
+
+class _Writer:
+    backlog = 0
+    frames_dropped = 0
+
+
+def _free(monkeypatch, free):
+    monkeypatch.setattr(shutil, "disk_usage", lambda path: Usage(0, 0, free))
+
+
+def test_capacity_check(monkeypatch, tmp_path):
+    _free(monkeypatch, 10 * GB)
+    assert check_capacity(tmp_path, GB / 3600, 3600, reserve_bytes=2 * GB)[:2] == (
+        True,
+        False,
+    )
+    assert check_capacity(tmp_path, GB, 3600, reserve_bytes=2 * GB)[:2] == (
+        False,
+        False,
+    )
+    _free(monkeypatch, GB)
+    assert check_capacity(tmp_path, 1, 1, reserve_bytes=2 * GB)[:2] == (False, True)
+
+
+def test_estimate_counts_every_output_with_its_codec():
+    single = video.estimate_bytes_per_second(1920, 1080, 20)
+    assert single == disk.estimate_bytes_per_second(1920, 1080, 20)
+    archive_and_proxy = video.estimate_bytes_per_second(
+        1920, 1080, 20, video.ARCHIVE_AND_PROXY
+    )
+    proxy = disk.estimate_bytes_per_second(854, 480, 10, fourcc="avc1")
+    lossless = disk.estimate_bytes_per_second(1920, 1080, 20, fourcc="FFV1")
+    assert archive_and_proxy == pytest.approx(lossless + proxy)
+    assert archive_and_proxy > 10 * single
+
+
+def _run_monitor(tmp_path, telemetry, update, updates=60):
+    degraded = []
+    monitor = DiskMonitor(
+        tmp_path,
+        telemetry,
+        [("first", lambda: degraded.append("first"))],
+        interval=0.03,
+        sustain=3,
+        fsync_limit_ms=1e9,
+        min_time_to_full_s=0,
+    )
+    monitor.start()
+    for _ in range(updates):
+        update()
+        time.sleep(0.005)
+    monitor.stop()
+    return degraded
+
+
+def test_skipped_frames_do_not_degrade(tmp_path):
+    telemetry = PipelineTelemetry()
+    telemetry.watch_writer(_Writer())
+
+    def decimated():
+        # Ten frames grabbed for every frame written, as with decimation or motion gating
+        for _ in range(10):
+            telemetry.record_grab(telemetry.last_frame_id + 1)
+        telemetry.record_write(0.001)
+
+    assert _run_monitor(tmp_path, telemetry, decimated) == []
+
+
+def test_growing_writer_backlog_degrades(tmp_path):
+    telemetry = PipelineTelemetry()
+    writer = _Writer()
+    telemetry.watch_writer(writer)
+
+    def falling_behind():
+        writer.backlog += 10
+
+    assert _run_monitor(tmp_path, telemetry, falling_behind) == ["first"]
+
+
+def test_camera_drops_degrade(tmp_path):
+    telemetry = PipelineTelemetry()
+
+    def dropping():
+        telemetry.record_grab(telemetry.last_frame_id + 3)
+
+    assert _run_monitor(tmp_path, telemetry, dropping) == ["first"]
+    assert telemetry.writer_backlog() == 0
@@ -0,0 +1,66 @@
+import toml
+
+from nvuelab.utils import clocks
+from nvuelab.utils.event_log import (
+    ExperimentLog,
+    close_logs,
+    read_events,
+    repair_torn_tail,
+)
+
+
+def test_records_round_trip(tmp_path):
+    filepath = tmp_path / "session.jsonl"
+    with ExperimentLog(filepath) as log:
+        log.log_event("phase", name="baseline")
+        log.append_many([{"type": "timer", "value": i} for i in range(3)])
+    records = list(read_events(filepath))
+    assert [r["type"] for r in records] == ["phase", "timer", "timer", "timer"]
+    assert [r.get("value") for r in records[1:]] == [0, 1, 2]
+    assert all("logged_at" in r for r in records)
+
+
+def test_torn_tail_is_removed_on_open(tmp_path):
+    filepath = tmp_path / "session.jsonl"
+    filepath.write_bytes(b'{"type":"a"}\n{"type":"b","val')
+    with ExperimentLog(filepath) as log:
+        log.log_event("c")
+    assert [r["type"] for r in read_events(filepath)] == ["a", "c"]
+
+
+def test_repair_torn_tail_across_chunks(tmp_path):
+    filepath = tmp_path / "session.jsonl"
+    filepath.write_bytes(b'{"type":"a"}\n' + b"x" * 10_000)
+    assert repair_torn_tail(filepath) == 10_000
+    assert filepath.read_bytes() == b'{"type":"a"}\n'
+    assert repair_torn_tail(filepath) == 0
+
+
+def test_repair_without_a_complete_line(tmp_path):
+    filepath = tmp_path / "session.jsonl"
+    filepath.write_bytes(b"y" * 5000)
+    assert repair_torn_tail(filepath) == 5000
+    assert filepath.read_bytes() == b""
+    assert repair_torn_tail(tmp_path / "missing.jsonl") == 0
+
+
+def test_read_events_skips_corrupt_lines(tmp_path):
+    filepath = tmp_path / "session.jsonl"
+    filepath.write_bytes(b'{"type":"a"}\nnot json\n{"type":"b"}\n{"type":"c"')
+    assert [r["type"] for r in read_events(filepath)] == ["a", "b"]
+
+
+def test_timer_states_export_to_toml(tmp_path):
+    filepath = tmp_path / "experiment-times.toml"
+    timer = clocks.Timer(start_time=1_700_000_000.0, end_time=1_700_000_060.0)
+    timer.elapsed_time = 60.0
+    clocks.save_timer_state(timer, "baseline", filepath)
+    clocks.save_timer_state(timer, "stimulus", filepath)
+    try:
+        assert clocks.export_timer_states(filepath) == filepath
+    finally:
+        close_logs()
+    data = toml.loads(filepath.read_text(encoding="utf-8"))
+    assert len(data) == 2
+    assert all(phase["elapsed_time"] == 60.0 for phase in data.values())
+    assert not filepath.with_suffix(".toml.tmp").exists()
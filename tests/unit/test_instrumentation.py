@@ -0,0 +1,62 @@
+import pytest
+
+from nvuelab.utils.instrumentation import (
+    _MAX_VALUE,
+    LatencyHistogram,
+    StageProfiler,
+    _bucket_index,
+    _bucket_value,
+)
+
+
+@pytest.mark.parametrize("value", [0, 1, 63, 64, 65, 1000, 123_456_789, _MAX_VALUE])
+def test_bucket_value_is_within_three_percent(value):
+    assert abs(_bucket_value(_bucket_index(value)) - value) <= 0.032 * value
+
+
+def test_small_values_are_exact():
+    for value in range(64):
+        assert _bucket_value(_bucket_index(value)) == value
+
+
+def test_percentiles():
+    histogram = LatencyHistogram()
+    for value in range(1, 1001):
+        histogram.record(value * 1000)
+    assert histogram.total == 1000
+    assert histogram.percentile(50) == pytest.approx(500_000, rel=0.03)
+    assert histogram.percentile(99) == pytest.approx(990_000, rel=0.03)
+    assert histogram.percentile(100) == 1_000_000
+
+
+def test_out_of_range_values_are_clamped():
+    histogram = LatencyHistogram()
+    histogram.record(-5)
+    histogram.record(_MAX_VALUE * 2)
+    assert histogram.percentile(1) == 0
+    assert histogram.max_value == _MAX_VALUE
+
+
+def test_reset_clears_the_histogram():
+    histogram = LatencyHistogram()
+    histogram.record(10)
+    histogram.reset()
+    assert histogram.total == 0
+    assert histogram.percentile(50) == 0
+    assert not any(histogram.counts)
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = StageProfiler()
+    profiler.lap("grab", profiler.now())
+    assert all(h.total == 0 for h in profiler.histograms.values())
+
+
+def test_enabled_profiler_chains_laps():
+    profiler = StageProfiler(enabled=True)
+    start = profiler.now()
+    start = profiler.lap("grab", start)
+    profiler.lap("write", start)
+    report = profiler.report()
+    assert set(report) == {"grab", "write"}
+    assert report["grab"]["count"] == 1
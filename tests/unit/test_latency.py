@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from nvuelab.utils import latency
+
+MS = 1_000_000
+
+
+class _Camera:
+    def GetNodeMap(self):
+        return None
+
+
+class _Value:
+    def __init__(self):
+        self.value = 0
+
+    def GetValue(self):
+        return self.value
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    # Without ExposureEnd events the recorder skips every camera call after the node check
+    monkeypatch.setattr(latency.camera, "set_enum_value", lambda *args: False)
+    recorder = latency.ExposureLatencyRecorder(_Camera(), capacity=4)
+    recorder._event_frame_id = _Value()
+    recorder._event_timestamp = _Value()
+    return recorder
+
+
+def _event(recorder, monkeypatch, frame_id, timestamp, host_ns):
+    recorder._event_frame_id.value = frame_id
+    recorder._event_timestamp.value = timestamp
+    monkeypatch.setattr(latency.time, "perf_counter_ns", lambda: host_ns)
+    recorder._on_exposure_end()
+
+
+def test_latency_components(recorder, monkeypatch):
+    _event(recorder, monkeypatch, 1, 0, 0)
+    _event(recorder, monkeypatch, 2, 3 * MS, 10 * MS)
+    _event(recorder, monkeypatch, 3, 53 * MS, 20 * MS)
+    # Frame 2 was already being waited for; frame 3 sat in the queue for 5 ms
+    recorder.record_frame(2, 1 * MS, 9 * MS, 12 * MS)
+    recorder.record_frame(3, 50 * MS, 25 * MS, 26 * MS)
+    recorder.record_frame(4, 100 * MS, 30 * MS, 31 * MS)
+    result = recorder.latencies()
+    assert np.allclose(result["exposure"], [2, 3])
+    assert np.allclose(result["queue"], [0, 5])
+    assert np.allclose(result["transfer"], [2, 1])
+    assert np.allclose(result["total"], [4, 9])
+
+
+def test_rings_keep_the_last_records(recorder, monkeypatch):
+    for frame_id in range(6):
+        _event(recorder, monkeypatch, frame_id, 2 * MS, frame_id * MS)
+        recorder.record_frame(frame_id, 0, frame_id * MS, frame_id * MS + MS)
+    assert recorder.event_count == recorder.frame_count == 6
+    assert sorted(recorder.frames["frame_id"]) == [2, 3, 4, 5]
+    assert recorder.report()["total"]["count"] == 4
+    assert recorder.report()["total"]["max_ms"] == pytest.approx(3)
+
+
+def test_report_without_pairs_is_empty(recorder, capsys):
+    recorder.record_frame(1, 0, 0, MS)
+    assert recorder.report() == {}
+    recorder.print_report()
+    assert "No frames could be paired" in capsys.readouterr().out
+
+
+def test_save_keeps_only_recorded_entries(recorder, monkeypatch, tmp_path):
+    _event(recorder, monkeypatch, 7, 0, 0)
+    recorder.record_frame(7, 0, 0, MS)
+    recorder.record_frame(8, 0, MS, 2 * MS)
+    with np.load(recorder.save(tmp_path / "latency.npz")) as saved:
+        assert list(saved["events"]["frame_id"]) == [7]
+        assert list(saved["frames"]["frame_id"]) == [7, 8]
+    recorder.close()
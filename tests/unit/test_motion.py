@@ -0,0 +1,75 @@
+import numpy as np
+
+from nvuelab.utils.motion import MotionGatedWriter, MotionScorer, committed_segments
+
+
+class _ListWriter:
+    def __init__(self):
+        self.frames = []
+        self.released = False
+
+    def isOpened(self):
+        return True
+
+    def write(self, img):
+        self.frames.append(int(img[0, 0]))
+
+    def release(self):
+        self.released = True
+
+
+class _ScriptedScorer:
+    def __init__(self, scores):
+        self.scores = iter(scores)
+
+    def score(self, img):
+        return next(self.scores)
+
+
+def test_scorer_ignores_a_static_scene_and_sees_motion():
+    scorer = MotionScorer(width=32)
+    still = np.full((48, 64), 100, np.uint8)
+    assert scorer.score(still) == 0.0
+    assert scorer.score(still) == 0.0
+    moved = still.copy()
+    moved[:24, :32] = 200
+    assert scorer.score(moved) > 0.2
+
+
+def test_gate_commits_lead_in_motion_and_tail(tmp_path):
+    scores = [0.0] * 5 + [1.0] + [0.0] * 5 + [1.0] + [0.0] * 4
+    inner = _ListWriter()
+    gate = MotionGatedWriter(
+        inner,
+        tmp_path / "session.mp4",
+        threshold=0.5,
+        pre_frames=2,
+        post_frames=2,
+        scorer=_ScriptedScorer(scores),
+        capacity=4,
+    )
+    for i, _ in enumerate(scores):
+        gate.write(np.full((8, 8), i, np.uint8), timestamp=1000 * i)
+    gate.release()
+    assert inner.frames == [3, 4, 5, 6, 7, 9, 10, 11, 12, 13]
+    assert inner.released
+    records = np.load(tmp_path / "session.gate.npy")
+    assert records.size == len(scores)
+    assert records["timestamp"][-1] == 15_000
+    assert committed_segments(records).tolist() == [[3, 8], [9, 14]]
+
+
+def test_gate_without_lead_in(tmp_path):
+    inner = _ListWriter()
+    gate = MotionGatedWriter(
+        inner,
+        tmp_path / "session.mp4",
+        threshold=0.5,
+        pre_frames=0,
+        post_frames=0,
+        scorer=_ScriptedScorer([0.0, 1.0, 0.0]),
+    )
+    for i in range(3):
+        gate.write(np.full((8, 8), i, np.uint8))
+    gate.release()
+    assert inner.frames == [1]
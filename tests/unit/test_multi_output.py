@@ -0,0 +1,108 @@
+import time
+
+import numpy as np
+import pytest
+
+from nvuelab.utils import video
+from nvuelab.utils.tracing import TraceRecorder
+from nvuelab.utils.video import MultiOutputWriter, OutputSpec
+
+
+class _SlowWriter:
+    def __init__(self, path, fourcc, fps, size, is_color):
+        self.path = path
+        self.size = size
+        self.frames = []
+
+    def isOpened(self):
+        return True
+
+    def write(self, img):
+        time.sleep(0.005)
+        self.frames.append(int(img[0, 0]))
+
+    def release(self):
+        pass
+
+
+@pytest.fixture
+def writers(monkeypatch):
+    created = []
+
+    def open_writer(*args):
+        created.append(_SlowWriter(*args))
+        return created[-1]
+
+    monkeypatch.setattr(video.cv, "VideoWriter", open_writer)
+    return created
+
+
+def test_archive_never_drops_and_proxy_drops_are_reported(tmp_path, writers):
+    drops = []
+    writer = MultiOutputWriter(
+        tmp_path / "session.mp4",
+        20,
+        64,
+        48,
+        (
+            OutputSpec(extension=".mkv", fourcc="FFV1", droppable=False),
+            OutputSpec(suffix="_proxy", height=24),
+        ),
+        queue_size=1,
+        on_drop=lambda output, frame: drops.append((output, frame)),
+    )
+    for i in range(30):
+        writer.write(np.full((48, 64), i, np.uint8))
+    writer.release()
+    archive, proxy = writers
+    assert archive.frames == list(range(30))
+    assert writer.dropped[0] == 0
+    assert writer.dropped[1] == writer.frames_dropped > 0
+    assert len(proxy.frames) + writer.dropped[1] == 30
+    assert {output for output, _ in drops} == {"session_proxy.mp4"}
+    assert sorted(proxy.frames + [frame for _, frame in drops]) == list(range(30))
+    assert proxy.size == (32, 24)
+
+
+def test_every_divides_the_output_rate(tmp_path, writers):
+    writer = MultiOutputWriter(
+        tmp_path / "session.mp4", 20, 64, 48, (OutputSpec(every=3, droppable=False),)
+    )
+    for i in range(10):
+        writer.write(np.full((48, 64), i, np.uint8))
+    writer.release()
+    assert writers[0].frames == [0, 3, 6, 9]
+    assert writer.backlog == 0
+
+
+def test_archive_and_proxy_defaults():
+    archive, proxy = video.ARCHIVE_AND_PROXY
+    assert not archive.droppable and proxy.droppable
+    assert video._output_size(proxy, 1920, 1080) == (854, 480)
+
+
+def test_writer_threads_are_traced(tmp_path, writers):
+    tracer = TraceRecorder(capacity=64)
+    writer = MultiOutputWriter(
+        tmp_path / "session.mp4",
+        20,
+        64,
+        48,
+        (
+            OutputSpec(fragment_seconds=0.25, droppable=False),
+            OutputSpec(suffix="_proxy", height=24, droppable=False),
+        ),
+        tracer=tracer,
+    )
+    for i in range(10):
+        writer.write(np.full((48, 64), i, np.uint8))
+    writer.release()
+    spans = {
+        ring.thread_name: {tracer._names[i] for i in ring.names[: ring.count]}
+        for ring in tracer._rings
+    }
+    assert spans == {
+        "encoder-session.mp4": {"encode"},
+        "encoder-session_proxy.mp4": {"resize", "encode"},
+        "fragments-session.mp4": {"open fragment", "finalise fragment"},
+    }
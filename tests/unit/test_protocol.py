@@ -0,0 +1,136 @@
+import time
+
+import pytest
+
+from nvuelab.utils.event_log import close_logs, read_events
+from nvuelab.utils.protocol import ProtocolRunner, Protocol, Phase, load_protocol
+
+PROTOCOL = """
+name = "open-field"
+
+[[phases]]
+name = "baseline"
+duration = 2
+duration_units = "minutes"
+on_start = [{action = "set_trigger", mode = "hardware"}, {action = "start_recording"}]
+
+[[phases]]
+name = "stimulus"
+duration = 30
+on_start = [{action = "mark", label = "light-on"}]
+on_end = [{action = "stop_recording"}]
+"""
+
+
+@pytest.fixture(autouse=True)
+def _close_logs():
+    yield
+    close_logs()
+
+
+def _write(tmp_path, text):
+    filepath = tmp_path / "protocol.toml"
+    filepath.write_text(text, encoding="utf-8")
+    return filepath
+
+
+def test_load_protocol(tmp_path):
+    protocol = load_protocol(_write(tmp_path, PROTOCOL))
+    assert protocol.name == "open-field"
+    assert [phase.name for phase in protocol.phases] == ["baseline", "stimulus"]
+    assert protocol.phases[0].seconds == 120
+    assert protocol.total_seconds == 150
+    assert protocol.phases[0].on_start[0] == {
+        "action": "set_trigger",
+        "mode": "hardware",
+    }
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        "[[phases]]\nname = 'a'\n",
+        "[[phases]]\nname = 'a'\nduration = 0\n",
+        "[[phases]]\nname = 'a'\nduration = 1\nduration_units = 'days'\n",
+        "[[phases]]\nname = 'a'\nduration = 1\non_end = [{action = 'explode'}]\n",
+    ],
+)
+def test_invalid_protocols_raise(tmp_path, text):
+    with pytest.raises(ValueError):
+        load_protocol(_write(tmp_path, text))
+
+
+def test_runner_calls_handlers_on_schedule(tmp_path):
+    calls = []
+    protocol = Protocol(
+        "quick",
+        [
+            Phase("a", 0.02, on_start=[{"action": "start_recording"}]),
+            Phase(
+                "b",
+                0.02,
+                on_start=[{"action": "mark", "label": "cue"}],
+                on_end=[{"action": "stop_recording"}, {"action": "set_trigger"}],
+            ),
+        ],
+    )
+
+    def fail(action):
+        raise RuntimeError("no camera")
+
+    runner = ProtocolRunner(
+        protocol,
+        {
+            "start_recording": lambda action: calls.append(("start", time.monotonic())),
+            "stop_recording": lambda action: calls.append(("stop", time.monotonic())),
+            "set_trigger": fail,
+        },
+        log_path=tmp_path / "experiment-times.toml",
+    )
+    runner.start()
+    runner.join(5)
+    assert not runner.is_running()
+    assert [name for name, _ in calls] == ["start", "stop"]
+    assert calls[1][1] - calls[0][1] >= 0.035
+
+    close_logs()
+    records = list(read_events(tmp_path / "experiment-times.jsonl"))
+    boundaries = [r for r in records if r["type"] == "phase"]
+    assert [(r["phase"], r["boundary"]) for r in boundaries] == [
+        ("a", "start"),
+        ("a", "end"),
+        ("b", "start"),
+        ("b", "end"),
+    ]
+    assert boundaries[-1]["actual_offset"] >= boundaries[-1]["planned_offset"]
+    assert [r["label"] for r in records if r["type"] == "mark"] == ["cue"]
+    assert [r["action"] for r in records if r["type"] == "action_error"] == [
+        "set_trigger"
+    ]
+    assert len([r for r in records if r["type"] == "timer"]) == 2
+
+
+def test_stop_aborts_the_current_phase_and_runs_its_on_end(tmp_path):
+    ended = []
+    protocol = Protocol(
+        "long",
+        [
+            Phase("wait", 60, on_end=[{"action": "stop_recording"}]),
+            Phase("never", 60, on_start=[{"action": "start_recording"}]),
+        ],
+    )
+    runner = ProtocolRunner(
+        protocol,
+        {
+            "stop_recording": lambda action: ended.append("stop"),
+            "start_recording": lambda action: ended.append("start"),
+        },
+        log_path=tmp_path / "experiment-times.toml",
+    )
+    runner.start()
+    time.sleep(0.05)
+    runner.stop()
+    runner.join(5)
+    assert not runner.is_running()
+    assert ended == ["stop"]
@@ -0,0 +1,71 @@
+import pytest
+
+from nvuelab.utils.sequencer import SequencerDemuxWriter, SequencerState, load_sequence
+
+
+class _ListWriter:
+    def __init__(self, filename, fps, frame_width, frame_height):
+        self.filename = filename
+        self.fps = fps
+        self.frames = []
+        self.released = False
+
+    def isOpened(self):
+        return True
+
+    def write(self, img):
+        self.frames.append(img)
+
+    def release(self):
+        self.released = True
+
+
+def _write(tmp_path, text):
+    filepath = tmp_path / "sequence.toml"
+    filepath.write_text(text, encoding="utf-8")
+    return filepath
+
+
+def test_load_sequence(tmp_path):
+    states = load_sequence(
+        _write(
+            tmp_path,
+            "[[states]]\nname = 'dim'\nexposure_time = 2000\ngain = 0\n"
+            "[[states]]\nexposure_time = 15000\n",
+        )
+    )
+    assert states == [
+        SequencerState("dim", 2000, 0),
+        SequencerState("state1", 15000, None),
+    ]
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "[[states]]\nname = 'only'\n",
+        "[[states]]\nname = 'a'\n[[states]]\nname = 'a'\n",
+        "[[states]]\nname = 'a'\nexposure_time = 0\n[[states]]\nname = 'b'\n",
+    ],
+)
+def test_invalid_sequences_raise(tmp_path, text):
+    with pytest.raises(ValueError):
+        load_sequence(_write(tmp_path, text))
+
+
+def test_demux_writes_one_video_per_state(tmp_path):
+    states = [SequencerState("dim"), SequencerState("bright")]
+    writer = SequencerDemuxWriter(
+        tmp_path / "session.mp4", 20, 64, 48, states, writer_init=_ListWriter
+    )
+    for frame, set_index in enumerate([0, 1, 0, 1, 1, 5, -1]):
+        writer.write(frame, set_index)
+    writer.release()
+    dim, bright = writer.writers
+    assert dim.filename.endswith("session_dim.mp4")
+    assert bright.filename.endswith("session_bright.mp4")
+    assert dim.fps == bright.fps == 10
+    assert dim.frames == [0, 2]
+    assert bright.frames == [1, 3, 4]
+    assert writer.unknown == 2
+    assert dim.released and bright.released
@@ -0,0 +1,101 @@
+from types import SimpleNamespace
+
+import pytest
+
+from nvuelab.utils import spinnaker_log
+from nvuelab.utils.spinnaker_log import SpinnakerLogRouter, log_level
+
+# Spinnaker's priorities: lower values are more severe
+LEVELS = {"crit": 200, "error": 300, "warn": 400, "notice": 500, "info": 600}
+
+
+class _System:
+    def __init__(self):
+        self.level = None
+        self.handler = None
+
+    def SetLoggingEventPriorityLevel(self, level):
+        self.level = level
+
+    def RegisterLoggingEventHandler(self, handler):
+        self.handler = handler
+
+    def UnregisterLoggingEventHandler(self, handler):
+        assert handler is self.handler
+        self.handler = None
+
+
+class _Log:
+    def __init__(self):
+        self.records = []
+
+    def append_many(self, records):
+        self.records.extend(records)
+
+
+class _LogEvent:
+    def __init__(self, level, message):
+        self.level = level
+        self.message = message
+
+    def GetPriority(self):
+        return LEVELS[self.level]
+
+    def GetPriorityName(self):
+        return self.level.upper()
+
+    def GetCategoryName(self):
+        return "SpinnakerCallback"
+
+    def GetThreadName(self):
+        return "acquisition"
+
+    def GetTimestamp(self):
+        return "2026-10-19 12:00:00"
+
+    def GetLogMessage(self):
+        return self.message
+
+
+@pytest.fixture(autouse=True)
+def pyspin(monkeypatch):
+    levels = {f"SPINNAKER_LOG_LEVEL_{name.upper()}": v for name, v in LEVELS.items()}
+    monkeypatch.setattr(spinnaker_log, "PySpin", SimpleNamespace(**levels))
+    monkeypatch.setattr(spinnaker_log, "_logging_handler", lambda router: "handler")
+
+
+def test_log_level():
+    assert log_level("Warn") == 400
+    with pytest.raises(ValueError):
+        log_level("verbose")
+
+
+def test_events_are_written_on_close(capsys):
+    system, log = _System(), _Log()
+    router = SpinnakerLogRouter(system, log, level="notice", interval=10)
+    assert system.level == 500 and system.handler == "handler"
+    router._on_log_event(_LogEvent("warn", "packet resend"))
+    router._on_log_event(_LogEvent("error", "stream lost"))
+    router.close()
+    assert system.handler is None
+    assert [record["message"] for record in log.records] == [
+        "packet resend",
+        "stream lost",
+    ]
+    assert log.records[0]["type"] == spinnaker_log.LOG_RECORD
+    assert log.records[1]["level"] == "ERROR"
+    assert router.received == router.written == 2
+    # Only errors and worse reach the console
+    assert capsys.readouterr().out == "Spinnaker ERROR: stream lost\n"
+
+
+def test_overflow_drops_the_oldest_events(capsys):
+    log = _Log()
+    router = SpinnakerLogRouter(_System(), log, queue_size=2, interval=10)
+    for i in range(5):
+        router._on_log_event(_LogEvent("warn", str(i)))
+    router.close()
+    assert [record["message"] for record in log.records] == ["3", "4"]
+    assert router.received == 5
+    assert router.dropped == 3
+    assert "3 Spinnaker log events were dropped" in capsys.readouterr().out
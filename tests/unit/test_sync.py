@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from nvuelab.sync import ClockFit, fit_clock, map_events_to_frames, map_frames_to_events
+
+
+def test_fit_clock_recovers_offset_and_drift():
+    frames = np.arange(5000) / 100.0
+    pulses = 3.25 + frames * (1 + 50e-6)
+    fit = fit_clock(frames, pulses)
+    assert fit.offset == pytest.approx(3.25, abs=1e-6)
+    assert fit.drift_ppm == pytest.approx(50, abs=0.1)
+    assert fit.matched == frames.size
+
+
+def test_fit_clock_tolerates_missing_first_pulses():
+    # Irregular intervals, a periodic train only defines the pairing up to whole periods
+    rng = np.random.default_rng(0)
+    frames = np.cumsum(rng.uniform(0.005, 0.015, 1000))
+    pulses = (1.0 + frames)[3:]
+    fit = fit_clock(frames, pulses)
+    assert fit.offset == pytest.approx(1.0, abs=1e-6)
+    assert fit.matched == pulses.size
+
+
+def test_fit_clock_needs_two_samples():
+    with pytest.raises(ValueError):
+        fit_clock(np.array([0.0]), np.array([0.0, 1.0]))
+
+
+def test_map_events_to_frames():
+    table = map_events_to_frames(
+        np.arange(3.0), np.array([-0.5, 0.5, 2.25]), ClockFit()
+    )
+    assert table["frame"].tolist() == [-1, 0, 2]
+    assert np.isnan(table["lag"][0])
+    assert table["lag"][1:].tolist() == [0.5, 0.25]
+
+
+def test_map_frames_to_events_ranges_cover_every_event():
+    table = map_frames_to_events(np.arange(3.0), np.array([0.5, 1.5, 1.6]), ClockFit())
+    assert table.tolist() == [(0, 0, 1), (1, 1, 3), (2, 3, 3)]
+
+
+def test_map_frames_to_events_rejects_unsorted_events():
+    with pytest.raises(ValueError):
+        map_frames_to_events(np.arange(3.0), np.array([1.5, 0.5]), ClockFit())
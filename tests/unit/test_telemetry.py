@@ -0,0 +1,42 @@
+from nvuelab.utils.telemetry import LATENCY_SAMPLES, PipelineTelemetry
+
+
+def test_frame_id_gaps_count_as_dropped():
+    telemetry = PipelineTelemetry()
+    telemetry.record_grab(1)
+    telemetry.record_incomplete(2)
+    telemetry.record_grab(3)
+    telemetry.record_grab(6)
+    assert telemetry.frames_grabbed == 3
+    assert telemetry.frames_incomplete == 1
+    assert telemetry.frames_dropped == 2
+    assert telemetry.last_frame_id == 6
+
+
+def test_first_frame_is_not_a_gap():
+    telemetry = PipelineTelemetry()
+    telemetry.record_grab(100)
+    assert telemetry.frames_dropped == 0
+
+
+def test_reset_restarts_the_sequence():
+    telemetry = PipelineTelemetry()
+    telemetry.record_grab(1)
+    telemetry.record_grab(5)
+    telemetry.reset()
+    telemetry.record_grab(0)
+    assert telemetry.frames_dropped == 0
+    assert telemetry.frames_grabbed == 1
+
+
+def test_encode_percentiles_use_the_recent_window():
+    telemetry = PipelineTelemetry()
+    for _ in range(LATENCY_SAMPLES):
+        telemetry.record_write(1.0)
+    for i in range(LATENCY_SAMPLES):
+        telemetry.record_write((i + 1) / 1000)
+    snapshot = telemetry.snapshot()
+    assert snapshot.frames_written == 2 * LATENCY_SAMPLES
+    assert snapshot.encode_max_ms == LATENCY_SAMPLES
+    assert snapshot.encode_p50_ms == LATENCY_SAMPLES // 2
+    assert snapshot.buffer_underruns == -1
@@ -0,0 +1,60 @@
+import json
+import threading
+
+from nvuelab.utils.tracing import EVENT_SIZE, TraceRecorder
+
+
+def _spans(filepath):
+    events = json.loads(filepath.read_text(encoding="utf-8"))["traceEvents"]
+    return [event for event in events if event["ph"] == "X"]
+
+
+def test_spans_are_exported_in_microseconds(tmp_path):
+    recorder = TraceRecorder(capacity=16)
+    start = recorder.origin + 2_000
+    recorder.complete("grab", start, start + 5_000)
+    spans = _spans(recorder.save(tmp_path / "trace.json"))
+    assert spans == [
+        {
+            "name": "grab",
+            "ph": "X",
+            "pid": spans[0]["pid"],
+            "tid": threading.get_ident(),
+            "ts": 2.0,
+            "dur": 5.0,
+        }
+    ]
+
+
+def test_each_thread_gets_its_own_ring(tmp_path):
+    recorder = TraceRecorder(capacity=16)
+    recorder.instant("main")
+    worker = threading.Thread(target=recorder.instant, args=("worker",), name="w")
+    worker.start()
+    worker.join()
+    assert recorder.memory_budget() == 2 * 16 * EVENT_SIZE
+    events = json.loads(recorder.save(tmp_path / "trace.json").read_text())
+    names = {
+        event["args"]["name"] for event in events["traceEvents"] if event["ph"] == "M"
+    }
+    assert "w" in names
+    assert {span["name"] for span in _spans(tmp_path / "trace.json")} == {
+        "main",
+        "worker",
+    }
+
+
+def test_full_ring_keeps_the_newest_events_in_order(tmp_path):
+    recorder = TraceRecorder(capacity=4)
+    for i in range(10):
+        start = recorder.origin + i * 1_000
+        recorder.complete(f"span{i}", start, start + 1)
+    filepath = recorder.save(tmp_path / "trace.json")
+    assert [span["name"] for span in _spans(filepath)] == [
+        "span6",
+        "span7",
+        "span8",
+        "span9",
+    ]
+    events = json.loads(filepath.read_text())["traceEvents"]
+    assert any(event["name"] == "6 events overwritten" for event in events)
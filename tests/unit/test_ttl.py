@@ -0,0 +1,61 @@
+import numpy as np
+
+from nvuelab.utils.ttl import (
+    TTL_DTYPE,
+    frame_id_gaps,
+    line_edges,
+    load_ttl_log,
+    missed_triggers,
+    summarize,
+)
+
+PERIOD = 10_000_000
+
+
+def _records(frame_ids, timestamps, line_status):
+    records = np.zeros(len(frame_ids), dtype=TTL_DTYPE)
+    records["frame_id"] = frame_ids
+    records["timestamp"] = timestamps
+    records["line_status"] = line_status
+    return records
+
+
+def test_line_edges_follow_the_line_bit():
+    line2 = 1 << 2
+    records = _records(
+        range(6),
+        np.arange(6) * PERIOD,
+        [0, line2, line2 | 1, 1, line2, 0],
+    )
+    rising, falling = line_edges(records, line=2)
+    assert rising.tolist() == [PERIOD, 4 * PERIOD]
+    assert falling.tolist() == [3 * PERIOD, 5 * PERIOD]
+
+
+def test_missed_triggers_per_interval():
+    timestamps = np.array([0, 1, 2, 4, 5, 8]) * PERIOD
+    assert missed_triggers(timestamps).tolist() == [0, 0, 1, 0, 2]
+    assert missed_triggers(timestamps, period=2 * PERIOD).tolist() == [0, 0, 0, 0, 1]
+    assert missed_triggers(np.array([0])).size == 0
+
+
+def test_frame_id_gaps():
+    records = _records([1, 2, 5, 6, 8], np.zeros(5), np.zeros(5))
+    assert frame_id_gaps(records) == 3
+
+
+def test_summary_and_round_trip(tmp_path):
+    records = _records([0, 1, 3], np.array([0, 1, 3]) * PERIOD, [0, 1 << 2, 1 << 2])
+    filepath = tmp_path / "ttl.npy"
+    np.save(filepath, records)
+    summary = summarize(load_ttl_log(filepath), period=PERIOD)
+    assert summary == {
+        "frames": 3,
+        "missed_triggers": 1,
+        "intervals_with_misses": 1,
+        "frame_id_gaps": 1,
+        "rising_edges": 1,
+        "falling_edges": 0,
+        "median_interval_ms": 15.0,
+        "max_interval_ms": 20.0,
+    }
@@ -0,0 +1,92 @@
+import threading
+
+import cv2 as cv
+import numpy as np
+
+from nvuelab.utils import event_log, video
+from nvuelab.utils.video import (
+    FragmentedVideoWriter,
+    find_fragments,
+    manifest_path,
+    recover_recording,
+)
+
+
+def _record(filename, frames, fragment_seconds=1.0):
+    writer = FragmentedVideoWriter(
+        filename, 10, 64, 48, fragment_seconds=fragment_seconds, fourcc="mp4v"
+    )
+    for i in range(frames):
+        writer.write(np.full((48, 64), i * 5, np.uint8))
+    return writer
+
+
+def _count_frames(filename):
+    capture = cv.VideoCapture(str(filename))
+    frames = int(capture.get(cv.CAP_PROP_FRAME_COUNT))
+    capture.release()
+    return frames
+
+
+def test_fragments_are_listed_in_order(tmp_path):
+    filename = tmp_path / "session.mp4"
+    _record(filename, 25).release()
+    header, fragments = find_fragments(filename)
+    assert header["fps"] == 10
+    assert [f.name for f in fragments] == [
+        "session_part0000.mp4",
+        "session_part0001.mp4",
+        "session_part0002.mp4",
+    ]
+    assert manifest_path(filename).exists()
+    # The fragment opened ahead for the next rotation is removed
+    assert len(list(tmp_path.glob("session_part*"))) == 3
+    fragments = [
+        r
+        for r in event_log.read_events(manifest_path(filename))
+        if r["type"] == "fragment"
+    ]
+    assert [(r["first_frame"], r["frames"]) for r in fragments] == [
+        (0, 10),
+        (10, 10),
+        (20, 5),
+    ]
+
+
+def test_fragments_are_finalised_off_the_writing_thread(tmp_path, monkeypatch):
+    released_on = []
+    writer = _record(tmp_path / "session.mp4", 10)
+    release = video.FragmentedVideoWriter._finalise
+
+    def finalise(self, fragment, *args):
+        released_on.append(threading.current_thread())
+        release(self, fragment, *args)
+
+    monkeypatch.setattr(video.FragmentedVideoWriter, "_finalise", finalise)
+    for _ in range(11):
+        writer.write(np.zeros((48, 64), np.uint8))
+    writer.release()
+    assert released_on[:-1] and threading.current_thread() not in released_on[:-1]
+    assert released_on[-1] is threading.current_thread()
+
+
+def test_recover_recording_joins_every_fragment(tmp_path):
+    filename = tmp_path / "session.mp4"
+    _record(filename, 25).release()
+    output = recover_recording(filename)
+    assert output == tmp_path / "session_recovered.mp4"
+    assert _count_frames(output) == 25
+
+
+def test_recover_skips_the_fragment_torn_by_a_crash(tmp_path):
+    filename = tmp_path / "session.mp4"
+    _record(filename, 20).release()
+    torn = tmp_path / "session_part0002.mp4"
+    torn.write_bytes(b"\x00" * 100)
+    output = recover_recording(filename, tmp_path / "joined.mp4")
+    assert output == tmp_path / "joined.mp4"
+    assert _count_frames(output) == 20
+
+
+def test_recover_without_fragments(tmp_path):
+    assert recover_recording(tmp_path / "missing.mp4") is None